@@ -0,0 +1,234 @@
+# almacenamiento.py
+"""Almacén de archivos generados (facturas e informes en PDF).
+
+Las claves tienen la forma '<espacio>/<nombre>', por ejemplo
+'facturas/factura_7_<version>.pdf'. Hay dos implementaciones con la misma
+interfaz: AlmacenLocal, en disco, y AlmacenS3, para cualquier servicio
+compatible con S3 (AWS, MinIO para pruebas locales) usando boto3.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import send_file
+
+from config import Config
+
+
+class AlmacenLocal:
+    """Guarda cada clave en <raiz>/<espacio>/<xx>/<nombre>, con xx tomado de un hash del nombre
+    para no juntar miles de archivos en un mismo directorio."""
+
+    def __init__(self, raiz):
+        self.raiz = raiz
+
+    def _ruta(self, clave):
+        espacio, nombre = clave.split('/', 1)
+        if not nombre or '/' in nombre or nombre.startswith('.'):
+            raise ValueError(f'Clave no válida: {clave}')
+        particion = hashlib.sha1(nombre.encode()).hexdigest()[:2]
+        return os.path.join(self.raiz, espacio, particion, nombre)
+
+    def ruta_local(self, clave):
+        return self._ruta(clave)
+
+    def guardar_archivo(self, clave, generar):
+        """Llama a ``generar(ruta_temporal)`` y publica el archivo de forma atómica."""
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta), prefix='.', suffix='.tmp')
+        os.close(fd)
+        try:
+            generar(tmp)
+            os.replace(tmp, ruta)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def info(self, clave):
+        """(tamaño, fecha de modificación UTC) o None si la clave no existe."""
+        try:
+            stat = os.stat(self._ruta(clave))
+        except FileNotFoundError:
+            return None
+        return stat.st_size, datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+    def existe(self, clave):
+        return os.path.exists(self._ruta(clave))
+
+    def abrir(self, clave):
+        return open(self._ruta(clave), 'rb')
+
+    def eliminar(self, clave):
+        try:
+            os.remove(self._ruta(clave))
+        except FileNotFoundError:
+            pass
+
+    def listar(self, prefijo):
+        """Itera (clave, tamaño, fecha de modificación UTC) de las claves que empiezan con ``prefijo``."""
+        espacio, inicio = prefijo.split('/', 1)
+        directorio = os.path.join(self.raiz, espacio)
+        if not os.path.isdir(directorio):
+            return
+        for particion in os.scandir(directorio):
+            if not particion.is_dir():
+                continue
+            for entrada in os.scandir(particion.path):
+                nombre = entrada.name
+                if nombre.startswith(inicio) and not nombre.startswith('.'):
+                    try:
+                        stat = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield f'{espacio}/{nombre}', stat.st_size, datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+    def purgar(self, prefijo, max_edad=None, max_bytes=None):
+        eliminados = _purgar(self, prefijo, max_edad, max_bytes)
+        # Temporales de escrituras interrumpidas
+        espacio = prefijo.split('/', 1)[0]
+        limite = time.time() - 3600
+        directorio = os.path.join(self.raiz, espacio)
+        if os.path.isdir(directorio):
+            for particion in os.scandir(directorio):
+                if particion.is_dir():
+                    for entrada in os.scandir(particion.path):
+                        if entrada.name.endswith('.tmp') and entrada.stat().st_mtime < limite:
+                            os.remove(entrada.path)
+        return eliminados
+
+
+class AlmacenS3:
+    """Misma interfaz sobre un bucket S3. ``endpoint_url`` permite apuntar a MinIO u otro servicio local."""
+
+    def __init__(self, bucket, endpoint_url=None, cliente=None):
+        if cliente is None:
+            try:
+                import boto3  # dependencia opcional, solo para este almacén
+            except ImportError:
+                raise RuntimeError('ALMACEN=s3 requiere boto3: pip install -r requirements-s3.txt')
+            cliente = boto3.client('s3', endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.cliente = cliente
+
+    def ruta_local(self, clave):
+        return None
+
+    def guardar_archivo(self, clave, generar):
+        # El objeto se publica completo al terminar la subida: nunca se ve a medio escribir
+        fd, tmp = tempfile.mkstemp(suffix='.tmp')
+        os.close(fd)
+        try:
+            generar(tmp)
+            self.cliente.upload_file(tmp, self.bucket, clave)
+        finally:
+            os.remove(tmp)
+
+    def info(self, clave):
+        try:
+            respuesta = self.cliente.head_object(Bucket=self.bucket, Key=clave)
+        except Exception as e:
+            if _no_existe(e):
+                return None
+            raise
+        return respuesta['ContentLength'], respuesta['LastModified']
+
+    def existe(self, clave):
+        return self.info(clave) is not None
+
+    def abrir(self, clave):
+        return self.cliente.get_object(Bucket=self.bucket, Key=clave)['Body']
+
+    def eliminar(self, clave):
+        self.cliente.delete_object(Bucket=self.bucket, Key=clave)
+
+    def listar(self, prefijo):
+        parametros = {'Bucket': self.bucket, 'Prefix': prefijo}
+        while True:
+            respuesta = self.cliente.list_objects_v2(**parametros)
+            for objeto in respuesta.get('Contents', []):
+                yield objeto['Key'], objeto['Size'], objeto['LastModified']
+            if not respuesta.get('IsTruncated'):
+                break
+            parametros['ContinuationToken'] = respuesta['NextContinuationToken']
+
+    def purgar(self, prefijo, max_edad=None, max_bytes=None):
+        return _purgar(self, prefijo, max_edad, max_bytes)
+
+
+def _no_existe(error):
+    codigo = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return codigo in ('404', 'NoSuchKey', 'NotFound')
+
+
+def _purgar(almacen, prefijo, max_edad, max_bytes):
+    """Elimina lo más viejo que ``max_edad`` segundos y, si aún se supera ``max_bytes``,
+    los archivos más antiguos hasta volver al límite. Devuelve la cantidad eliminada."""
+    archivos = sorted(almacen.listar(prefijo), key=lambda archivo: archivo[2])
+    total = sum(tamaño for _, tamaño, _ in archivos)
+    limite = datetime.now(timezone.utc).timestamp() - max_edad if max_edad else None
+    eliminados = 0
+    for clave, tamaño, modificado in archivos:
+        vencido = limite is not None and modificado.timestamp() < limite
+        excedido = max_bytes is not None and total > max_bytes
+        if not (vencido or excedido):
+            break
+        almacen.eliminar(clave)
+        total -= tamaño
+        eliminados += 1
+    return eliminados
+
+
+class Retencion:
+    """Purga periódica de un prefijo, a lo sumo una vez cada ``intervalo`` segundos por proceso."""
+
+    def __init__(self, almacen, prefijo, max_edad, max_bytes, intervalo=60):
+        self.almacen = almacen
+        self.prefijo = prefijo
+        self.max_edad = max_edad
+        self.max_bytes = max_bytes
+        self.intervalo = intervalo
+        self._ultima = 0
+        self._lock = threading.Lock()
+
+    def tal_vez_purgar(self):
+        with self._lock:
+            if time.monotonic() - self._ultima < self.intervalo:
+                return 0
+            self._ultima = time.monotonic()
+        try:
+            return self.almacen.purgar(self.prefijo, self.max_edad, self.max_bytes)
+        except Exception as e:
+            print(f"Error purgando {self.prefijo} del almacén: {e}")
+            return 0
+
+
+def enviar(almacen, clave, nombre, **kwargs):
+    """Respuesta de descarga para una clave del almacén: desde disco si es local, si no en streaming."""
+    ruta = almacen.ruta_local(clave)
+    if ruta:
+        return send_file(ruta, as_attachment=True, download_name=nombre, **kwargs)
+    tamaño, modificado = almacen.info(clave)
+    return send_file(almacen.abrir(clave), mimetype='application/pdf', as_attachment=True,
+                     download_name=nombre, last_modified=modificado, **kwargs)
+
+
+def crear_almacen():
+    if Config.ALMACEN == 's3':
+        return AlmacenS3(Config.ALMACEN_S3_BUCKET, endpoint_url=Config.ALMACEN_S3_ENDPOINT or None)
+    return AlmacenLocal(Config.ALMACEN_DIR)
+
+
+almacen = crear_almacen()
+
+# Informes descargados y PDFs de la cola de trabajos: se purgan por edad y tamaño total
+retencion_informes = Retencion(almacen, 'informes/', Config.INFORMES_RETENCION,
+                               Config.INFORMES_MAX_MB * 1024 * 1024)
+
+# Facturas cacheadas: se vuelven a generar si hacen falta, así que también se purgan;
+# sin borrar por versión, para que durante un despliegue gradual convivan la anterior y la nueva
+retencion_facturas = Retencion(almacen, 'facturas/', Config.FACTURAS_RETENCION,
+                               Config.FACTURAS_MAX_MB * 1024 * 1024, intervalo=3600)
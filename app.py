@@ -1,11 +1,15 @@
 # app.py
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from flask_login import LoginManager
 import os
 from models import User
-from database import get_db_connection
+from database import db_connection
+from user_cache import user_cache, identity_from_session, store_identity_in_session
+from vencimientos import iniciar_programador
+from estaticos import ArchivosEstaticos
+import metricas_db
 # Importar blueprints
 from routes.auth import auth_bp
 from routes.cliente import cliente_bp
@@ -14,16 +18,22 @@ from routes.reservas import reservas_bp
 from routes.informes import informes_bp
 from routes.panelEmpleado import panel_empleado_bp
 from routes.panelprofesional import panel_profesional_bp
+from routes.trabajos import trabajos_bp
 
 from config import Config  # Importar la configuración
 
-app = Flask(__name__, static_folder='static')
+# /static lo sirve serve_static desde el índice en memoria, no la ruta estática de Flask
+app = Flask(__name__, static_folder=None)
+estaticos = ArchivosEstaticos(os.path.join(app.root_path, 'static'))
 
 # Configurar la clave secreta desde config.py
 app.config['SECRET_KEY'] = Config.SECRET_KEY
 
 # Configurar Flask-CORS para permitir credenciales
-CORS(app, supports_credentials=True)
+CORS(app, supports_credentials=True, expose_headers=['X-Siguiente-Cursor', 'X-Total-Count', 'Link'])
+
+# Cantidad y tiempo de consultas SQL por petición (Server-Timing y log de consultas lentas)
+metricas_db.init_app(app)
 
 # Configurar Flask-Login
 login_manager = LoginManager()
@@ -32,16 +42,29 @@ login_manager.login_view = 'auth_bp.login'  # Ruta para redirigir si no está au
 
 @login_manager.user_loader
 def load_user(user_id):
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        query = "SELECT id_usuario, email, rol, id_cliente FROM usuarios WHERE id_usuario = ?"
-        cursor.execute(query, (user_id,))
-        result = cursor.fetchone()
-        conn.close()
-        if result:
-            print("Usuario cargado con rol:", result.rol)  # Verifica si el rol se está obteniendo correctamente
-            return User(id_usuario=result.id_usuario, email=result.email, rol=result.rol, id_cliente=result.id_cliente)
+    user = user_cache.get(user_id)
+    if user:
+        return user
+
+    user = identity_from_session(user_id)
+    if user:
+        user_cache.put(user)
+        return user
+
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            query = "SELECT id_usuario, email, rol, id_cliente FROM usuarios WHERE id_usuario = ?"
+            cursor.execute(query, (user_id,))
+            result = cursor.fetchone()
+    except Exception as e:
+        print(f"Error al cargar el usuario: {e}")
+        return None
+    if result:
+        user = User(id_usuario=result.id_usuario, email=result.email, rol=result.rol, id_cliente=result.id_cliente)
+        user_cache.put(user)
+        store_identity_in_session(user)
+        return user
     return None
 
 # Registrar blueprints
@@ -52,21 +75,30 @@ app.register_blueprint(reservas_bp)
 app.register_blueprint(informes_bp)
 app.register_blueprint(panel_empleado_bp)
 app.register_blueprint(panel_profesional_bp)
+app.register_blueprint(trabajos_bp)
+
+# Barrido periódico de turnos vencidos: cada worker lo programa y barre el que tiene el turno
+if Config.BARRIDO_INTERVALO > 0:
+    iniciar_programador(Config.BARRIDO_INTERVALO)
 
 # Rutas para servir el frontend
+@app.route('/static/<path:path>')
+def serve_static(path):
+    return estaticos.enviar(path)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_react_app(path):
-    if path != '' and os.path.exists(os.path.join(app.static_folder, path)):
+    if path != '' and estaticos.obtener(path):
         # Si el archivo existe, se sirve directamente
-        return send_from_directory(app.static_folder, path)
+        return estaticos.enviar(path)
     else:
         # De lo contrario, se sirve index.html
-        return send_from_directory(app.static_folder, 'index.html')
+        return estaticos.enviar('index.html')
 
 @app.route('/service-worker.js')
 def serve_service_worker():
-    return send_from_directory(app.static_folder, 'service-worker.js')
+    return estaticos.enviar('service-worker.js')
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,378 @@
+# benchmarks/bench_http.py
+"""Prueba de carga HTTP de la API con usuarios sintéticos y líneas base.
+
+Cada usuario virtual es un hilo que inicia sesión con un usuario de la base
+(cliente, admin o empleado, según --mezcla) y repite una mezcla ponderada de
+llamadas de su rol a /api/reservas, /api/cliente, /api/admin, /api/informes y
+/api/empleado. Informa por endpoint peticiones/s, latencia p50/p95/p99 y
+consultas SQL por petición (de la cabecera Server-Timing de metricas_db).
+
+Sin --url corre la aplicación en este proceso con el cliente de pruebas de
+Flask sobre la base configurada; con --url mide un servidor ya levantado
+(p. ej. gunicorn) que use la misma base. Los usuarios salen de generar_datos.py.
+
+Uso:
+    DB_MOTOR=sqlite python migrar.py
+    DB_MOTOR=sqlite python generar_datos.py --escala 1
+    DB_MOTOR=sqlite python benchmarks/bench_http.py --usuarios 8 --duracion 30 --guardar base
+    DB_MOTOR=sqlite python benchmarks/bench_http.py --usuarios 8 --duracion 30 --comparar base
+    python benchmarks/bench_http.py --url http://localhost:8000 --usuarios 32
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database import db_connection
+
+LINEAS_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lineas_base')
+
+# Server-Timing: db;dur=12.3;desc="4 consultas, 120 filas"
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) consultas')
+# Con menos peticiones el p95 es ruido y no se compara; tampoco diferencias de menos de 5 ms
+MINIMO_MUESTRAS = 200
+MINIMO_MS = 5.0
+
+
+class ClienteHttp:
+    """Sesión HTTP contra un servidor levantado, con sus cookies."""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+        pedido = Request(self.url + ruta, data=datos, method=metodo,
+                         headers={'Content-Type': 'application/json'} if datos else {})
+        try:
+            with self.opener.open(pedido, timeout=60) as respuesta:
+                respuesta.read()
+                return respuesta.status, respuesta.headers.get('Server-Timing', '')
+        except HTTPError as e:
+            e.read()
+            return e.code, e.headers.get('Server-Timing', '')
+
+
+class ClienteEnProceso:
+    """Sesión con el cliente de pruebas de Flask: la app corre en este proceso."""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        respuesta = self.cliente.open(ruta, method=metodo, json=cuerpo)
+        respuesta.get_data()  # consumir también las respuestas por streaming
+        respuesta.close()
+        return respuesta.status_code, respuesta.headers.get('Server-Timing', '')
+
+
+class Contexto:
+    """Datos de la base que necesitan los escenarios: usuarios, profesionales y servicios."""
+
+    def __init__(self):
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT email, rol FROM usuarios WHERE rol IN ('Cliente', 'admin', 'Empleado')")
+            self.usuarios = defaultdict(list)
+            for email, rol in cursor.fetchall():
+                self.usuarios[rol.lower()].append(email)
+            cursor.execute("SELECT id_profesional FROM profesionales")
+            self.profesionales = [fila[0] for fila in cursor.fetchall()]
+            cursor.execute("SELECT id_servicio FROM servicios")
+            self.servicios = [fila[0] for fila in cursor.fetchall()]
+        self.hoy = date.today()
+
+    def fecha_futura(self, rng, minimo=4, maximo=45):
+        return (self.hoy + timedelta(days=rng.randint(minimo, maximo))).isoformat()
+
+    def fecha_reciente(self, rng, dias=90):
+        return (self.hoy - timedelta(days=rng.randint(0, dias))).isoformat()
+
+    def rango_informe(self, rng):
+        fin = self.hoy - timedelta(days=rng.randint(0, 60))
+        inicio = fin - timedelta(days=rng.choice((7, 30, 90)))
+        return {'fecha_inicio': inicio.strftime('%d/%m/%Y'), 'fecha_fin': fin.strftime('%d/%m/%Y')}
+
+
+def _disponibilidad(rng, ctx):
+    desde = ctx.hoy + timedelta(days=rng.randint(3, 30))
+    hasta = desde + timedelta(days=rng.choice((0, 6, 13)))
+    return 'GET', f'/api/reservas/disponibilidad?desde={desde}&hasta={hasta}&id_servicio={rng.choice(ctx.servicios)}', None
+
+
+def _crear_reserva(rng, ctx):
+    hora = f'{rng.randint(8, 19):02d}:{rng.choice(("00", "30"))}'
+    return 'POST', '/api/reservas/crear', {'fecha': ctx.fecha_futura(rng), 'hora': hora,
+                                           'id_servicio': rng.choice(ctx.servicios)}
+
+
+def _profesional_dia(prefijo):
+    def escenario(rng, ctx):
+        return ('GET', f'/api/{prefijo}/clientes-profesional?profesional_id={rng.choice(ctx.profesionales)}'
+                       f'&fecha={ctx.fecha_reciente(rng, 30)}', None)
+    return escenario
+
+
+# rol -> [(nombre del endpoint, peso, escritura, escenario)]
+ESCENARIOS = {
+    'cliente': [
+        ('GET /api/reservas/disponibilidad', 25, False, _disponibilidad),
+        ('GET /api/reservas/horas-reservadas', 8, False,
+         lambda rng, ctx: ('GET', f'/api/reservas/horas-reservadas/{ctx.fecha_futura(rng)}', None)),
+        ('GET /api/cliente/servicios', 15, False, lambda rng, ctx: ('GET', '/api/cliente/servicios', None)),
+        ('GET /api/reservas/historial', 12, False, lambda rng, ctx: ('GET', '/api/reservas/historial', None)),
+        ('GET /api/cliente/reservas', 10, False, lambda rng, ctx: ('GET', '/api/cliente/reservas', None)),
+        ('GET /api/cliente/pagos-pendientes', 8, False,
+         lambda rng, ctx: ('GET', '/api/cliente/pagos-pendientes', None)),
+        ('GET /api/cliente/pagos-realizados', 8, False,
+         lambda rng, ctx: ('GET', '/api/cliente/pagos-realizados', None)),
+        ('GET /api/cliente/perfil', 6, False, lambda rng, ctx: ('GET', '/api/cliente/perfil', None)),
+        ('GET /api/auth/me', 5, False, lambda rng, ctx: ('GET', '/api/auth/me', None)),
+        ('POST /api/reservas/crear', 3, True, _crear_reserva),
+    ],
+    'admin': [
+        ('GET /api/admin/clientes', 20, False, lambda rng, ctx: (
+            'GET', f'/api/admin/clientes?limite=50&despues_de={rng.randint(0, 5000)}', None)),
+        ('GET /api/admin/clientes?q', 10, False, lambda rng, ctx: (
+            'GET', f'/api/admin/clientes?limite=50&q={rng.choice("abcdefghilmnoprstv")}&total=1', None)),
+        ('GET /api/admin/profesionales', 10, False, lambda rng, ctx: ('GET', '/api/admin/profesionales', None)),
+        ('GET /api/admin/clientes-dia', 15, False, lambda rng, ctx: (
+            'GET', f'/api/admin/clientes-dia?fecha={ctx.fecha_reciente(rng, 30)}', None)),
+        ('GET /api/admin/clientes-profesional', 10, False, _profesional_dia('admin')),
+        ('POST /api/informes/ingresos', 12, False, lambda rng, ctx: (
+            'POST', '/api/informes/ingresos', ctx.rango_informe(rng))),
+        ('POST /api/informes/ingresos-resumen', 12, False, lambda rng, ctx: (
+            'POST', '/api/informes/ingresos-resumen',
+            dict(ctx.rango_informe(rng), agrupar_por=rng.choice(('metodo_pago', 'servicio', 'profesional'))))),
+        ('POST /api/informes/servicios-profesional', 11, False, lambda rng, ctx: (
+            'POST', '/api/informes/servicios-profesional', ctx.rango_informe(rng))),
+    ],
+    'empleado': [
+        ('GET /api/empleado/pagos-dia', 40, False, lambda rng, ctx: ('GET', '/api/empleado/pagos-dia', None)),
+        ('GET /api/empleado/profesionales', 25, False, lambda rng, ctx: ('GET', '/api/empleado/profesionales', None)),
+        ('GET /api/empleado/clientes-profesional', 35, False, _profesional_dia('empleado')),
+    ],
+}
+
+
+class Resultados:
+    """Mediciones de un hilo: latencias, estados y consultas por endpoint."""
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.consultas = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.rechazos = defaultdict(int)
+
+    def registrar(self, nombre, segundos, estado, server_timing):
+        self.latencias[nombre].append(segundos)
+        encontrado = _SERVER_TIMING.search(server_timing)
+        if encontrado:
+            self.consultas[nombre].append(int(encontrado.group(2)))
+        if estado >= 500:
+            self.errores[nombre] += 1
+        elif estado >= 400:
+            # p. ej. horario ya reservado: respuesta esperada bajo carga
+            self.rechazos[nombre] += 1
+
+    def unir(self, otro):
+        for destino, origen in ((self.latencias, otro.latencias), (self.consultas, otro.consultas)):
+            for nombre, valores in origen.items():
+                destino[nombre].extend(valores)
+        for destino, origen in ((self.errores, otro.errores), (self.rechazos, otro.rechazos)):
+            for nombre, cantidad in origen.items():
+                destino[nombre] += cantidad
+
+
+def _percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def resumen(resultados, duracion):
+    filas = {}
+    for nombre, latencias in sorted(resultados.latencias.items()):
+        ordenados = sorted(latencias)
+        consultas = resultados.consultas.get(nombre)
+        filas[nombre] = {
+            'peticiones': len(ordenados),
+            'por_segundo': round(len(ordenados) / duracion, 2),
+            'p50_ms': round(_percentil(ordenados, 0.50) * 1000, 2),
+            'p95_ms': round(_percentil(ordenados, 0.95) * 1000, 2),
+            'p99_ms': round(_percentil(ordenados, 0.99) * 1000, 2),
+            'consultas': round(sum(consultas) / len(consultas), 2) if consultas else None,
+            'errores': resultados.errores.get(nombre, 0),
+            'rechazos': resultados.rechazos.get(nombre, 0),
+        }
+    return filas
+
+
+def imprimir(filas, duracion):
+    print(f"\n{'endpoint':<44} {'pet':>6} {'pet/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'cons/pet':>8} {'5xx':>5} {'4xx':>5}")
+    for nombre, fila in filas.items():
+        consultas = f"{fila['consultas']:.1f}" if fila['consultas'] is not None else '-'
+        print(f"{nombre:<44} {fila['peticiones']:>6} {fila['por_segundo']:>8.1f} {fila['p50_ms']:>8.1f} "
+              f"{fila['p95_ms']:>8.1f} {fila['p99_ms']:>8.1f} {consultas:>8} {fila['errores']:>5} {fila['rechazos']:>5}")
+    total = sum(fila['peticiones'] for fila in filas.values())
+    print(f"{'total':<44} {total:>6} {total / duracion:>8.1f}")
+
+
+def comparar(filas, base, tolerancia):
+    """Compara con una línea base; devuelve los endpoints que empeoraron."""
+    print(f"\n{'endpoint':<44} {'p95 base':>9} {'p95':>9} {'Δ p95':>7} {'pet/s Δ':>8} {'cons base':>9} {'cons':>6}")
+    regresiones = []
+    for nombre, fila in filas.items():
+        anterior = base.get(nombre)
+        if not anterior:
+            print(f"{nombre:<44} (sin línea base)")
+            continue
+        delta_p95 = (fila['p95_ms'] - anterior['p95_ms']) / max(anterior['p95_ms'], 0.001)
+        delta_rps = (fila['por_segundo'] - anterior['por_segundo']) / max(anterior['por_segundo'], 0.001)
+        mas_lento = (delta_p95 > tolerancia and fila['p95_ms'] - anterior['p95_ms'] > MINIMO_MS
+                     and min(fila['peticiones'], anterior['peticiones']) >= MINIMO_MUESTRAS)
+        # Las consultas por petición no dependen de la máquina: cualquier aumento cuenta
+        mas_consultas = (fila['consultas'] or 0) > (anterior['consultas'] or 0) + 0.5
+        marca = ''
+        if mas_lento or mas_consultas:
+            regresiones.append(nombre)
+            marca = '  <-- peor'
+        print(f"{nombre:<44} {anterior['p95_ms']:>9.1f} {fila['p95_ms']:>9.1f} {delta_p95:>+7.0%} {delta_rps:>+8.0%} "
+              f"{anterior['consultas'] if anterior['consultas'] is not None else '-':>9} "
+              f"{fila['consultas'] if fila['consultas'] is not None else '-':>6}{marca}")
+    return regresiones
+
+
+def elegir_roles(mezcla, usuarios, rng):
+    pesos = {}
+    for parte in mezcla.split(','):
+        rol, _, peso = parte.partition('=')
+        pesos[rol.strip()] = float(peso or 1)
+    desconocidos = set(pesos) - set(ESCENARIOS)
+    if desconocidos:
+        raise ValueError(f"Roles desconocidos en --mezcla: {', '.join(sorted(desconocidos))}")
+    roles = list(pesos)
+    return [rng.choices(roles, [pesos[rol] for rol in roles])[0] for _ in range(usuarios)]
+
+
+def usuario_virtual(numero, rol, crear_cliente, ctx, args, inicio_medicion, fin, resultados):
+    rng = random.Random(args.semilla * 1000 + numero)
+    cliente = crear_cliente()
+    if not ctx.usuarios[rol]:
+        raise ValueError(f"No hay usuarios con rol {rol}; cargar datos con generar_datos.py")
+    email = rng.choice(ctx.usuarios[rol])
+
+    antes = time.perf_counter()
+    estado, server_timing = cliente.pedir('POST', '/api/auth/login', {'email': email, 'password': args.password})
+    resultados.registrar('POST /api/auth/login', time.perf_counter() - antes, estado, server_timing)
+    if estado != 200:
+        raise ValueError(f"No se pudo iniciar sesión como {email}: {estado}")
+
+    escenarios = [e for e in ESCENARIOS[rol] if not (args.solo_lectura and e[2])]
+    pesos = [e[1] for e in escenarios]
+    while True:
+        nombre, _, _, escenario = rng.choices(escenarios, pesos)[0]
+        metodo, ruta, cuerpo = escenario(rng, ctx)
+        antes = time.perf_counter()
+        if antes >= fin:
+            break
+        estado, server_timing = cliente.pedir(metodo, ruta, cuerpo)
+        if antes >= inicio_medicion:
+            resultados.registrar(nombre, time.perf_counter() - antes, estado, server_timing)
+        if args.pausa:
+            time.sleep(rng.expovariate(1 / args.pausa))
+
+
+def ejecutar(args):
+    ctx = Contexto()
+    if args.url:
+        crear_cliente = lambda: ClienteHttp(args.url)
+        destino = args.url
+    else:
+        from app import app
+        crear_cliente = lambda: ClienteEnProceso(app)
+        destino = 'en proceso'
+
+    roles = elegir_roles(args.mezcla, args.usuarios, random.Random(args.semilla))
+    print(f"{args.usuarios} usuarios ({', '.join(f'{rol}: {roles.count(rol)}' for rol in sorted(set(roles)))}), "
+          f"{args.duracion}s + {args.calentamiento}s de calentamiento, {destino}")
+
+    inicio_medicion = time.perf_counter() + args.calentamiento
+    fin = inicio_medicion + args.duracion
+    por_hilo = [Resultados() for _ in roles]
+    fallas = []
+
+    def correr(numero):
+        try:
+            usuario_virtual(numero, roles[numero], crear_cliente, ctx, args, inicio_medicion, fin, por_hilo[numero])
+        except Exception as e:
+            fallas.append(e)
+
+    hilos = [threading.Thread(target=correr, args=(numero,)) for numero in range(len(roles))]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    if fallas:
+        raise fallas[0]
+
+    resultados = Resultados()
+    for parcial in por_hilo:
+        resultados.unir(parcial)
+    # El login de cada usuario se registra aunque caiga en el calentamiento
+    filas = resumen(resultados, args.duracion)
+    imprimir(filas, args.duracion)
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Servidor a medir; sin él la app corre en este proceso')
+    parser.add_argument('--usuarios', type=int, default=8, help='Usuarios virtuales concurrentes')
+    parser.add_argument('--duracion', type=float, default=30, help='Segundos de medición')
+    parser.add_argument('--calentamiento', type=float, default=5, help='Segundos previos que no se miden')
+    parser.add_argument('--mezcla', default='cliente=80,admin=10,empleado=10', help='Proporción de usuarios por rol')
+    parser.add_argument('--pausa', type=float, default=0, help='Pausa media entre llamadas de un usuario, en segundos')
+    parser.add_argument('--solo-lectura', action='store_true', help='Sin crear reservas')
+    parser.add_argument('--password', default='spa12345', help='Contraseña de los usuarios de generar_datos.py')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--guardar', metavar='NOMBRE', help=f'Guardar los resultados como línea base en {LINEAS_BASE}')
+    parser.add_argument('--comparar', metavar='NOMBRE', help='Comparar con una línea base guardada')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Aumento de p95 aceptado al comparar')
+    args = parser.parse_args()
+
+    filas = ejecutar(args)
+
+    if args.guardar:
+        os.makedirs(LINEAS_BASE, exist_ok=True)
+        ruta = os.path.join(LINEAS_BASE, f'{args.guardar}.json')
+        parametros = {clave: valor for clave, valor in vars(args).items()
+                      if clave not in ('guardar', 'comparar', 'password')}
+        with open(ruta, 'w') as f:
+            json.dump({'fecha': datetime.now().isoformat(timespec='seconds'), 'parametros': parametros,
+                       'endpoints': filas}, f, indent=2, ensure_ascii=False)
+        print(f"\nLínea base guardada en {ruta}")
+
+    if args.comparar:
+        with open(os.path.join(LINEAS_BASE, f'{args.comparar}.json')) as f:
+            base = json.load(f)
+        regresiones = comparar(filas, base['endpoints'], args.tolerancia)
+        if regresiones:
+            print(f"\n{len(regresiones)} endpoints empeoraron respecto de {args.comparar} ({base['fecha']}).")
+            raise SystemExit(1)
+        print(f"\nSin regresiones respecto de {args.comparar} ({base['fecha']}).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_informes_pdf.py
+"""Descarga del informe de ingresos en PDF: archivo temporal en disco vs. buffer en memoria.
+
+Mide la latencia por descarga a través de Flask y la E/S del proceso
+(syscalls y bytes de /proc/self/io, solo Linux). No usa la base de datos:
+el informe se arma con filas sintéticas.
+
+Uso: python benchmarks/bench_informes_pdf.py --filas 200 --descargas 30
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask, send_file
+from pdf_recursos import pdf_en_memoria
+from routes.informes import crear_informe_ingresos_pdf
+
+
+def filas_sinteticas(cantidad):
+    inicio = datetime(2024, 1, 1, 9, 0)
+    metodos = ('Tarjeta de Crédito', 'Tarjeta de Débito')
+    return [
+        (f'Cliente{i}', f'Apellido{i}', metodos[i % 2], Decimal('1500.00') + i,
+         inicio + timedelta(hours=i), f'Servicio {i % 7}')
+        for i in range(cantidad)
+    ]
+
+
+def leer_io():
+    try:
+        with open('/proc/self/io') as f:
+            return {clave: int(valor) for clave, valor in (linea.split(': ') for linea in f)}
+    except OSError:
+        return {}
+
+
+def crear_app(filas):
+    app = Flask(__name__)
+    args = (filas, '01/01/2024', '31/01/2024')
+
+    @app.route('/temporal')
+    def temporal():
+        # Camino anterior: NamedTemporaryFile(delete=False) + send_file de la ruta
+        with tempfile.NamedTemporaryFile(delete=False, suffix='_ingresos.pdf') as tmp_file:
+            filepath = tmp_file.name
+        crear_informe_ingresos_pdf(*args, filepath)
+        return send_file(filepath, as_attachment=True)
+
+    @app.route('/memoria')
+    def memoria():
+        archivo = pdf_en_memoria(crear_informe_ingresos_pdf, *args)
+        return send_file(archivo, mimetype='application/pdf', as_attachment=True, download_name='ingresos.pdf')
+
+    return app
+
+
+def medir(cliente, ruta, descargas):
+    cliente.get(ruta).close()  # calentar estilos y logo
+    tiempos = []
+    antes = leer_io()
+    for _ in range(descargas):
+        inicio = time.perf_counter()
+        respuesta = cliente.get(ruta)
+        tamaño = len(respuesta.get_data())
+        respuesta.close()
+        tiempos.append(time.perf_counter() - inicio)
+    despues = leer_io()
+    io = {clave: (despues[clave] - antes[clave]) / descargas for clave in despues}
+
+    tiempos.sort()
+    p95 = tiempos[max(0, int(len(tiempos) * 0.95) - 1)]
+    print(f"{ruta:<12} {statistics.mean(tiempos) * 1000:7.1f} ms prom  {p95 * 1000:7.1f} ms p95  "
+          f"{tamaño / 1024:6.0f} KB", end='')
+    if io:
+        print(f"  syscalls lectura {io['syscr']:6.0f}  escritura {io['syscw']:5.0f}  "
+              f"bytes a disco {io['write_bytes'] / 1024:6.0f} KB", end='')
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=200, help='Pagos en el informe')
+    parser.add_argument('--descargas', type=int, default=30)
+    args = parser.parse_args()
+
+    app = crear_app(filas_sinteticas(args.filas))
+    cliente = app.test_client()
+    print(f"filas={args.filas} descargas={args.descargas}")
+    archivos_antes = set(os.listdir(tempfile.gettempdir()))
+    medir(cliente, '/temporal', args.descargas)
+    medir(cliente, '/memoria', args.descargas)
+    sobrantes = set(os.listdir(tempfile.gettempdir())) - archivos_antes
+    print(f"archivos temporales que quedaron en {tempfile.gettempdir()}: {len(sobrantes)}")
+    for nombre in sobrantes:
+        if nombre.endswith('_ingresos.pdf'):
+            os.remove(os.path.join(tempfile.gettempdir(), nombre))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_passwords.py
+"""Logins por segundo de un worker: bcrypt en el hilo del request vs. PasswordHasher.
+
+Uso: python benchmarks/bench_passwords.py --rounds 12 --logins 40 --hilos 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import bcrypt
+from passwords import PasswordHasher
+
+
+def medir(nombre, verificar, logins, hilos):
+    inicio = time.perf_counter()
+    # Cada hilo representa un hilo de request de un worker gthread
+    with ThreadPoolExecutor(max_workers=hilos) as requests:
+        resultados = list(requests.map(lambda _: verificar(), range(logins)))
+    duracion = time.perf_counter() - inicio
+    assert all(resultados)
+    print(f"{nombre:<48} {logins / duracion:8.1f} logins/s  ({duracion:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=12, help='Costo bcrypt del hash almacenado')
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--hilos', type=int, default=4, help='Hilos de request por worker')
+    parser.add_argument('--workers-hash', type=int, default=2, help='Workers del PasswordHasher')
+    args = parser.parse_args()
+
+    password = 'contraseña-de-prueba'
+    almacenado = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(args.rounds))
+
+    def directo():
+        return bcrypt.checkpw(password.encode('utf-8'), almacenado)
+
+    print(f"costo={args.rounds} logins={args.logins} hilos={args.hilos}")
+    medir('antes: checkpw en worker sync', directo, args.logins, 1)
+    medir(f'antes: checkpw en {args.hilos} hilos de request', directo, args.logins, args.hilos)
+
+    for executor in ('thread', 'process'):
+        hasher = PasswordHasher(rounds=args.rounds, workers=args.workers_hash,
+                                max_queue=args.logins, executor=executor)
+        medir(f'después: PasswordHasher ({executor}, {args.workers_hash} workers)',
+              lambda: hasher.verify(password, almacenado.decode('utf-8')), args.logins, args.hilos)
+        print(f"{'':<48} {hasher.stats()}")
+        hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# catalogo.py
+"""Caché en memoria de las tablas chicas que casi no cambian: servicios y profesionales.
+
+Se leen de la base la primera vez que se piden y se recargan pasado
+CATALOGO_TTL segundos (así se ven los cambios hechos desde otro worker) o
+apenas este proceso las modifica: add_profesional y remove_profesional
+llaman a invalidar(), que sube la versión. Cualquier ruta que edite
+servicios o profesionales tiene que hacer lo mismo.
+"""
+import hashlib
+import threading
+import time
+
+from flask import current_app, request
+
+from config import Config
+from database import db_connection
+
+# Un id desconocido recarga el catálogo a lo sumo con esta frecuencia (servicio recién creado en otro worker)
+RECARGA_MINIMA = 5
+
+
+class Instantanea:
+    """Contenido del catálogo en una versión. No se modifica: una recarga crea otra."""
+
+    def __init__(self, version, servicios, profesionales):
+        self.version = version
+        self.cargada = time.monotonic()
+        self.servicios = servicios          # id_servicio -> dict, en orden de id
+        self.profesionales = profesionales  # lista de dicts ordenada por nombre
+        self.respuestas = {}                # nombre -> (cuerpo JSON, etag)
+
+
+class Catalogo:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._instantanea = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    def invalidar(self):
+        with self._lock:
+            self._version += 1
+            self._instantanea = None
+
+    def instantanea(self, cursor=None):
+        """Catálogo vigente; si venció o se invalidó, lo recarga con ``cursor`` o con una conexión del pool."""
+        instantanea = self._instantanea
+        if instantanea is not None and time.monotonic() - instantanea.cargada <= self.ttl:
+            return instantanea
+        with self._lock:
+            instantanea = self._instantanea
+            if instantanea is None or time.monotonic() - instantanea.cargada > self.ttl:
+                if cursor is None:
+                    with db_connection() as conn:
+                        instantanea = self._cargar(conn.cursor())
+                else:
+                    instantanea = self._cargar(cursor)
+                self._instantanea = instantanea
+        return instantanea
+
+    def _cargar(self, cursor):
+        # Se llama con el lock tomado
+        self._version += 1
+        cursor.execute("SELECT id_servicio, nombre, duracion, precio FROM servicios ORDER BY id_servicio")
+        servicios = {fila.id_servicio: {'id_servicio': fila.id_servicio, 'nombre': fila.nombre,
+                                        'duracion': fila.duracion, 'precio': fila.precio}
+                     for fila in cursor.fetchall()}
+        cursor.execute("""
+            SELECT id_profesional, nombre, apellido, especialidad, email
+            FROM profesionales ORDER BY nombre ASC, id_profesional ASC
+        """)
+        columnas = [columna[0] for columna in cursor.description]
+        profesionales = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+        return Instantanea(self._version, servicios, profesionales)
+
+    def servicio(self, id_servicio, cursor=None):
+        """dict del servicio (con precio y duración), o None si no existe."""
+        try:
+            id_servicio = int(id_servicio)
+        except (TypeError, ValueError):
+            return None
+        instantanea = self.instantanea(cursor)
+        servicio = instantanea.servicios.get(id_servicio)
+        if servicio is None and time.monotonic() - instantanea.cargada > RECARGA_MINIMA:
+            with self._lock:
+                if self._instantanea is instantanea:
+                    self._instantanea = None
+            servicio = self.instantanea(cursor).servicios.get(id_servicio)
+        return servicio
+
+    def responder(self, nombre, construir):
+        """Respuesta JSON de ``construir(instantanea)``, serializada una vez por versión.
+
+        Lleva un ETag del contenido, igual en todos los workers, y responde
+        304 si el navegador ya tiene esa versión.
+        """
+        instantanea = self.instantanea()
+        cacheada = instantanea.respuestas.get(nombre)
+        if cacheada is None:
+            cuerpo = current_app.json.dumps(construir(instantanea)).encode()
+            cacheada = instantanea.respuestas[nombre] = (cuerpo, hashlib.sha1(cuerpo).hexdigest()[:20])
+        cuerpo, etag = cacheada
+        rv = current_app.response_class(cuerpo, mimetype='application/json')
+        rv.set_etag(etag)
+        rv.headers['Cache-Control'] = 'private, no-cache'
+        return rv.make_conditional(request)
+
+
+def profesionales_resumen(instantanea):
+    """Listado de profesionales de los paneles de administración y de empleados."""
+    return [{'id_profesional': p['id_profesional'], 'nombre': p['nombre'], 'apellido': p['apellido']}
+            for p in instantanea.profesionales]
+
+
+catalogo = Catalogo(ttl=Config.CATALOGO_TTL)
@@ -1,5 +1,6 @@
 # config.py
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Cargar variables de entorno desde .env
@@ -14,6 +15,81 @@ class Config:
         "Trusted_Connection=yes;"
         "Encrypt=no;"
     ))
-    
+
+    # Motor de base de datos (dialecto.py): 'sqlserver' o 'sqlite' para correr sin servidor
+    DB_MOTOR = os.getenv('DB_MOTOR', 'sqlserver')
+    DB_SQLITE_RUTA = os.getenv('DB_SQLITE_RUTA', 'spa-sentirse-bien.db')  # crear con: python migrar.py
+
+    # Pool de conexiones (uno por worker de gunicorn)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # segundos de espera si el pool está agotado
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # vida máxima de una conexión en segundos
+    DB_POOL_PRE_PING = int(os.getenv('DB_POOL_PRE_PING', 30))  # verificar conexiones inactivas por más de N segundos
+
+    # Cache de usuarios para Flask-Login
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 1000))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))  # segundos
+    # Guardar id, email, rol e id_cliente en la sesión firmada para no consultar la base en cada request
+    SESSION_IDENTITY = os.getenv('SESSION_IDENTITY', 'true').lower() in ('1', 'true', 'yes')
+
+    # Hashing de contraseñas con bcrypt
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))  # al iniciar sesión se re-hashean las contraseñas con otro costo
+    PASSWORD_HASH_EXECUTOR = os.getenv('PASSWORD_HASH_EXECUTOR', 'thread')  # 'thread' o 'process'
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 16))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 5))  # segundos
+
+    # Agenda de turnos
+    HORA_APERTURA = os.getenv('HORA_APERTURA', '08:00')
+    HORA_CIERRE = os.getenv('HORA_CIERRE', '20:00')  # último horario reservable
+    SLOT_MINUTOS = int(os.getenv('SLOT_MINUTOS', 30))
+    DISPONIBILIDAD_TTL = int(os.getenv('DISPONIBILIDAD_TTL', 60))  # segundos antes de recargar un día desde la base
+    DISPONIBILIDAD_MAX_DIAS = int(os.getenv('DISPONIBILIDAD_MAX_DIAS', 62))  # días por consulta de rango
+
+    # Barrido de turnos vencidos (vencimientos.py)
+    BARRIDO_HORAS = int(os.getenv('BARRIDO_HORAS', 48))  # antigüedad de un turno impago antes de eliminarlo
+    BARRIDO_LOTE = int(os.getenv('BARRIDO_LOTE', 500))
+    BARRIDO_INTERVALO = int(os.getenv('BARRIDO_INTERVALO', 300))  # segundos; un solo worker barre por vez; 0 = sin programador (usar cron)
+
+    # Métricas de SQL por petición (metricas_db.py)
+    DB_SERVER_TIMING = os.getenv('DB_SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes')  # cabecera Server-Timing en cada respuesta
+    DB_CONSULTA_LENTA_MS = int(os.getenv('DB_CONSULTA_LENTA_MS', 200))  # 0 = no registrar consultas lentas
+    DB_CONSULTAS_AVISO = int(os.getenv('DB_CONSULTAS_AVISO', 25))  # consultas por petición que se registran como posible N+1
+
+    # Servicios y profesionales en memoria (catalogo.py); precios y duraciones de las reservas salen de aquí
+    CATALOGO_TTL = int(os.getenv('CATALOGO_TTL', 300))  # segundos hasta ver cambios hechos desde otro worker
+
+    # Listados paginados del panel de administración
+    LISTADO_LIMITE_MAX = int(os.getenv('LISTADO_LIMITE_MAX', 500))
+
+    # Filas leídas por fetchmany en las respuestas de informes enviadas por streaming
+    STREAM_LOTE = int(os.getenv('STREAM_LOTE', 500))
+
+    # Cola de generación de PDFs en segundo plano (trabajos_pdf.py)
+    TRABAJOS_DIR = os.getenv('TRABAJOS_DIR', os.path.join(tempfile.gettempdir(), 'spa_trabajos_pdf'))  # compartido entre workers
+    TRABAJOS_WORKERS = int(os.getenv('TRABAJOS_WORKERS', 2))  # PDFs generándose a la vez por proceso
+    TRABAJOS_MAX_PENDIENTES = int(os.getenv('TRABAJOS_MAX_PENDIENTES', 20))
+    TRABAJOS_RETENCION = int(os.getenv('TRABAJOS_RETENCION', 3600))  # segundos que se conserva el estado de un trabajo; el PDF sigue INFORMES_RETENCION
+
+    # Almacén de PDFs generados (almacenamiento.py): 'local' o 's3'
+    ALMACEN = os.getenv('ALMACEN', 'local')
+    ALMACEN_DIR = os.getenv('ALMACEN_DIR', 'almacen')
+    ALMACEN_S3_BUCKET = os.getenv('ALMACEN_S3_BUCKET', '')
+    ALMACEN_S3_ENDPOINT = os.getenv('ALMACEN_S3_ENDPOINT', '')  # p. ej. http://localhost:9000 para MinIO
+    INFORMES_RETENCION = int(os.getenv('INFORMES_RETENCION', 3600))  # segundos que se conserva un informe descargado
+    INFORMES_MAX_MB = int(os.getenv('INFORMES_MAX_MB', 200))  # tamaño total de informes antes de purgar los más viejos
+
+    # PDFs enviados directamente en la respuesta: en memoria hasta este tamaño, luego en un temporal
+    PDF_MEMORIA_MAX = int(os.getenv('PDF_MEMORIA_MAX', 8 * 1024 * 1024))
+
+    # Archivos del frontend (estaticos.py): max-age de los que no llevan hash en el nombre
+    ESTATICOS_MAX_AGE = int(os.getenv('ESTATICOS_MAX_AGE', 86400))
+
+    # Facturas
+    FACTURAS_RETENCION = int(os.getenv('FACTURAS_RETENCION', 30 * 86400))  # segundos que se conserva un PDF de factura cacheado
+    FACTURAS_MAX_MB = int(os.getenv('FACTURAS_MAX_MB', 1000))  # tamaño total de facturas cacheadas antes de purgar las más viejas
+    EXPORTACION_MAX_FACTURAS = int(os.getenv('EXPORTACION_MAX_FACTURAS', 1000))  # por exportación en PDF o ZIP
+
     # Clave secreta para Flask
     SECRET_KEY = os.getenv('SECRET_KEY', 'clave_por_defecto')
@@ -1,21 +1,296 @@
 # database.py
-import pyodbc
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 from config import Config
+from dialecto import dialecto
+from metricas_db import registrar_sentencia, registrar_lectura, registrar_error
+
+
+class PoolTimeoutError(Exception):
+    """No se liberó ninguna conexión del pool dentro del tiempo de espera."""
+
+
+class _PooledConnection:
+    """Conexión prestada por el pool: close() la devuelve en lugar de cerrarla."""
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise dialecto.modulo.ProgrammingError('La conexión ya fue devuelta al pool.')
+        return getattr(self._entry.conn, name)
+
+    def cursor(self):
+        if self._entry is None:
+            raise dialecto.modulo.ProgrammingError('La conexión ya fue devuelta al pool.')
+        return CursorMedido(self._entry.conn.cursor())
+
+    def close(self):
+        # Tolerar cierres repetidos (varias rutas cierran en except y en finally)
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry)
+
+
+class CursorMedido:
+    """Cursor que mide cada sentencia y las filas leídas (ver metricas_db)."""
+
+    __slots__ = ('_cursor',)
+
+    def __init__(self, cursor):
+        object.__setattr__(self, '_cursor', cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # p. ej. cursor.fast_executemany = True
+        setattr(self._cursor, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def _ejecutar(self, metodo, sql, params):
+        inicio = time.perf_counter()
+        try:
+            metodo(sql, *params)
+        except Exception as e:
+            registrar_error(sql, e, time.perf_counter() - inicio)
+            raise
+        registrar_sentencia(sql, time.perf_counter() - inicio, self._cursor.rowcount)
+        # Igual que pyodbc, para encadenar cursor.execute(...).fetchone()
+        return self
+
+    def execute(self, sql, *params):
+        # pyodbc acepta execute(sql, a, b) además de execute(sql, (a, b)); sqlite3 solo la segunda
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        return self._ejecutar(self._cursor.execute, sql, (params,) if params else ())
+
+    def executemany(self, sql, *params):
+        return self._ejecutar(self._cursor.executemany, sql, params)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = self._cursor.fetchone()
+        registrar_lectura(fila is not None, time.perf_counter() - inicio)
+        return fila
+
+    def fetchmany(self, *size):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchmany(*size)
+        registrar_lectura(len(filas), time.perf_counter() - inicio)
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchall()
+        registrar_lectura(len(filas), time.perf_counter() - inicio)
+        return filas
+
+    def fetchval(self):
+        # Primera columna de la primera fila, o None
+        inicio = time.perf_counter()
+        fila = self._cursor.fetchone()
+        registrar_lectura(fila is not None, time.perf_counter() - inicio)
+        return fila[0] if fila is not None else None
+
+    def __iter__(self):
+        for fila in self._cursor:
+            registrar_lectura(1, 0.0)
+            yield fila
+
+
+class _Entry:
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones, uno por proceso worker.
+
+    Conserva hasta ``size`` conexiones inactivas y permite ``max_overflow``
+    conexiones extra bajo carga, que se cierran al sobrar. Si no hay capacidad, espera
+    hasta ``timeout`` segundos a que se libere una.
+    """
+
+    def __init__(self, conectar, size=5, max_overflow=5, timeout=10,
+                 recycle=1800, pre_ping=30):
+        self.conectar = conectar
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = []
+        self._open = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._stats = {
+            'creadas': 0,
+            'reutilizadas': 0,
+            'descartadas': 0,
+            'esperas': 0,
+            'timeouts': 0,
+            'pico_en_uso': 0,
+        }
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._available:
+            while True:
+                while self._idle:
+                    entry = self._idle.pop()
+                    if self._is_usable(entry):
+                        self._stats['reutilizadas'] += 1
+                        return self._lend(entry)
+                    self._discard(entry)
+
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f'Pool agotado: {self._open} conexiones en uso tras {self.timeout}s de espera.'
+                    )
+                self._stats['esperas'] += 1
+                self._available.wait(remaining)
+
+        # Abrir la conexión fuera del lock para no bloquear a otros hilos
+        try:
+            conn = self.conectar()
+        except Exception:
+            with self._available:
+                self._open -= 1
+                self._available.notify()
+            raise
+        with self._lock:
+            self._stats['creadas'] += 1
+            return self._lend(_Entry(conn))
+
+    def _lend(self, entry):
+        in_use = self._open - len(self._idle)
+        if in_use > self._stats['pico_en_uso']:
+            self._stats['pico_en_uso'] = in_use
+        return _PooledConnection(self, entry)
+
+    def _is_usable(self, entry):
+        now = time.monotonic()
+        if self.recycle and now - entry.created_at > self.recycle:
+            return False
+        if self.pre_ping is not None and now - entry.last_used > self.pre_ping:
+            try:
+                entry.conn.cursor().execute('SELECT 1').fetchone()
+            except Exception:
+                return False
+        return True
+
+    def _discard(self, entry):
+        # Se llama con el lock tomado
+        self._open -= 1
+        self._stats['descartadas'] += 1
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _release(self, entry):
+        # Descartar cualquier transacción que la ruta haya dejado abierta
+        try:
+            entry.conn.rollback()
+            healthy = True
+        except Exception:
+            healthy = False
+
+        with self._available:
+            # Nunca se guardan más de ``size`` conexiones inactivas
+            if not healthy or len(self._idle) >= self.size:
+                self._discard(entry)
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._available.notify()
+
+    def dispose(self):
+        with self._available:
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['abiertas'] = self._open
+            stats['libres'] = len(self._idle)
+            stats['en_uso'] = self._open - len(self._idle)
+        return stats
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # Cada worker de gunicorn crea su propio pool después del fork
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool(
+                    dialecto.conectar,
+                    size=Config.DB_POOL_SIZE,
+                    max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    recycle=Config.DB_POOL_RECYCLE,
+                    pre_ping=Config.DB_POOL_PRE_PING,
+                )
+                _pool_pid = pid
+    return _pool
+
 
 def get_db_connection():
     try:
-        conn = pyodbc.connect(Config.CONNECTION_STRING)
-        print("Conexión exitosa a la base de datos.")
-        return conn
+        return get_pool().acquire()
     except Exception as e:
         print(f"Error al conectar a la base de datos: {e}")
         return None
 
+
+@contextmanager
+def db_connection():
+    """Presta una conexión del pool y la devuelve al salir del bloque."""
+    conn = get_pool().acquire()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
 if __name__ == "__main__":
-    conn = get_db_connection()
-    if conn:
+    with db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT @@VERSION;")
+        cursor.execute(dialecto.consulta_version)
         row = cursor.fetchone()
-        print(f"Versión de SQL Server: {row[0]}")
-        conn.close()
+        print(f"Versión de la base de datos: {row[0]}")
+    print(f"Estadísticas del pool: {pool_stats()}")
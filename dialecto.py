@@ -0,0 +1,144 @@
+# dialecto.py
+"""Diferencias entre SQL Server y SQLite.
+
+Las rutas escriben SQL común a los dos motores y piden a ``dialecto`` las
+pocas piezas que cambian: devolver columnas de un INSERT o UPDATE, limitar
+filas y truncar una fecha. SQLite permite correr la aplicación completa sin
+un servidor (pruebas de carga, benchmarks); se elige con DB_MOTOR=sqlite.
+"""
+import sqlite3
+from collections import namedtuple
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from config import Config
+
+
+class SqlServer:
+    nombre = 'sqlserver'
+    consulta_version = "SELECT @@VERSION"
+
+    def __init__(self, connection_string):
+        self.connection_string = connection_string
+
+    @property
+    def modulo(self):
+        # El driver ODBC solo hace falta con este motor
+        import pyodbc
+        return pyodbc
+
+    def conectar(self):
+        return self.modulo.connect(self.connection_string)
+
+    def output(self, *columnas, unidas=None):
+        """Cláusula OUTPUT, entre las columnas y VALUES de un INSERT o después del SET de un UPDATE.
+
+        ``unidas`` agrega columnas de las tablas del FROM de un UPDATE: alias ->
+        (expresión sobre el FROM, subconsulta correlacionada para SQLite).
+        """
+        salida = [f'INSERTED.{columna}' for columna in columnas]
+        salida += [f'{expresion} AS {alias}' for alias, (expresion, _) in (unidas or {}).items()]
+        return 'OUTPUT ' + ', '.join(salida)
+
+    def returning(self, *columnas, unidas=None):
+        """Cláusula RETURNING, al final de la sentencia."""
+        return ''
+
+    def top(self, filas):
+        """Límite de filas después de SELECT."""
+        return f'TOP ({int(filas)})'
+
+    def limit(self, filas):
+        """Límite de filas al final de la consulta."""
+        return ''
+
+    def fecha(self, expresion):
+        """Parte de fecha de una columna DATETIME."""
+        return f'CAST({expresion} AS DATE)'
+
+    def ids_explicitos(self, tabla, activar):
+        """Sentencia que permite (o vuelve a impedir) insertar ids propios en una tabla con identidad."""
+        return f"SET IDENTITY_INSERT {tabla} {'ON' if activar else 'OFF'}"
+
+
+# Todas las columnas DECIMAL del esquema tienen dos decimales
+_CENTAVOS = Decimal('0.01')
+
+
+def _registrar_tipos():
+    # Los valores se guardan en formato ISO y vuelven con el tipo declarado
+    # en la columna, igual que con pyodbc
+    sqlite3.register_adapter(Decimal, str)
+    sqlite3.register_adapter(date, date.isoformat)
+    sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(' '))
+    sqlite3.register_adapter(time, time.isoformat)
+    sqlite3.register_converter('DATE', lambda valor: date.fromisoformat(valor.decode()[:10]))
+    sqlite3.register_converter('TIME', lambda valor: time.fromisoformat(valor.decode()))
+    sqlite3.register_converter('DATETIME', lambda valor: datetime.fromisoformat(valor.decode()))
+    sqlite3.register_converter('DECIMAL', lambda valor: Decimal(valor.decode()).quantize(_CENTAVOS))
+
+
+_clases_fila = {}
+
+
+def _fila(cursor, valores):
+    # Filas con acceso por índice y por nombre de columna, como pyodbc.Row
+    columnas = tuple(columna[0] for columna in cursor.description)
+    clase = _clases_fila.get(columnas)
+    if clase is None:
+        clase = _clases_fila[columnas] = namedtuple('Fila', columnas, rename=True)
+    return clase._make(valores)
+
+
+class Sqlite:
+    nombre = 'sqlite'
+    consulta_version = "SELECT 'SQLite ' || sqlite_version()"
+    modulo = sqlite3
+
+    def __init__(self, ruta, timeout=10):
+        self.ruta = ruta
+        self.timeout = timeout
+        _registrar_tipos()
+
+    def conectar(self):
+        # El pool presta cada conexión a un hilo por vez
+        conn = sqlite3.connect(self.ruta, timeout=self.timeout, check_same_thread=False,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = _fila
+        conn.execute("PRAGMA foreign_keys = ON")
+        # WAL: las lecturas no esperan a las escrituras de otros workers
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def output(self, *columnas, unidas=None):
+        return ''
+
+    def returning(self, *columnas, unidas=None):
+        # RETURNING no ve las tablas del FROM de un UPDATE: se leen con una subconsulta por fila
+        salida = list(columnas)
+        salida += [f'({subconsulta}) AS {alias}' for alias, (_, subconsulta) in (unidas or {}).items()]
+        return 'RETURNING ' + ', '.join(salida)
+
+    def top(self, filas):
+        return ''
+
+    def limit(self, filas):
+        return f'LIMIT {int(filas)}'
+
+    def fecha(self, expresion):
+        return f'date({expresion})'
+
+    def ids_explicitos(self, tabla, activar):
+        return None
+
+
+def crear_dialecto(motor=Config.DB_MOTOR):
+    if motor == 'sqlite':
+        return Sqlite(Config.DB_SQLITE_RUTA, timeout=Config.DB_POOL_TIMEOUT)
+    if motor == 'sqlserver':
+        return SqlServer(Config.CONNECTION_STRING)
+    raise ValueError(f"DB_MOTOR desconocido: {motor}")
+
+
+dialecto = crear_dialecto()
@@ -0,0 +1,314 @@
+# disponibilidad.py
+import threading
+import time
+from datetime import datetime, timedelta, time as dtime
+
+from catalogo import catalogo
+from config import Config
+
+# Veces que se vuelve a elegir profesional cuando la base contradice al índice
+INTENTOS_ASIGNACION = 3
+
+
+def _a_minutos(valor):
+    """Convierte una hora (time o 'HH:MM[:SS]') a minutos desde medianoche."""
+    if isinstance(valor, str):
+        valor = datetime.strptime(valor[:5], '%H:%M').time()
+    return valor.hour * 60 + valor.minute
+
+
+def _duracion_minutos(duracion):
+    # servicios.duracion puede venir como minutos enteros (también como texto, '60') o como TIME
+    if duracion is None:
+        return Config.SLOT_MINUTOS
+    if isinstance(duracion, str) and duracion.strip().isdigit():
+        duracion = int(duracion)
+    if isinstance(duracion, (dtime, str)):
+        return _a_minutos(duracion) or Config.SLOT_MINUTOS
+    return int(duracion) or Config.SLOT_MINUTOS
+
+
+class _Dia:
+    __slots__ = ('ocupacion', 'turnos', 'cargado')
+
+    def __init__(self, profesionales):
+        # Bitmap por profesional: el bit i indica el slot i del día ocupado
+        self.ocupacion = {id_profesional: 0 for id_profesional in profesionales}
+        self.turnos = {}
+        self.cargado = time.monotonic()
+
+
+class IndiceDisponibilidad:
+    """Índice en memoria de slots ocupados por día y profesional.
+
+    Cada día se carga de la base con una sola consulta la primera vez que se
+    pide y se recarga pasado ``ttl`` segundos, para tomar los turnos que hayan
+    creado otros workers. Las rutas lo actualizan al crear, modificar o
+    cancelar turnos. Las consultas a la base corren sin tomar el lock: un día
+    que se está cargando no frena las lecturas ni las reservas de otros hilos.
+    """
+
+    def __init__(self, slot_minutos=30, apertura='08:00', cierre='20:00', ttl=60):
+        self.slot_minutos = slot_minutos
+        self.apertura = _a_minutos(apertura)
+        self.cierre = _a_minutos(cierre)
+        self.ttl = ttl
+        self._dias = {}
+        self._profesionales = None
+        self._version_catalogo = None
+        self._duraciones = {}
+        # Cargas en curso: {fecha: cambios al índice de ese día durante la consulta}
+        self._cargas = {}
+        self._lock = threading.RLock()
+
+    # Conversión entre horas y bits
+
+    def _mascara(self, hora, duracion):
+        inicio = _a_minutos(hora) // self.slot_minutos
+        slots = max(1, -(-_duracion_minutos(duracion) // self.slot_minutos))
+        return ((1 << slots) - 1) << inicio
+
+    def _slots_del_dia(self):
+        primero = self.apertura // self.slot_minutos
+        ultimo = self.cierre // self.slot_minutos
+        return range(primero, ultimo + 1)
+
+    def _hora_de_slot(self, slot):
+        minutos = slot * self.slot_minutos
+        return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+    # Carga desde la base
+
+    def _cargar_catalogo(self, cursor):
+        # Profesionales y duraciones salen del catálogo compartido; se recalculan al cambiar su versión
+        instantanea = catalogo.instantanea(cursor)
+        with self._lock:
+            if instantanea.version != self._version_catalogo:
+                self._profesionales = [p['id_profesional'] for p in instantanea.profesionales]
+                self._duraciones = {id_servicio: _duracion_minutos(s['duracion'])
+                                    for id_servicio, s in instantanea.servicios.items()}
+                self._version_catalogo = instantanea.version
+            return self._profesionales, self._duraciones
+
+    def _vigente(self, fecha):
+        dia = self._dias.get(fecha)
+        return dia is not None and time.monotonic() - dia.cargado <= self.ttl
+
+    def _dias_pedidos(self, fechas, cursor):
+        """Los días pedidos; los que falten o estén vencidos se cargan juntos con una consulta."""
+        with self._lock:
+            dias = {fecha: self._dias[fecha] for fecha in fechas if self._vigente(fecha)}
+        faltantes = [fecha for fecha in fechas if fecha not in dias]
+        if faltantes:
+            dias.update(self._cargar_dias(faltantes, cursor))
+        return dias
+
+    def _dia(self, fecha, cursor):
+        return self._dias_pedidos([fecha], cursor)[fecha]
+
+    def _cargar_dias(self, fechas, cursor):
+        # Una sola consulta para todos los días pedidos, fuera del lock
+        profesionales, duraciones = self._cargar_catalogo(cursor)
+        carga, clave = dict.fromkeys(fechas, 0), object()
+        with self._lock:
+            self._cargas[clave] = carga
+        try:
+            cursor.execute("""
+                SELECT t.fecha, t.id_turno, t.id_profesional, t.hora, ts.id_servicio
+                FROM turnos t
+                LEFT JOIN turno_servicio ts ON t.id_turno = ts.id_turno
+                WHERE t.fecha BETWEEN ? AND ? AND t.estado = 'Pendiente'
+            """, (min(fechas), max(fechas)))
+            filas = cursor.fetchall()
+        except Exception:
+            with self._lock:
+                del self._cargas[clave]
+            raise
+
+        nuevos = {fecha: _Dia(profesionales) for fecha in fechas}
+        for fecha, id_turno, id_profesional, hora, id_servicio in filas:
+            dia = nuevos.get(fecha)
+            if dia is not None:
+                self._agregar(dia, id_turno, id_profesional, hora, duraciones.get(id_servicio))
+
+        with self._lock:
+            del self._cargas[clave]
+            self._descartar_vencidos()
+            for fecha in fechas:
+                if self._vigente(fecha):
+                    # Otro hilo lo cargó mientras tanto: usar el suyo
+                    nuevos[fecha] = self._dias[fecha]
+                elif not carga[fecha]:
+                    # Si hubo reservas o cancelaciones durante la consulta, el día leído
+                    # puede no incluirlas: sirve para esta lectura pero no se guarda
+                    self._dias[fecha] = nuevos[fecha]
+        return nuevos
+
+    def _descartar_vencidos(self):
+        ahora = time.monotonic()
+        for fecha in [f for f, d in self._dias.items() if ahora - d.cargado > self.ttl]:
+            del self._dias[fecha]
+
+    def _agregar(self, dia, id_turno, id_profesional, hora, duracion):
+        mascara = self._mascara(hora, duracion)
+        dia.ocupacion[id_profesional] = dia.ocupacion.get(id_profesional, 0) | mascara
+        dia.turnos[id_turno] = (id_profesional, mascara)
+
+    # Consultas
+
+    def duracion_servicio(self, id_servicio, cursor):
+        _, duraciones = self._cargar_catalogo(cursor)
+        return duraciones.get(id_servicio, self.slot_minutos)
+
+    def ocupacion_rango(self, desde, hasta, cursor, id_profesional=None):
+        """Copia de los bitmaps de cada día entre ``desde`` y ``hasta`` inclusive.
+
+        Los días que falten o estén vencidos se cargan juntos con una consulta.
+        """
+        fechas = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+        dias = self._dias_pedidos(fechas, cursor)
+        with self._lock:
+            return {fecha: self._filtrar(dias[fecha], id_profesional) for fecha in fechas}
+
+    @staticmethod
+    def _filtrar(dia, id_profesional):
+        if id_profesional is None:
+            return list(dia.ocupacion.values())
+        return [dia.ocupacion[id_profesional]] if id_profesional in dia.ocupacion else []
+
+    def horas_ocupadas_de(self, ocupaciones, duracion=None):
+        """Horas en las que ninguno de los bitmaps deja libres ``duracion`` minutos."""
+        slots = max(1, -(-_duracion_minutos(duracion) // self.slot_minutos))
+        base = (1 << slots) - 1
+        return [
+            self._hora_de_slot(slot)
+            for slot in self._slots_del_dia()
+            if not any(not (ocupacion & (base << slot)) for ocupacion in ocupaciones)
+        ]
+
+    def horas_libres_de(self, ocupaciones, duracion=None):
+        ocupadas = set(self.horas_ocupadas_de(ocupaciones, duracion))
+        horas = (self._hora_de_slot(slot) for slot in self._slots_del_dia())
+        return [hora for hora in horas if hora not in ocupadas]
+
+    def horas_ocupadas(self, fecha, cursor, duracion=None, id_profesional=None):
+        """Horas del día en las que ningún profesional puede atender ``duracion`` minutos."""
+        dia = self._dia(fecha, cursor)
+        with self._lock:
+            ocupaciones = self._filtrar(dia, id_profesional)
+        return self.horas_ocupadas_de(ocupaciones, duracion)
+
+    def horas_libres(self, fecha, cursor, duracion=None, id_profesional=None):
+        dia = self._dia(fecha, cursor)
+        with self._lock:
+            ocupaciones = self._filtrar(dia, id_profesional)
+        return self.horas_libres_de(ocupaciones, duracion)
+
+    def profesional_libre(self, fecha, hora, duracion, cursor, excluir=None):
+        """Profesional libre en ese horario con menos slots ocupados en el día, o None.
+
+        ``excluir`` es el turno que se está moviendo: su horario actual no cuenta como ocupado.
+        """
+        mascara = self._mascara(hora, duracion)
+        dia = self._dia(fecha, cursor)
+        with self._lock:
+            libres = [(bin(ocupacion).count('1'), id_profesional)
+                      for id_profesional, ocupacion in self._ocupacion_sin(dia, excluir).items()
+                      if id_profesional is not None and not ocupacion & mascara]
+        return min(libres)[1] if libres else None
+
+    @staticmethod
+    def _ocupacion_sin(dia, id_turno):
+        turno = dia.turnos.get(id_turno)
+        if turno is None:
+            return dia.ocupacion
+        id_profesional = turno[0]
+        ocupacion = dict(dia.ocupacion)
+        ocupacion[id_profesional] = 0
+        for otro_turno, (otro_profesional, otra_mascara) in dia.turnos.items():
+            if otro_profesional == id_profesional and otro_turno != id_turno:
+                ocupacion[id_profesional] |= otra_mascara
+        return ocupacion
+
+    def libre_en_base(self, fecha, hora, duracion, id_profesional, cursor, excluir=None):
+        """Confirma en la base que el profesional no tiene turnos pendientes en [hora, hora + duracion)."""
+        inicio = _a_minutos(hora)
+        fin = inicio + _duracion_minutos(duracion)
+        cursor.execute("""
+            SELECT t.hora, s.duracion
+            FROM turnos t
+            LEFT JOIN turno_servicio ts ON t.id_turno = ts.id_turno
+            LEFT JOIN servicios s ON ts.id_servicio = s.id_servicio
+            WHERE t.fecha = ? AND t.id_profesional = ? AND t.estado = 'Pendiente' AND t.id_turno <> ?
+        """, (fecha, id_profesional, excluir or 0))
+        for otra_hora, otra_duracion in cursor.fetchall():
+            otro_inicio = _a_minutos(otra_hora)
+            if otro_inicio < fin and inicio < otro_inicio + _duracion_minutos(otra_duracion):
+                return False
+        return True
+
+    def asignar_profesional(self, fecha, hora, duracion, cursor, excluir=None):
+        """Profesional libre para el horario, confirmado en la base, o None.
+
+        El índice pudo no ver un turno creado por otro worker: si la base muestra
+        un solapamiento se recarga el día y se elige de nuevo con la misma
+        confirmación, hasta INTENTOS_ASIGNACION veces.
+        """
+        for _ in range(INTENTOS_ASIGNACION):
+            id_profesional = self.profesional_libre(fecha, hora, duracion, cursor, excluir)
+            if id_profesional is None or self.libre_en_base(fecha, hora, duracion, id_profesional, cursor, excluir):
+                return id_profesional
+            self.invalidar(fecha)
+        return None
+
+    # Actualizaciones
+
+    def _anotar_cambio(self, fecha=None):
+        # Sin fecha (se libera un turno por id) cuenta para todos los días en carga
+        for carga in self._cargas.values():
+            for dia in ([fecha] if fecha is not None else list(carga)):
+                if dia in carga:
+                    carga[dia] += 1
+
+    def reservar(self, fecha, id_turno, id_profesional, hora, duracion):
+        with self._lock:
+            self._anotar_cambio(fecha)
+            dia = self._dias.get(fecha)
+            if dia is not None:
+                self._agregar(dia, id_turno, id_profesional, hora, duracion)
+
+    def liberar(self, id_turno):
+        with self._lock:
+            self._anotar_cambio()
+            for dia in self._dias.values():
+                turno = dia.turnos.pop(id_turno, None)
+                if turno:
+                    id_profesional, mascara = turno
+                    dia.ocupacion[id_profesional] &= ~mascara
+                    # Un profesional puede tener turnos solapados cargados de la base
+                    for otro_profesional, otra_mascara in dia.turnos.values():
+                        if otro_profesional == id_profesional:
+                            dia.ocupacion[id_profesional] |= otra_mascara
+
+    def invalidar_turno(self, id_turno):
+        with self._lock:
+            self._anotar_cambio()
+            for fecha in [f for f, d in self._dias.items() if id_turno in d.turnos]:
+                del self._dias[fecha]
+
+    def invalidar(self, fecha=None):
+        with self._lock:
+            self._anotar_cambio(fecha)
+            if fecha is None:
+                self._dias.clear()
+                self._version_catalogo = None
+            else:
+                self._dias.pop(fecha, None)
+
+
+disponibilidad = IndiceDisponibilidad(
+    slot_minutos=Config.SLOT_MINUTOS,
+    apertura=Config.HORA_APERTURA,
+    cierre=Config.HORA_CIERRE,
+    ttl=Config.DISPONIBILIDAD_TTL,
+)
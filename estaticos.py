@@ -0,0 +1,257 @@
+# estaticos.py
+"""Archivos del frontend (build de React en static/) servidos desde un índice en memoria.
+
+Al arrancar se recorre el directorio una sola vez: cada archivo queda con
+su tamaño, fecha, ETag y las variantes precomprimidas (.br / .gz) que tenga
+al lado, así las peticiones no consultan el disco para saber si un archivo
+existe. Los archivos con hash en el nombre (asset-manifest.json) se sirven
+como inmutables; index.html y service-worker.js se revalidan siempre. Las
+imágenes con variantes (imagenes.py) se negocian por Accept y ancho.
+Después de un deploy hay que reiniciar los workers para releer el índice.
+
+Las variantes se generan una vez después de cada build del frontend
+(brotli es opcional: pip install brotli).
+
+Uso: python estaticos.py [--directorio static]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+
+from flask import current_app, request
+from werkzeug.exceptions import NotFound
+from werkzeug.wsgi import wrap_file
+
+from config import Config
+
+EXTENSIONES_COMPRIMIBLES = {'.js', '.css', '.map', '.html', '.json', '.txt', '.svg', '.ico', '.xml'}
+TAMAÑO_MIN_COMPRESION = 1024
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))  # en orden de preferencia
+
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+SIN_CACHE = {'index.html', 'service-worker.js', 'manifest.json', 'asset-manifest.json'}
+_HASH_EN_NOMBRE = re.compile(r'\.[0-9a-f]{8}\.')
+_DIRS_CON_HASH = ('js/', 'css/', 'imagenes/')
+
+DIR_IMAGENES = 'imagenes'
+MANIFIESTO_IMAGENES = 'imagenes/manifiesto.json'
+# La variante elegida depende del formato aceptado y del ancho de pantalla informado
+CLIENT_HINTS = 'Sec-CH-Viewport-Width, Sec-CH-DPR'
+
+mimetypes.add_type('application/json', '.map')
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('image/webp', '.webp')
+
+
+class Archivo:
+    def __init__(self, ruta, tamaño, modificado, etag, cache_control):
+        self.ruta = ruta
+        self.tamaño = tamaño
+        self.modificado = modificado
+        self.etag = etag
+        self.cache_control = cache_control
+        self.mimetype = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+        self.variantes = {}  # codificación -> (ruta, tamaño)
+
+
+def hash_archivo(ruta):
+    h = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()[:20]
+
+
+def _inmutables(directorio):
+    """Rutas relativas de los archivos con hash que lista asset-manifest.json."""
+    try:
+        with open(os.path.join(directorio, 'asset-manifest.json'), encoding='utf-8') as f:
+            manifiesto = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    # El build de React quedó en la raíz de static/: './static/js/x.js' es js/x.js
+    rutas = {ruta.lstrip('./').removeprefix('static/') for ruta in manifiesto.get('files', {}).values()}
+    return {ruta for ruta in rutas if _HASH_EN_NOMBRE.search(os.path.basename(ruta))}
+
+
+class ArchivosEstaticos:
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.archivos = {}
+        self.imagenes = {}
+        self.cargar()
+
+    def cargar(self):
+        inmutables = _inmutables(self.directorio)
+        archivos = {}
+        for raiz, dirs, nombres in os.walk(self.directorio):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for nombre in nombres:
+                if nombre.startswith('.') or nombre.endswith(('.br', '.gz')):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                relativa = os.path.relpath(ruta, self.directorio).replace(os.sep, '/')
+                stat = os.stat(ruta)
+
+                if relativa in inmutables or (relativa.startswith(_DIRS_CON_HASH) and _HASH_EN_NOMBRE.search(nombre)):
+                    cache_control = CACHE_INMUTABLE
+                elif relativa in SIN_CACHE:
+                    cache_control = 'no-cache'
+                else:
+                    cache_control = f'public, max-age={Config.ESTATICOS_MAX_AGE}'
+
+                archivo = Archivo(ruta, stat.st_size, datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                                  hash_archivo(ruta), cache_control)
+                for codificacion, extension in CODIFICACIONES:
+                    try:
+                        stat_variante = os.stat(ruta + extension)
+                    except FileNotFoundError:
+                        continue
+                    # Una variante anterior al último build ya no corresponde al archivo
+                    if stat_variante.st_mtime >= stat.st_mtime:
+                        archivo.variantes[codificacion] = (ruta + extension, stat_variante.st_size)
+                archivos[relativa] = archivo
+        self.archivos = archivos
+        self.imagenes = self._cargar_imagenes()
+
+    def _cargar_imagenes(self):
+        """ruta original -> [(Archivo, tipo, ancho)] con el original incluido, según el manifiesto de imagenes.py."""
+        try:
+            with open(os.path.join(self.directorio, MANIFIESTO_IMAGENES), encoding='utf-8') as f:
+                manifiesto = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        imagenes = {}
+        for ruta, datos in manifiesto.items():
+            original = self.archivos.get(ruta)
+            # Si el original cambió desde que se generaron las variantes, se sirve tal cual
+            if original is None or original.etag != datos['hash']:
+                continue
+            opciones = [(original, datos['tipo'], datos['ancho'])]
+            for variante in datos['variantes']:
+                archivo = self.archivos.get(variante['archivo'])
+                if archivo:
+                    opciones.append((archivo, variante['tipo'], variante['ancho']))
+            if len(opciones) > 1:
+                imagenes[ruta] = opciones
+        return imagenes
+
+    def _elegir_imagen(self, opciones):
+        """La variante más liviana en un formato aceptado y con al menos el ancho pedido."""
+        tipo_original = opciones[0][1]
+        # Solo cuenta la mención explícita: image/* no garantiza soporte de AVIF o WebP
+        aceptados = {tipo for tipo, calidad in request.accept_mimetypes if calidad > 0}
+        candidatas = [(archivo, ancho) for archivo, tipo, ancho in opciones
+                      if tipo == tipo_original or tipo in aceptados]
+
+        objetivo = _ancho_pedido()
+        ancho_maximo = max(ancho for _, ancho in candidatas)
+        if objetivo is None or objetivo > ancho_maximo:
+            objetivo = ancho_maximo
+        # Entre las suficientes, la de menor ancho y luego la de menos bytes
+        suficientes = [(ancho, archivo.tamaño, archivo) for archivo, ancho in candidatas if ancho >= objetivo]
+        return min(suficientes, key=lambda opcion: opcion[:2])[2]
+
+    def obtener(self, ruta):
+        return self.archivos.get(ruta)
+
+    def enviar(self, ruta):
+        """Respuesta para el archivo ``ruta`` del índice, con ETag, Range y la mejor codificación aceptada."""
+        archivo = self.archivos.get(ruta)
+        if archivo is None:
+            raise NotFound()
+
+        cache_control = archivo.cache_control
+        negociada = ruta in self.imagenes
+        if negociada and 'Range' not in request.headers:
+            archivo = self._elegir_imagen(self.imagenes[ruta])
+
+        ruta_envio, tamaño, etag, codificacion = archivo.ruta, archivo.tamaño, archivo.etag, None
+        # Los rangos se piden sobre el archivo original (reanudar descargas, If-Range)
+        if archivo.variantes and 'Range' not in request.headers:
+            for candidata, _ in CODIFICACIONES:
+                if candidata in archivo.variantes and request.accept_encodings[candidata]:
+                    codificacion = candidata
+                    ruta_envio, tamaño = archivo.variantes[candidata]
+                    etag = f'{archivo.etag}-{candidata}'
+                    break
+
+        try:
+            f = open(ruta_envio, 'rb')
+        except FileNotFoundError:
+            raise NotFound()
+        rv = current_app.response_class(wrap_file(request.environ, f), mimetype=archivo.mimetype,
+                                        direct_passthrough=True)
+        rv.content_length = tamaño
+        rv.last_modified = archivo.modificado
+        rv.set_etag(etag)
+        # Una imagen negociada conserva la política de su URL, no la de la variante
+        rv.headers['Cache-Control'] = cache_control
+        if codificacion:
+            rv.content_encoding = codificacion
+        if archivo.variantes:
+            rv.vary.add('Accept-Encoding')
+        if negociada:
+            rv.vary.update(['Accept', 'Sec-CH-Viewport-Width', 'Sec-CH-DPR'])
+        elif ruta == 'index.html' and self.imagenes:
+            rv.headers['Accept-CH'] = CLIENT_HINTS
+        return rv.make_conditional(request, accept_ranges=True, complete_length=tamaño)
+
+
+def _ancho_pedido():
+    """Ancho en píxeles físicos: ?w= explícito o las client hints del navegador."""
+    try:
+        if 'w' in request.args:
+            return int(request.args['w'])
+        if 'Sec-CH-Viewport-Width' in request.headers:
+            return round(float(request.headers['Sec-CH-Viewport-Width']) * float(request.headers.get('Sec-CH-DPR', 1)))
+    except ValueError:
+        pass
+    return None
+
+
+def precomprimir(directorio):
+    """Escribe <archivo>.gz y, si brotli está instalado, <archivo>.br junto a cada archivo comprimible."""
+    try:
+        import brotli  # dependencia opcional, solo para generar las variantes
+    except ImportError:
+        brotli = None
+        print("brotli no está instalado: solo se generan variantes .gz")
+
+    ahorro = 0
+    for raiz, _, nombres in os.walk(directorio):
+        for nombre in nombres:
+            ruta = os.path.join(raiz, nombre)
+            if os.path.splitext(nombre)[1] not in EXTENSIONES_COMPRIMIBLES or os.path.getsize(ruta) < TAMAÑO_MIN_COMPRESION:
+                continue
+            with open(ruta, 'rb') as f:
+                datos = f.read()
+            variantes = {'.gz': gzip.compress(datos, 9, mtime=0)}
+            if brotli:
+                variantes['.br'] = brotli.compress(datos, quality=11)
+            for extension, comprimido in variantes.items():
+                # Si casi no achica, no vale la pena servir la variante
+                if len(comprimido) > len(datos) * 0.9:
+                    continue
+                with open(ruta + extension, 'wb') as f:
+                    f.write(comprimido)
+                print(f"{ruta}{extension}: {len(datos) / 1024:.0f} KB -> {len(comprimido) / 1024:.0f} KB")
+                if extension == '.gz':
+                    ahorro += len(datos) - len(comprimido)
+    print(f"Listo: {ahorro / 1024:.0f} KB menos por descarga completa con gzip.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--directorio', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    args = parser.parse_args()
+    precomprimir(args.directorio)
+
+
+if __name__ == "__main__":
+    main()
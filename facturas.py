@@ -0,0 +1,259 @@
+# facturas.py
+"""Plantilla PDF de las facturas y caché de los archivos ya generados.
+
+Una factura no cambia una vez emitida, así que el PDF se genera una sola
+vez y se guarda en el almacén como facturas/factura_<id>_v<PLANTILLA_VERSION>.pdf.
+Al cambiar el aspecto de la factura (elementos_factura, pdf_recursos o el
+logo) hay que subir PLANTILLA_VERSION para que se vuelvan a generar; los PDFs
+de versiones anteriores los elimina retencion_facturas por edad y tamaño.
+"""
+import io
+import shutil
+import zipfile
+from datetime import timedelta
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak
+
+from almacenamiento import almacen, retencion_facturas
+from database import db_connection
+from dialecto import dialecto
+from pdf_recursos import estilo, estilo_tabla, logo
+
+QUERY_FACTURA = """
+    SELECT f.id_factura, f.fecha_emision, t.fecha AS fecha_servicio, t.hora, 
+           s.nombre AS servicio, f.total, c.nombre AS cliente_nombre, 
+           c.apellido AS cliente_apellido, p.metodo_pago
+    FROM facturas f
+    JOIN pagos p ON f.id_pago = p.id_pago
+    JOIN turnos t ON p.id_turno = t.id_turno
+    JOIN turno_servicio ts ON t.id_turno = ts.id_turno
+    JOIN servicios s ON ts.id_servicio = s.id_servicio
+    JOIN clientes c ON f.id_cliente = c.id_cliente
+"""
+
+# Subir al cambiar el aspecto del PDF de la factura
+PLANTILLA_VERSION = 1
+
+# Facturas por sentencia: SQL Server admite hasta 1000 filas en VALUES y 2100 parámetros
+LOTE_FACTURAS = 500
+
+
+def consultar_factura(cursor, id_factura, id_cliente=None):
+    """Fila de la factura, o None si no existe o no es del cliente indicado."""
+    if id_cliente is None:
+        cursor.execute(QUERY_FACTURA + " WHERE f.id_factura = ?", (id_factura,))
+    else:
+        cursor.execute(QUERY_FACTURA + " WHERE f.id_factura = ? AND t.id_cliente = ?", (id_factura, id_cliente))
+    factura = cursor.fetchone()
+    return tuple(factura) if factura else None
+
+
+def consultar_facturas(cursor, ids=None, desde=None, hasta=None, id_cliente=None, limite=None):
+    """Filas de varias facturas en una consulta, filtradas por ids y/o fecha de emisión.
+
+    Con ``limite`` se leen hasta limite + 1 filas para que quien llama
+    detecte que el pedido lo supera.
+    """
+    condiciones, params = [], []
+    if ids:
+        condiciones.append(f"f.id_factura IN ({', '.join('?' for _ in ids)})")
+        params.extend(ids)
+    if desde:
+        condiciones.append("f.fecha_emision >= ?")
+        params.append(desde)
+    if hasta:
+        # fecha_emision puede incluir la hora: tomar todo el último día
+        condiciones.append("f.fecha_emision < ?")
+        params.append(hasta + timedelta(days=1))
+    if id_cliente is not None:
+        condiciones.append("f.id_cliente = ?")
+        params.append(id_cliente)
+
+    query = QUERY_FACTURA.replace("SELECT", f"SELECT {dialecto.top(limite + 1)}", 1) if limite else QUERY_FACTURA
+    where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    limit = f" {dialecto.limit(limite + 1)}" if limite else ''
+    cursor.execute(f"{query}{where} ORDER BY f.id_factura{limit}", params)
+    return [tuple(fila) for fila in cursor.fetchall()]
+
+
+def crear_factura_pdf(factura, filepath):
+    doc = SimpleDocTemplate(filepath, pagesize=letter)
+    doc.build(elementos_factura(factura))
+
+
+def crear_facturas_pdf(facturas, archivo):
+    """Un solo PDF con una factura por página; ``archivo`` puede ser una ruta o un archivo abierto."""
+    doc = SimpleDocTemplate(archivo, pagesize=letter)
+    elements = []
+    for factura in facturas:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(elementos_factura(factura))
+    doc.build(elements)
+
+
+def elementos_factura(factura):
+    factura_id, fecha_emision, fecha_servicio, hora_servicio, servicio, total, cliente_nombre, cliente_apellido, metodo_pago = factura
+
+    normal = estilo('normal_factura')
+
+    elements = []
+
+    # Agregar logo
+    im = logo(120, 60)
+    if im:
+        elements.append(im)
+
+    # Encabezado de la factura
+    elements.append(Spacer(1, 12))
+    title = Paragraph(f"<para align='right'><b>Factura N° {factura_id}</b></para>", estilo('titulo_factura'))
+    elements.append(title)
+
+    empresa_info = Paragraph("""
+        <b>Spa Sentirse Bien</b><br/>
+        Dirección: Calle Falsa 123, Ciudad<br/>
+        Teléfono: 123-456-7890<br/>
+        Email: info@sentirsebien.com
+        """, normal)
+    elements.append(empresa_info)
+
+    elements.append(Spacer(1, 12))
+
+    # Información del cliente
+    cliente_info = Paragraph(f"<b>Cliente:</b> {cliente_nombre} {cliente_apellido}", normal)
+    elements.append(cliente_info)
+
+    fecha_info = Paragraph(f"<b>Fecha de emisión:</b> {fecha_emision.strftime('%Y-%m-%d')}", normal)
+    metodo_pago_info = Paragraph(f"<b>Método de pago:</b> {metodo_pago.capitalize()}", normal)
+    elements.append(fecha_info)
+    elements.append(metodo_pago_info)
+
+    elements.append(Spacer(1, 12))
+
+    # Detalles del servicio en una tabla
+    data = [
+        ['Descripción', 'Fecha del Servicio', 'Hora', 'Cantidad', 'Precio Unitario', 'Total'],
+        [servicio, fecha_servicio.strftime('%Y-%m-%d'), hora_servicio.strftime('%H:%M'), '1', f"${total:.2f}", f"${total:.2f}"]
+    ]
+
+    table = Table(data, colWidths=[150, 90, 50, 60, 80, 80])
+    table.setStyle(estilo_tabla('factura'))
+
+    elements.append(table)
+    elements.append(Spacer(1, 12))
+
+    # Resumen del pago (eliminamos impuestos)
+    resumen_data = [
+        ['Subtotal:', f"${total:.2f}"],
+        ['Total Pagado:', f"${total:.2f}"]
+    ]
+
+    resumen_table = Table(resumen_data, colWidths=[400, 100])
+    resumen_table.setStyle(estilo_tabla('resumen_factura'))
+    elements.append(resumen_table)
+
+    elements.append(Spacer(1, 24))
+
+    # Pie de página
+    footer = Paragraph("Gracias por confiar en nosotros. ¡Esperamos verte pronto!", normal)
+    elements.append(footer)
+
+    return elements
+
+
+class CacheFacturas:
+    def __init__(self, almacen, version=PLANTILLA_VERSION):
+        self.almacen = almacen
+        self.version = f'v{version}'
+
+    def clave(self, id_factura):
+        return f'facturas/factura_{id_factura}_{self.version}.pdf'
+
+    def etag(self, id_factura):
+        # El contenido queda determinado por la factura y la versión de la plantilla
+        return f'{id_factura}-{self.version}'
+
+    def obtener(self, id_factura):
+        """Clave del PDF en el almacén si ya está generado con la plantilla actual, o None."""
+        clave = self.clave(id_factura)
+        return clave if self.almacen.existe(clave) else None
+
+    def generar(self, factura):
+        """Genera el PDF de la fila de factura y devuelve su clave."""
+        id_factura = factura[0]
+        clave = self.clave(id_factura)
+        # El almacén publica el archivo completo: nadie sirve un PDF a medio escribir
+        self.almacen.guardar_archivo(clave, lambda ruta: crear_factura_pdf(factura, ruta))
+        return clave
+
+    def obtener_o_generar(self, factura):
+        return self.obtener(factura[0]) or self.generar(factura)
+
+    def copiar_a(self, factura, destino):
+        """Para la cola de trabajos: deja en ``destino`` una copia del PDF cacheado."""
+        origen = self.almacen.abrir(self.obtener_o_generar(factura))
+        try:
+            with open(destino, 'wb') as f:
+                shutil.copyfileobj(origen, f)
+        finally:
+            origen.close()
+
+    def pre_generar(self, ids_factura):
+        """Genera los PDFs que falten; pensado para correr después de registrar un pago."""
+        pendientes = [id_factura for id_factura in ids_factura if not self.obtener(id_factura)]
+        if not pendientes:
+            return 0
+        generadas = 0
+        for inicio in range(0, len(pendientes), LOTE_FACTURAS):
+            lote = pendientes[inicio:inicio + LOTE_FACTURAS]
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                # Las facturas de un pago múltiple en una consulta por lote
+                marcadores = ', '.join('?' for _ in lote)
+                cursor.execute(QUERY_FACTURA + f" WHERE f.id_factura IN ({marcadores})", lote)
+                facturas = [tuple(fila) for fila in cursor.fetchall()]
+            for factura in facturas:
+                self.generar(factura)
+            generadas += len(facturas)
+        # Ya en segundo plano: buen momento para descartar los PDFs más viejos
+        retencion_facturas.tal_vez_purgar()
+        return generadas
+
+
+class _SalidaZip(io.RawIOBase):
+    """Destino sin seek para ZipFile: acumula lo escrito hasta que se vacía."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def zip_facturas(facturas, cache):
+    """Genera el ZIP por partes: cada PDF se escribe y se envía antes de pasar al siguiente."""
+    salida = _SalidaZip()
+    # Los PDF ya vienen comprimidos: guardarlos sin volver a comprimir
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for factura in facturas:
+            origen = cache.almacen.abrir(cache.obtener_o_generar(factura))
+            try:
+                with zf.open(f'factura_{factura[0]}.pdf', 'w') as destino:
+                    shutil.copyfileobj(origen, destino)
+            finally:
+                origen.close()
+            yield salida.vaciar()
+    yield salida.vaciar()
+
+
+cache_facturas = CacheFacturas(almacen)
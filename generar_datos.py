@@ -0,0 +1,336 @@
+# generar_datos.py
+"""Genera datos sintéticos del spa para medir rendimiento con volúmenes reales.
+
+Agrega clientes, usuarios, profesionales, turnos con su servicio, pagos y
+facturas a la base configurada (DB_MOTOR), con horarios pico, mezcla de
+métodos de pago, descuentos y cancelaciones. Con la misma semilla, escala y
+--hoy produce exactamente los mismos datos. Los ids se asignan a partir de
+los existentes, así que se puede correr sobre una base con datos.
+
+Escala 1: 10.000 clientes, 20 profesionales y unos 43.000 turnos en 426 días.
+Todo crece en proporción a la escala (escala 25 supera el millón de turnos).
+
+Uso:
+    python migrar.py
+    python generar_datos.py --escala 1 --semilla 42
+    python generar_datos.py --escala 25 --hoy 2026-01-01 --lote 10000
+"""
+import argparse
+import random
+import time
+import unicodedata
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from config import Config
+from database import db_connection
+from dialecto import dialecto
+from passwords import hash_with_rounds
+from resumen_ingresos import reconstruir
+
+CLIENTES_POR_ESCALA = 10_000
+PROFESIONALES_POR_ESCALA = 20
+EMPLEADOS_POR_ESCALA = 2
+
+NOMBRES = ('María', 'Lucía', 'Sofía', 'Valentina', 'Martina', 'Camila', 'Julieta', 'Florencia', 'Paula',
+           'Carla', 'Ana', 'Laura', 'Gabriela', 'Agustina', 'Juan', 'Martín', 'Lucas', 'Mateo', 'Diego',
+           'Pablo', 'Javier', 'Nicolás', 'Santiago', 'Tomás', 'Federico', 'Andrés', 'Marcelo', 'Sergio')
+APELLIDOS = ('González', 'Rodríguez', 'Gómez', 'Fernández', 'López', 'Díaz', 'Martínez', 'Pérez', 'García',
+             'Sánchez', 'Romero', 'Sosa', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez', 'Flores', 'Acosta',
+             'Benítez', 'Medina', 'Herrera', 'Suárez', 'Aguirre', 'Giménez', 'Gutiérrez', 'Pereyra')
+CALLES = ('Av. Sarmiento', 'San Martín', 'Belgrano', 'Rivadavia', '25 de Mayo', 'Mitre', 'Moreno',
+          'Av. Las Heras', 'Córdoba', 'Entre Ríos', 'Jujuy', 'Salta', 'Pellegrini', 'Urquiza')
+ESPECIALIDADES = ('Masajes', 'Belleza', 'Tratamientos faciales', 'Tratamientos corporales', 'Hidromasajes')
+
+# (nombre, duración en minutos, precio, popularidad relativa); solo si la tabla está vacía
+SERVICIOS = (
+    ('Masaje anti-stress', 60, Decimal('12000.00'), 10),
+    ('Masaje descontracturante', 60, Decimal('13500.00'), 8),
+    ('Masaje con piedras calientes', 90, Decimal('18000.00'), 4),
+    ('Masaje circulatorio', 60, Decimal('12500.00'), 3),
+    ('Lifting de pestañas', 30, Decimal('7500.00'), 5),
+    ('Depilación facial', 30, Decimal('5000.00'), 6),
+    ('Belleza de manos y pies', 60, Decimal('9000.00'), 7),
+    ('Punta de diamante', 60, Decimal('11000.00'), 3),
+    ('Limpieza profunda + hidratación', 60, Decimal('10500.00'), 6),
+    ('Criofrecuencia facial', 45, Decimal('14000.00'), 2),
+    ('VelaSlim', 45, Decimal('15000.00'), 2),
+    ('DermoHealth', 45, Decimal('13000.00'), 2),
+    ('Ultracavitación', 60, Decimal('16000.00'), 2),
+    ('Hidromasajes', 30, Decimal('6000.00'), 4),
+    ('Yoga', 60, Decimal('4000.00'), 3),
+)
+
+# Probabilidad relativa de que un horario libre se reserve, por hora de inicio
+PESO_HORA = {8: 0.3, 9: 0.5, 10: 0.9, 11: 1.0, 12: 0.7, 13: 0.5, 14: 0.6, 15: 0.7,
+             16: 0.8, 17: 1.0, 18: 1.0, 19: 0.8, 20: 0.4}
+PESO_DIA = (0.8, 0.8, 0.85, 0.9, 1.0, 1.15, 0.35)  # lunes a domingo
+OCUPACION = 0.45          # probabilidad base de que un horario libre se reserve
+CANCELADOS = 0.08         # turnos cancelados (sin servicio ni pago, como cancelar_reserva)
+PAGO_ANTICIPADO = 0.3     # turnos futuros ya pagados
+DESCUENTO = 0.25          # pagos web con el 10% de descuento de realizar_pago
+METODOS_PAGO = ('Tarjeta de Crédito', 'Tarjeta de Débito')
+PESO_METODOS = (0.58, 0.42)
+
+COLUMNAS = {
+    'clientes': ('id_cliente', 'nombre', 'apellido', 'email', 'telefono', 'direccion', 'fecha_registro'),
+    'usuarios': ('id_usuario', 'id_cliente', 'nombre_usuario', 'password', 'email', 'rol'),
+    'profesionales': ('id_profesional', 'nombre', 'apellido', 'especialidad', 'email', 'telefono'),
+    'servicios': ('id_servicio', 'nombre', 'duracion', 'precio'),
+    'turnos': ('id_turno', 'fecha', 'hora', 'id_cliente', 'id_profesional', 'estado'),
+    'turno_servicio': ('id_turno', 'id_servicio'),
+    'pagos': ('id_pago', 'id_turno', 'monto', 'metodo_pago', 'fecha_pago'),
+    'facturas': ('id_factura', 'id_cliente', 'id_pago', 'total', 'fecha_emision'),
+}
+SIN_IDENTIDAD = {'turno_servicio'}
+
+
+class Insertador:
+    """Acumula filas por tabla y las inserta por lotes, respetando el orden de las claves foráneas."""
+
+    def __init__(self, conn, lote):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        if dialecto.nombre == 'sqlserver':
+            self.cursor.fast_executemany = True
+        self.lote = lote
+        self.filas = {tabla: [] for tabla in COLUMNAS}
+        self.insertadas = dict.fromkeys(COLUMNAS, 0)
+
+    def agregar(self, tabla, fila):
+        self.filas[tabla].append(fila)
+        if len(self.filas[tabla]) >= self.lote:
+            self.vaciar()
+
+    def vaciar(self):
+        for tabla, filas in self.filas.items():
+            if not filas:
+                continue
+            columnas = COLUMNAS[tabla]
+            sql = (f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+                   f"VALUES ({', '.join('?' for _ in columnas)})")
+            explicitos = tabla not in SIN_IDENTIDAD and dialecto.ids_explicitos(tabla, True)
+            if explicitos:
+                self.cursor.execute(explicitos)
+            self.cursor.executemany(sql, filas)
+            if explicitos:
+                self.cursor.execute(dialecto.ids_explicitos(tabla, False))
+            self.insertadas[tabla] += len(filas)
+            filas.clear()
+        self.conn.commit()
+
+
+def _siguiente_id(cursor, tabla, columna):
+    cursor.execute(f"SELECT MAX({columna}) FROM {tabla}")
+    return (cursor.fetchone()[0] or 0) + 1
+
+
+def _ascii(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode().lower().replace(' ', '')
+
+
+def _horarios():
+    apertura = datetime.strptime(Config.HORA_APERTURA, '%H:%M')
+    cierre = datetime.strptime(Config.HORA_CIERRE, '%H:%M')
+    horarios = []
+    while apertura <= cierre:
+        horarios.append(apertura.time())
+        apertura += timedelta(minutes=Config.SLOT_MINUTOS)
+    return horarios
+
+
+class Generador:
+    def __init__(self, conn, rng, escala, hoy, dias_pasados, dias_futuros, password, lote):
+        self.rng = rng
+        self.escala = escala
+        self.hoy = hoy
+        # Referencia fija para que el resultado no dependa de la hora en que se corre
+        self.ahora = datetime.combine(hoy, datetime.min.time()) + timedelta(hours=8)
+        self.dias_pasados = dias_pasados
+        self.dias_futuros = dias_futuros
+        self.password = password
+        self.insertador = Insertador(conn, lote)
+
+        cursor = self.insertador.cursor
+        self.ids = {
+            tabla: _siguiente_id(cursor, tabla, COLUMNAS[tabla][0])
+            for tabla in COLUMNAS if tabla not in SIN_IDENTIDAD
+        }
+        self.servicios = self._servicios(cursor)
+        self.clientes = []
+        self.profesionales = []
+
+    def _nuevo_id(self, tabla):
+        nuevo = self.ids[tabla]
+        self.ids[tabla] += 1
+        return nuevo
+
+    def _persona(self):
+        return self.rng.choice(NOMBRES), self.rng.choice(APELLIDOS), f"11{self.rng.randrange(10**7, 10**8)}"
+
+    def _servicios(self, cursor):
+        cursor.execute("SELECT id_servicio, duracion, precio FROM servicios ORDER BY id_servicio")
+        servicios = [(fila[0], fila[1], Decimal(str(fila[2])), self.rng.randint(1, 10)) for fila in cursor.fetchall()]
+        if servicios:
+            return servicios
+        for nombre, duracion, precio, popularidad in SERVICIOS:
+            id_servicio = self._nuevo_id('servicios')
+            self.insertador.agregar('servicios', (id_servicio, nombre, duracion, precio))
+            servicios.append((id_servicio, duracion, precio, popularidad))
+        return servicios
+
+    def personas(self):
+        inicio_historial = self.hoy - timedelta(days=self.dias_pasados)
+        for _ in range(max(1, round(CLIENTES_POR_ESCALA * self.escala))):
+            nombre, apellido, telefono = self._persona()
+            id_cliente = self._nuevo_id('clientes')
+            email = f"{_ascii(nombre)}.{_ascii(apellido)}{id_cliente}@ejemplo.com"
+            registro = datetime.combine(inicio_historial - timedelta(days=self.rng.randrange(730)),
+                                        datetime.min.time()) + timedelta(minutes=self.rng.randrange(24 * 60))
+            direccion = f"{self.rng.choice(CALLES)} {self.rng.randrange(1, 3000)}"
+            self.insertador.agregar('clientes', (id_cliente, nombre, apellido, email, telefono, direccion, registro))
+            self.insertador.agregar('usuarios', (self._nuevo_id('usuarios'), id_cliente,
+                                                 f"{_ascii(nombre)}{id_cliente}", self.password, email, 'Cliente'))
+            self.clientes.append(id_cliente)
+
+        for _ in range(max(1, round(PROFESIONALES_POR_ESCALA * self.escala))):
+            nombre, apellido, telefono = self._persona()
+            id_profesional = self._nuevo_id('profesionales')
+            email = f"profesional{id_profesional}@ejemplo.com"
+            self.insertador.agregar('profesionales', (id_profesional, nombre, apellido,
+                                                      self.rng.choice(ESPECIALIDADES), email, telefono))
+            # El panel del profesional lo encuentra por el email del usuario
+            self.insertador.agregar('usuarios', (self._nuevo_id('usuarios'), None, f"profesional{id_profesional}",
+                                                 self.password, email, 'Profesional'))
+            self.profesionales.append(id_profesional)
+
+        for _ in range(max(1, round(EMPLEADOS_POR_ESCALA * self.escala))):
+            nombre, apellido, telefono = self._persona()
+            id_cliente = self._nuevo_id('clientes')
+            email = f"empleado{id_cliente}@ejemplo.com"
+            self.insertador.agregar('clientes', (id_cliente, nombre, apellido, email, telefono, None, self.ahora))
+            self.insertador.agregar('usuarios', (self._nuevo_id('usuarios'), id_cliente, f"empleado{id_cliente}",
+                                                 self.password, email, 'Empleado'))
+
+        id_usuario = self._nuevo_id('usuarios')
+        self.insertador.agregar('usuarios', (id_usuario, None, f"admin{id_usuario}", self.password,
+                                             f"admin{id_usuario}@ejemplo.com", 'admin'))
+
+    def _cliente(self):
+        # Pocos clientes concentran muchas reservas
+        return self.clientes[int(len(self.clientes) * self.rng.random() ** 2.5)]
+
+    def turnos(self):
+        horarios = _horarios()
+        pesos_servicio = [servicio[3] for servicio in self.servicios]
+        inicio = time.perf_counter()
+        for desplazamiento in range(-self.dias_pasados, self.dias_futuros + 1):
+            fecha = self.hoy + timedelta(days=desplazamiento)
+            factor = PESO_DIA[fecha.weekday()]
+            if desplazamiento > 3:
+                # Cuanto más lejos, menos reservado está el día
+                factor *= max(0.1, 1 - desplazamiento / (self.dias_futuros + 1))
+            for id_profesional in self.profesionales:
+                libre_desde = horarios[0]
+                for hora in horarios:
+                    if hora < libre_desde or self.rng.random() >= OCUPACION * factor * PESO_HORA.get(hora.hour, 0.5):
+                        continue
+                    servicio = self.rng.choices(self.servicios, pesos_servicio)[0]
+                    comienzo = datetime.combine(fecha, hora)
+                    libre_desde = (comienzo + timedelta(minutes=servicio[1])).time()
+                    self._turno(fecha, hora, comienzo, id_profesional, servicio)
+                    if libre_desde <= hora:
+                        break  # el servicio termina después de medianoche
+
+            if desplazamiento % 30 == 0:
+                print(f"{fecha}: {self.ids['turnos'] - 1} turnos, {time.perf_counter() - inicio:.0f}s")
+
+    def _turno(self, fecha, hora, comienzo, id_profesional, servicio):
+        rng = self.rng
+        id_turno = self._nuevo_id('turnos')
+        id_cliente = self._cliente()
+        id_servicio, duracion, precio, _ = servicio
+        # Las reservas se hacen con al menos 72 horas de anticipación
+        reservado = min(comienzo - timedelta(hours=rng.uniform(72, 24 * 30)),
+                        self.ahora - timedelta(minutes=rng.uniform(1, 60 * 24 * 3)))
+        pasado = comienzo < self.ahora
+
+        if rng.random() < (CANCELADOS if pasado else CANCELADOS / 2):
+            self.insertador.agregar('turnos', (id_turno, fecha, hora, id_cliente, id_profesional, 'Cancelado'))
+            return
+
+        if pasado:
+            # Los impagos vencidos los elimina el barrido; quedan solo los de las últimas 48 horas
+            pagado = comienzo < self.ahora - timedelta(hours=48) or rng.random() < 0.7
+        else:
+            pagado = rng.random() < PAGO_ANTICIPADO
+        estado = 'Realizado' if pasado and pagado else 'Pendiente'
+        self.insertador.agregar('turnos', (id_turno, fecha, hora, id_cliente, id_profesional, estado))
+        self.insertador.agregar('turno_servicio', (id_turno, id_servicio))
+
+        id_pago = self._nuevo_id('pagos')
+        if not pagado:
+            self.insertador.agregar('pagos', (id_pago, id_turno, precio, 'Pendiente', reservado))
+            return
+
+        if pasado and rng.random() < 0.6:
+            # Pagado en el spa al terminar el servicio
+            fecha_pago = comienzo + timedelta(minutes=duracion + rng.uniform(0, 15))
+        else:
+            limite = min(comienzo, self.ahora)
+            fecha_pago = reservado + (limite - reservado) * rng.random()
+        monto = (precio * Decimal('0.9')).quantize(Decimal('0.01')) if rng.random() < DESCUENTO else precio
+        metodo = rng.choices(METODOS_PAGO, PESO_METODOS)[0]
+        fecha_pago = fecha_pago.replace(microsecond=0)
+        self.insertador.agregar('pagos', (id_pago, id_turno, monto, metodo, fecha_pago))
+        self.insertador.agregar('facturas', (self._nuevo_id('facturas'), id_cliente, id_pago, monto, fecha_pago))
+
+
+def generar(escala=1.0, semilla=42, hoy=None, dias_pasados=365, dias_futuros=60,
+            password='spa12345', rounds=Config.BCRYPT_ROUNDS, lote=5000):
+    """Carga los datos y reconstruye el resumen de ingresos; devuelve las filas insertadas por tabla."""
+    inicio = time.perf_counter()
+    rng = random.Random(semilla)
+    # Un solo hash para todos los usuarios: bcrypt por fila llevaría horas
+    hash_password = hash_with_rounds(password, rounds)
+
+    with db_connection() as conn:
+        generador = Generador(conn, rng, escala, hoy or date.today(), dias_pasados, dias_futuros,
+                              hash_password, lote)
+        generador.personas()
+        generador.turnos()
+        generador.insertador.vaciar()
+        insertadas = generador.insertador.insertadas
+
+    duracion = time.perf_counter() - inicio
+    print(', '.join(f"{tabla}: {cantidad}" for tabla, cantidad in insertadas.items()))
+    print(f"{sum(insertadas.values())} filas en {duracion:.1f}s "
+          f"({sum(insertadas.values()) / max(duracion, 0.001):.0f} filas/s). "
+          f"Contraseña de todos los usuarios: {password}")
+    reconstruir()
+    return insertadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', type=float, default=1.0, help='Factor de volumen (1 = 10.000 clientes)')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--hoy', type=lambda valor: datetime.strptime(valor, '%Y-%m-%d').date(),
+                        help='Fecha de referencia AAAA-MM-DD (por defecto, hoy)')
+    parser.add_argument('--dias-pasados', type=int, default=365, help='Días de historial')
+    parser.add_argument('--dias-futuros', type=int, default=60, help='Días de reservas por delante')
+    parser.add_argument('--password', default='spa12345', help='Contraseña de todos los usuarios generados')
+    parser.add_argument('--rounds', type=int, default=Config.BCRYPT_ROUNDS, help='Costo bcrypt')
+    parser.add_argument('--lote', type=int, default=5000, help='Filas por INSERT por lotes')
+    args = parser.parse_args()
+
+    try:
+        generar(args.escala, args.semilla, args.hoy, args.dias_pasados, args.dias_futuros,
+                args.password, args.rounds, args.lote)
+    except Exception as e:
+        print(f"Error al generar los datos: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,116 @@
-import bcrypt
-from database import get_db_connection
+# hash_passwords.py
+"""Hashea con bcrypt las contraseñas de usuarios que todavía están en texto plano.
 
-def hash_passwords():
-    conn = get_db_connection()
-    if conn:
+Procesa la tabla por lotes ordenados por id_usuario, reparte el hashing entre
+varios procesos y confirma cada lote por separado, guardando el último id
+confirmado para poder reanudar tras un fallo.
+
+Uso:
+    python hash_passwords.py --procesos 4 --lote 500
+    python hash_passwords.py --reanudar
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from database import db_connection
+from dialecto import dialecto
+from passwords import hash_cost, hash_with_rounds
+
+CHECKPOINT_FILE = '.hash_passwords.checkpoint'
+
+
+def _hash_row(args):
+    id_usuario, password, rounds = args
+    return hash_with_rounds(password, rounds), id_usuario
+
+
+def leer_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f).get('ultimo_id', 0)
+    except FileNotFoundError:
+        return 0
+
+
+def guardar_checkpoint(path, ultimo_id):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'ultimo_id': ultimo_id}, f)
+    os.replace(tmp, path)
+
+
+def hash_passwords(desde_id=0, lote=500, procesos=None, rounds=Config.BCRYPT_ROUNDS,
+                   checkpoint=CHECKPOINT_FILE):
+    hasheados = 0
+    ultimo_id = desde_id
+    inicio = time.perf_counter()
+
+    with db_connection() as conn, ProcessPoolExecutor(max_workers=procesos) as pool:
         cursor = conn.cursor()
-        try:
-            # Obtener todos los usuarios y sus contraseñas actuales
-            cursor.execute("SELECT id_usuario, password FROM usuarios")
-            users = cursor.fetchall()
+        if dialecto.nombre == 'sqlserver':
+            cursor.fast_executemany = True
 
-            for user in users:
-                user_id = user.id_usuario
-                plain_password = user.password
+        cursor.execute(
+            "SELECT COUNT(*) FROM usuarios WHERE id_usuario > ? AND password NOT LIKE '$2_$%'",
+            (desde_id,),
+        )
+        pendientes = cursor.fetchone()[0]
+        print(f"Contraseñas sin hashear a partir de id {desde_id}: {pendientes}")
 
-                # Hashear la contraseña
-                hashed_password = bcrypt.hashpw(plain_password.encode('utf-8'), bcrypt.gensalt())
+        while True:
+            cursor.execute(
+                f"SELECT {dialecto.top(lote)} id_usuario, password FROM usuarios "
+                f"WHERE id_usuario > ? AND password NOT LIKE '$2_$%' ORDER BY id_usuario {dialecto.limit(lote)}",
+                (ultimo_id,),
+            )
+            filas = cursor.fetchall()
+            if not filas:
+                break
 
-                # Actualizar la contraseña en la base de datos
-                update_query = "UPDATE usuarios SET password = ? WHERE id_usuario = ?"
-                cursor.execute(update_query, (hashed_password.decode('utf-8'), user_id))
+            # Saltar valores que ya son hashes bcrypt (el LIKE también deja pasar $2 sin costo válido)
+            trabajo = [(f.id_usuario, f.password, rounds) for f in filas if hash_cost(f.password) is None]
+            if trabajo:
+                chunksize = max(1, len(trabajo) // ((procesos or os.cpu_count() or 1) * 4))
+                actualizaciones = list(pool.map(_hash_row, trabajo, chunksize=chunksize))
+                cursor.executemany("UPDATE usuarios SET password = ? WHERE id_usuario = ?", actualizaciones)
 
-            # Confirmar los cambios
             conn.commit()
-            print("Contraseñas hasheadas y actualizadas correctamente.")
-        except Exception as e:
-            print(f"Error al hashear las contraseñas: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
-    else:
-        print("No se pudo conectar a la base de datos.")
+            ultimo_id = filas[-1].id_usuario
+            guardar_checkpoint(checkpoint, ultimo_id)
+
+            hasheados += len(trabajo)
+            duracion = time.perf_counter() - inicio
+            print(f"id <= {ultimo_id}: {hasheados}/{pendientes} hasheadas "
+                  f"({hasheados * 100 / max(pendientes, 1):.0f}%), {hasheados / duracion:.1f} hashes/s")
+
+    duracion = time.perf_counter() - inicio
+    print(f"Listo: {hasheados} contraseñas hasheadas en {duracion:.1f}s.")
+    return hasheados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lote', type=int, default=500, help='Filas por lote confirmado')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos de hashing (por defecto, uno por CPU)')
+    parser.add_argument('--rounds', type=int, default=Config.BCRYPT_ROUNDS, help='Costo bcrypt')
+    parser.add_argument('--desde-id', type=int, default=0, help='Empezar después de este id_usuario')
+    parser.add_argument('--reanudar', action='store_true', help='Continuar desde el último lote confirmado')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE, help='Archivo de checkpoint')
+    args = parser.parse_args()
+
+    desde_id = leer_checkpoint(args.checkpoint) if args.reanudar else args.desde_id
+    try:
+        hash_passwords(desde_id=desde_id, lote=args.lote, procesos=args.procesos,
+                       rounds=args.rounds, checkpoint=args.checkpoint)
+    except Exception as e:
+        print(f"Error al hashear las contraseñas: {e}")
+        print("Use --reanudar para continuar desde el último lote confirmado.")
+        raise SystemExit(1)
+
 
 if __name__ == "__main__":
-    hash_passwords()
+    main()
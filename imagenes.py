@@ -0,0 +1,134 @@
+# imagenes.py
+"""Variantes optimizadas de las imágenes de static/ (AVIF, WebP y el formato original reducido).
+
+Por cada imagen se generan versiones a varios anchos en static/imagenes/,
+con el hash del contenido en el nombre, y un manifiesto que estaticos.py
+lee al arrancar para elegir, según el Accept y el ancho pedido, la variante
+más liviana. La URL original no cambia y el original queda como respaldo.
+AVIF requiere Pillow 11.3 o pillow-avif-plugin; si no está, se omite.
+
+Se corre después de cada build del frontend, antes de estaticos.py.
+
+Uso: python imagenes.py [--directorio static] [--anchos 480 960 1600]
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+
+from PIL import Image, features
+
+from estaticos import DIR_IMAGENES, MANIFIESTO_IMAGENES, hash_archivo
+
+ANCHOS = (480, 960, 1600)
+EXTENSIONES = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.ico': 'ICO'}
+TAMAÑO_MIN = 16 * 1024  # las imágenes más chicas se sirven tal cual
+CALIDAD_WEBP = 80
+CALIDAD_AVIF = 55
+
+TIPOS = {'AVIF': 'image/avif', 'WEBP': 'image/webp', 'PNG': 'image/png', 'JPEG': 'image/jpeg',
+         'ICO': 'image/vnd.microsoft.icon'}
+
+
+def _codificar(imagen, formato):
+    salida = io.BytesIO()
+    if formato == 'AVIF':
+        imagen.save(salida, 'AVIF', quality=CALIDAD_AVIF)
+    elif formato == 'WEBP':
+        imagen.save(salida, 'WEBP', quality=CALIDAD_WEBP, method=6)
+    elif formato == 'JPEG':
+        imagen.convert('RGB').save(salida, 'JPEG', quality=85, optimize=True, progressive=True)
+    elif formato == 'ICO':
+        # Pillow guarda cada tamaño del ícono como PNG comprimido
+        imagen.save(salida, 'ICO', sizes=[imagen.size])
+    else:
+        imagen.save(salida, 'PNG', optimize=True)
+    return salida.getvalue()
+
+
+def variantes_imagen(ruta, formato_original, anchos, formatos):
+    """Itera (formato, ancho, bytes) de cada variante de la imagen."""
+    with Image.open(ruta) as imagen:
+        imagen.load()
+    if formato_original == 'ICO':
+        yield 'ICO', imagen.width, _codificar(imagen, 'ICO')
+        return
+
+    if imagen.mode not in ('RGB', 'RGBA'):
+        imagen = imagen.convert('RGBA' if imagen.mode in ('LA', 'PA') or 'transparency' in imagen.info else 'RGB')
+    for ancho in sorted({a for a in anchos if a < imagen.width} | {imagen.width}):
+        escalada = imagen if ancho == imagen.width else imagen.resize(
+            (ancho, round(imagen.height * ancho / imagen.width)), Image.LANCZOS)
+        for formato in formatos:
+            yield formato, ancho, _codificar(escalada, formato)
+        # El formato original solo hace falta en los anchos reducidos
+        if ancho < imagen.width:
+            yield formato_original, ancho, _codificar(escalada, formato_original)
+
+
+def optimizar(directorio, anchos=ANCHOS):
+    formatos = ['WEBP']
+    if features.check('avif'):
+        formatos.insert(0, 'AVIF')
+    else:
+        print("Pillow sin soporte AVIF: solo se generan variantes WebP")
+
+    destino = os.path.join(directorio, DIR_IMAGENES)
+    os.makedirs(destino, exist_ok=True)
+    manifiesto, generados = {}, set()
+
+    for nombre in sorted(os.listdir(directorio)):
+        ruta = os.path.join(directorio, nombre)
+        base, extension = os.path.splitext(nombre)
+        formato_original = EXTENSIONES.get(extension.lower())
+        if not formato_original or not os.path.isfile(ruta) or os.path.getsize(ruta) < TAMAÑO_MIN:
+            continue
+
+        tamaño_original = os.path.getsize(ruta)
+        with Image.open(ruta) as imagen:
+            ancho_original, alto_original = imagen.size
+        entradas = []
+        for formato, ancho, datos in variantes_imagen(ruta, formato_original, anchos, formatos):
+            # Una variante a ancho completo que no achica no sirve de nada
+            if ancho == ancho_original and len(datos) >= tamaño_original:
+                continue
+            archivo = f"{base}.{ancho}.{hashlib.sha1(datos).hexdigest()[:8]}.{formato.lower()}"
+            with open(os.path.join(destino, archivo), 'wb') as f:
+                f.write(datos)
+            generados.add(archivo)
+            entradas.append({'archivo': f'{DIR_IMAGENES}/{archivo}', 'tipo': TIPOS[formato],
+                             'ancho': ancho, 'bytes': len(datos)})
+
+        manifiesto[nombre] = {
+            'hash': hash_archivo(ruta),  # si el original cambia, el manifiesto deja de aplicarse
+            'tipo': TIPOS[formato_original],
+            'ancho': ancho_original,
+            'alto': alto_original,
+            'bytes': tamaño_original,
+            'variantes': entradas,
+        }
+        mejor = min((e['bytes'] for e in entradas if e['ancho'] == ancho_original), default=tamaño_original)
+        print(f"{nombre}: {tamaño_original / 1024:.0f} KB -> {mejor / 1024:.0f} KB a {ancho_original}px, "
+              f"{len(entradas)} variantes")
+
+    # Variantes de versiones anteriores de las imágenes
+    for nombre in os.listdir(destino):
+        if nombre not in generados and nombre != os.path.basename(MANIFIESTO_IMAGENES):
+            os.remove(os.path.join(destino, nombre))
+
+    with open(os.path.join(directorio, MANIFIESTO_IMAGENES), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2)
+    return manifiesto
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--directorio', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    parser.add_argument('--anchos', type=int, nargs='+', default=list(ANCHOS), help='Anchos en píxeles')
+    args = parser.parse_args()
+    optimizar(args.directorio, args.anchos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# metricas_db.py
+"""Métricas de base de datos por petición y log de consultas lentas.
+
+Cada cursor que entrega el pool (database.CursorMedido) informa aquí sus
+sentencias. Durante una petición se acumulan cantidad de consultas, tiempo
+total, filas y la sentencia más lenta; al responder se agregan como
+cabecera Server-Timing (visible en la pestaña Network del navegador).
+
+El log 'consultas_db' escribe una línea JSON por sentencia que supera
+DB_CONSULTA_LENTA_MS, por error de SQL y por petición que ejecuta
+DB_CONSULTAS_AVISO consultas o más (típico de un N+1). El texto SQL se
+registra sin parámetros.
+"""
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+
+from config import Config
+
+logger = logging.getLogger('consultas_db')
+
+_actual = ContextVar('metricas_db', default=None)
+_ESPACIOS = re.compile(r'\s+')
+
+
+class MetricasPeticion:
+    __slots__ = ('endpoint', 'inicio', 'consultas', 'tiempo', 'filas', 'errores', 'mas_lenta', 'mas_lenta_tiempo')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.filas = 0
+        self.errores = 0
+        self.mas_lenta = None
+        self.mas_lenta_tiempo = 0.0
+
+    def server_timing(self):
+        total = (time.perf_counter() - self.inicio) * 1000
+        return (f'db;dur={self.tiempo * 1000:.1f};desc="{self.consultas} consultas, {self.filas} filas", '
+                f'db-max;dur={self.mas_lenta_tiempo * 1000:.1f}, app;dur={total:.1f}')
+
+
+def _sql_para_log(sql):
+    return _ESPACIOS.sub(' ', sql).strip()[:1000]
+
+
+def _log(evento, **datos):
+    metricas = _actual.get()
+    datos['endpoint'] = metricas.endpoint if metricas else None  # None: tarea en segundo plano
+    logger.warning(json.dumps({'evento': evento, **datos}, ensure_ascii=False, default=str))
+
+
+def registrar_sentencia(sql, duracion, filas):
+    """Llamado por el cursor después de cada execute/executemany."""
+    metricas = _actual.get()
+    if metricas is not None:
+        metricas.consultas += 1
+        metricas.tiempo += duracion
+        if filas > 0:
+            metricas.filas += filas
+        if duracion > metricas.mas_lenta_tiempo:
+            metricas.mas_lenta, metricas.mas_lenta_tiempo = sql, duracion
+    if Config.DB_CONSULTA_LENTA_MS and duracion * 1000 >= Config.DB_CONSULTA_LENTA_MS:
+        _log('consulta_lenta', ms=round(duracion * 1000, 1), filas=filas if filas >= 0 else None, sql=_sql_para_log(sql))
+
+
+def registrar_lectura(filas, duracion):
+    """Filas leídas con fetch*: el tiempo de transferencia también es tiempo de base de datos."""
+    metricas = _actual.get()
+    if metricas is not None:
+        metricas.filas += filas
+        metricas.tiempo += duracion
+
+
+def registrar_error(sql, error, duracion):
+    metricas = _actual.get()
+    if metricas is not None:
+        metricas.consultas += 1
+        metricas.errores += 1
+        metricas.tiempo += duracion
+    _log('error_sql', ms=round(duracion * 1000, 1), error=str(error), sql=_sql_para_log(sql))
+
+
+def init_app(app):
+    @app.before_request
+    def _iniciar_metricas():
+        g.metricas_db_token = _actual.set(MetricasPeticion(request.endpoint))
+
+    @app.after_request
+    def _informar_metricas(response):
+        metricas = _actual.get()
+        if metricas is None:
+            return response
+        if Config.DB_SERVER_TIMING:
+            response.headers.add('Server-Timing', metricas.server_timing())
+        if Config.DB_CONSULTAS_AVISO and metricas.consultas >= Config.DB_CONSULTAS_AVISO:
+            _log('muchas_consultas', consultas=metricas.consultas, ms=round(metricas.tiempo * 1000, 1),
+                 filas=metricas.filas, metodo=request.method, ruta=request.path,
+                 mas_lenta_ms=round(metricas.mas_lenta_tiempo * 1000, 1),
+                 mas_lenta=_sql_para_log(metricas.mas_lenta or ''))
+        return response
+
+    @app.teardown_request
+    def _cerrar_metricas(exc):
+        token = g.pop('metricas_db_token', None)
+        if token is not None:
+            _actual.reset(token)
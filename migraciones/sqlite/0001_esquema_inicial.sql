@@ -0,0 +1,69 @@
+-- Mismo esquema que sqlserver/0001 para la base SQLite local. Los tipos DATE,
+-- TIME, DATETIME y DECIMAL se declaran igual para que las columnas vuelvan
+-- como date/time/datetime/Decimal; NOCASE imita la intercalación de SQL Server.
+
+CREATE TABLE IF NOT EXISTS clientes (
+    id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL COLLATE NOCASE,
+    apellido TEXT NOT NULL COLLATE NOCASE,
+    email TEXT NOT NULL COLLATE NOCASE,
+    telefono TEXT,
+    direccion TEXT,
+    fecha_registro DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_cliente INTEGER REFERENCES clientes (id_cliente),
+    nombre_usuario TEXT NOT NULL COLLATE NOCASE,
+    password TEXT NOT NULL,
+    email TEXT NOT NULL COLLATE NOCASE,
+    rol TEXT NOT NULL DEFAULT 'Cliente'
+);
+
+CREATE TABLE IF NOT EXISTS profesionales (
+    id_profesional INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL COLLATE NOCASE,
+    apellido TEXT NOT NULL COLLATE NOCASE,
+    especialidad TEXT,
+    email TEXT NOT NULL COLLATE NOCASE,
+    telefono TEXT
+);
+
+CREATE TABLE IF NOT EXISTS servicios (
+    id_servicio INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    duracion INTEGER NOT NULL DEFAULT 60,  -- minutos
+    precio DECIMAL(10, 2) NOT NULL CHECK (precio >= 0)
+);
+
+CREATE TABLE IF NOT EXISTS turnos (
+    id_turno INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha DATE NOT NULL,
+    hora TIME NOT NULL,
+    id_cliente INTEGER NOT NULL REFERENCES clientes (id_cliente),
+    id_profesional INTEGER REFERENCES profesionales (id_profesional) ON DELETE SET NULL,
+    estado TEXT NOT NULL DEFAULT 'Pendiente' CHECK (estado IN ('Pendiente', 'Realizado', 'Cancelado'))
+);
+
+CREATE TABLE IF NOT EXISTS turno_servicio (
+    id_turno INTEGER NOT NULL REFERENCES turnos (id_turno),
+    id_servicio INTEGER NOT NULL REFERENCES servicios (id_servicio),
+    PRIMARY KEY (id_turno, id_servicio)
+);
+
+CREATE TABLE IF NOT EXISTS pagos (
+    id_pago INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_turno INTEGER NOT NULL REFERENCES turnos (id_turno),
+    monto DECIMAL(10, 2) NOT NULL,
+    metodo_pago TEXT NOT NULL DEFAULT 'Pendiente',
+    fecha_pago DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS facturas (
+    id_factura INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_cliente INTEGER NOT NULL REFERENCES clientes (id_cliente),
+    id_pago INTEGER NOT NULL UNIQUE REFERENCES pagos (id_pago),
+    total DECIMAL(10, 2) NOT NULL,
+    fecha_emision DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
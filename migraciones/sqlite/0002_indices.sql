@@ -0,0 +1,32 @@
+-- Mismos índices que sqlserver/0002. SQLite no tiene INCLUDE: las columnas
+-- incluidas van al final de la clave para que el índice siga siendo de cobertura.
+
+CREATE INDEX IF NOT EXISTS IX_turnos_fecha_hora ON turnos (fecha, hora, estado, id_profesional, id_cliente);
+
+CREATE UNIQUE INDEX IF NOT EXISTS UX_turnos_profesional_horario_pendiente ON turnos (id_profesional, fecha, hora)
+    WHERE estado = 'Pendiente' AND id_profesional IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS IX_turnos_profesional_fecha ON turnos (id_profesional, fecha, hora, id_cliente);
+
+CREATE INDEX IF NOT EXISTS IX_turnos_cliente_fecha ON turnos (id_cliente, fecha DESC, hora DESC, estado);
+
+CREATE INDEX IF NOT EXISTS IX_pagos_turno ON pagos (id_turno, metodo_pago, monto);
+
+CREATE INDEX IF NOT EXISTS IX_pagos_fecha_cobrados ON pagos (fecha_pago, id_turno, metodo_pago, monto)
+    WHERE metodo_pago <> 'Pendiente';
+
+CREATE UNIQUE INDEX IF NOT EXISTS UX_usuarios_email ON usuarios (email);
+
+CREATE UNIQUE INDEX IF NOT EXISTS UX_usuarios_nombre_usuario ON usuarios (nombre_usuario);
+
+CREATE INDEX IF NOT EXISTS IX_usuarios_cliente ON usuarios (id_cliente, rol);
+
+CREATE INDEX IF NOT EXISTS IX_profesionales_email ON profesionales (email);
+
+CREATE INDEX IF NOT EXISTS IX_clientes_email ON clientes (email);
+
+CREATE INDEX IF NOT EXISTS IX_clientes_apellido ON clientes (apellido);
+
+CREATE INDEX IF NOT EXISTS IX_facturas_cliente_fecha ON facturas (id_cliente, fecha_emision DESC);
+
+CREATE INDEX IF NOT EXISTS IX_facturas_fecha_emision ON facturas (fecha_emision);
@@ -0,0 +1,11 @@
+-- Resumen diario de ingresos (resumen_ingresos.py).
+
+CREATE TABLE IF NOT EXISTS ingresos_diarios (
+    fecha DATE NOT NULL,
+    metodo_pago TEXT NOT NULL,
+    id_servicio INTEGER NOT NULL,
+    id_profesional INTEGER NOT NULL,
+    cantidad INTEGER NOT NULL,
+    total DECIMAL(12, 2) NOT NULL,
+    PRIMARY KEY (fecha, metodo_pago, id_servicio, id_profesional)
+);
@@ -0,0 +1,9 @@
+-- Turno de las tareas periódicas que corre la app (vencimientos.py).
+
+CREATE TABLE IF NOT EXISTS tareas_programadas (
+    nombre TEXT PRIMARY KEY,
+    propietario TEXT,
+    vence DATETIME NOT NULL
+);
+
+INSERT OR IGNORE INTO tareas_programadas (nombre, propietario, vence) VALUES ('barrido_turnos', NULL, '2000-01-01 00:00:00');
@@ -0,0 +1,89 @@
+-- Tablas de la aplicación. Cada CREATE se salta si la tabla ya existe,
+-- así esta migración también se puede registrar sobre una base creada a mano.
+
+IF OBJECT_ID('dbo.clientes', 'U') IS NULL
+CREATE TABLE dbo.clientes (
+    id_cliente INT IDENTITY(1, 1) NOT NULL CONSTRAINT PK_clientes PRIMARY KEY,
+    nombre NVARCHAR(100) NOT NULL,
+    apellido NVARCHAR(100) NOT NULL,
+    email NVARCHAR(255) NOT NULL,
+    telefono NVARCHAR(50) NULL,
+    direccion NVARCHAR(255) NULL,
+    fecha_registro DATETIME NOT NULL CONSTRAINT DF_clientes_fecha_registro DEFAULT GETDATE()
+)
+GO
+
+IF OBJECT_ID('dbo.usuarios', 'U') IS NULL
+CREATE TABLE dbo.usuarios (
+    id_usuario INT IDENTITY(1, 1) NOT NULL CONSTRAINT PK_usuarios PRIMARY KEY,
+    id_cliente INT NULL CONSTRAINT FK_usuarios_clientes REFERENCES dbo.clientes (id_cliente),
+    nombre_usuario NVARCHAR(100) NOT NULL,
+    password NVARCHAR(255) NOT NULL,
+    email NVARCHAR(255) NOT NULL,
+    rol NVARCHAR(50) NOT NULL CONSTRAINT DF_usuarios_rol DEFAULT 'Cliente'
+)
+GO
+
+IF OBJECT_ID('dbo.profesionales', 'U') IS NULL
+CREATE TABLE dbo.profesionales (
+    id_profesional INT IDENTITY(1, 1) NOT NULL CONSTRAINT PK_profesionales PRIMARY KEY,
+    nombre NVARCHAR(100) NOT NULL,
+    apellido NVARCHAR(100) NOT NULL,
+    especialidad NVARCHAR(100) NULL,
+    email NVARCHAR(255) NOT NULL,
+    telefono NVARCHAR(50) NULL
+)
+GO
+
+IF OBJECT_ID('dbo.servicios', 'U') IS NULL
+CREATE TABLE dbo.servicios (
+    id_servicio INT IDENTITY(1, 1) NOT NULL CONSTRAINT PK_servicios PRIMARY KEY,
+    nombre NVARCHAR(100) NOT NULL,
+    duracion INT NOT NULL CONSTRAINT DF_servicios_duracion DEFAULT 60,  -- minutos
+    precio DECIMAL(10, 2) NOT NULL CONSTRAINT CK_servicios_precio CHECK (precio >= 0)
+)
+GO
+
+IF OBJECT_ID('dbo.turnos', 'U') IS NULL
+CREATE TABLE dbo.turnos (
+    id_turno INT IDENTITY(1, 1) NOT NULL CONSTRAINT PK_turnos PRIMARY KEY,
+    fecha DATE NOT NULL,
+    hora TIME(0) NOT NULL,
+    id_cliente INT NOT NULL CONSTRAINT FK_turnos_clientes REFERENCES dbo.clientes (id_cliente),
+    -- Al eliminar un profesional sus turnos quedan sin asignar (id_profesional 0 en ingresos_diarios)
+    id_profesional INT NULL CONSTRAINT FK_turnos_profesionales REFERENCES dbo.profesionales (id_profesional)
+        ON DELETE SET NULL,
+    estado NVARCHAR(20) NOT NULL CONSTRAINT DF_turnos_estado DEFAULT 'Pendiente'
+        CONSTRAINT CK_turnos_estado CHECK (estado IN ('Pendiente', 'Realizado', 'Cancelado'))
+)
+GO
+
+IF OBJECT_ID('dbo.turno_servicio', 'U') IS NULL
+CREATE TABLE dbo.turno_servicio (
+    id_turno INT NOT NULL CONSTRAINT FK_turno_servicio_turnos REFERENCES dbo.turnos (id_turno),
+    id_servicio INT NOT NULL CONSTRAINT FK_turno_servicio_servicios REFERENCES dbo.servicios (id_servicio),
+    CONSTRAINT PK_turno_servicio PRIMARY KEY (id_turno, id_servicio)
+)
+GO
+
+IF OBJECT_ID('dbo.pagos', 'U') IS NULL
+CREATE TABLE dbo.pagos (
+    id_pago INT IDENTITY(1, 1) NOT NULL CONSTRAINT PK_pagos PRIMARY KEY,
+    id_turno INT NOT NULL CONSTRAINT FK_pagos_turnos REFERENCES dbo.turnos (id_turno),
+    monto DECIMAL(10, 2) NOT NULL,
+    metodo_pago NVARCHAR(50) NOT NULL CONSTRAINT DF_pagos_metodo_pago DEFAULT 'Pendiente',
+    fecha_pago DATETIME NOT NULL CONSTRAINT DF_pagos_fecha_pago DEFAULT GETDATE()
+)
+GO
+
+IF OBJECT_ID('dbo.facturas', 'U') IS NULL
+CREATE TABLE dbo.facturas (
+    id_factura INT IDENTITY(1, 1) NOT NULL CONSTRAINT PK_facturas PRIMARY KEY,
+    id_cliente INT NOT NULL CONSTRAINT FK_facturas_clientes REFERENCES dbo.clientes (id_cliente),
+    -- Un pago se factura una sola vez
+    id_pago INT NOT NULL CONSTRAINT FK_facturas_pagos REFERENCES dbo.pagos (id_pago)
+        CONSTRAINT UQ_facturas_pago UNIQUE,
+    total DECIMAL(10, 2) NOT NULL,
+    fecha_emision DATETIME NOT NULL CONSTRAINT DF_facturas_fecha_emision DEFAULT GETDATE()
+)
+GO
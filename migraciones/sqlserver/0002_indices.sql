@@ -0,0 +1,71 @@
+-- Índices para las consultas de reservas, cliente, informes, paneles y el barrido de vencimientos.
+-- Cada uno se crea solo si no existe.
+
+-- disponibilidad._cargar_dias, informes de servicios por profesional, admin.clientes_por_dia,
+-- vencimientos: rangos de fecha (y hora) con el estado y el profesional en el índice
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_turnos_fecha_hora' AND object_id = OBJECT_ID('dbo.turnos'))
+CREATE INDEX IX_turnos_fecha_hora ON dbo.turnos (fecha, hora) INCLUDE (estado, id_profesional, id_cliente)
+GO
+
+-- Un profesional no puede tener dos turnos pendientes en el mismo horario
+-- (disponibilidad.asignar_profesional lo verifica; este índice lo garantiza entre workers)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_turnos_profesional_horario_pendiente' AND object_id = OBJECT_ID('dbo.turnos'))
+CREATE UNIQUE INDEX UX_turnos_profesional_horario_pendiente ON dbo.turnos (id_profesional, fecha, hora)
+    WHERE estado = 'Pendiente' AND id_profesional IS NOT NULL
+GO
+
+-- Agenda del profesional (panelprofesional, panelEmpleado.clientes_por_profesional, admin)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_turnos_profesional_fecha' AND object_id = OBJECT_ID('dbo.turnos'))
+CREATE INDEX IX_turnos_profesional_fecha ON dbo.turnos (id_profesional, fecha, hora) INCLUDE (id_cliente)
+GO
+
+-- Reservas e historial del cliente, más recientes primero
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_turnos_cliente_fecha' AND object_id = OBJECT_ID('dbo.turnos'))
+CREATE INDEX IX_turnos_cliente_fecha ON dbo.turnos (id_cliente, fecha DESC, hora DESC) INCLUDE (estado)
+GO
+
+-- Todos los JOIN de pagos con turnos; metodo_pago y monto evitan el lookup
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_pagos_turno' AND object_id = OBJECT_ID('dbo.pagos'))
+CREATE INDEX IX_pagos_turno ON dbo.pagos (id_turno) INCLUDE (metodo_pago, monto)
+GO
+
+-- Informe de ingresos, pagos del día y reconstrucción de ingresos_diarios: solo pagos cobrados
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_pagos_fecha_cobrados' AND object_id = OBJECT_ID('dbo.pagos'))
+CREATE INDEX IX_pagos_fecha_cobrados ON dbo.pagos (fecha_pago) INCLUDE (id_turno, metodo_pago, monto)
+    WHERE metodo_pago <> 'Pendiente'
+GO
+
+-- Login, registro y alta de profesionales buscan por email
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_usuarios_email' AND object_id = OBJECT_ID('dbo.usuarios'))
+CREATE UNIQUE INDEX UX_usuarios_email ON dbo.usuarios (email)
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_usuarios_nombre_usuario' AND object_id = OBJECT_ID('dbo.usuarios'))
+CREATE UNIQUE INDEX UX_usuarios_nombre_usuario ON dbo.usuarios (nombre_usuario)
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_usuarios_cliente' AND object_id = OBJECT_ID('dbo.usuarios'))
+CREATE INDEX IX_usuarios_cliente ON dbo.usuarios (id_cliente) INCLUDE (rol)
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_profesionales_email' AND object_id = OBJECT_ID('dbo.profesionales'))
+CREATE INDEX IX_profesionales_email ON dbo.profesionales (email)
+GO
+
+-- Búsqueda por prefijo del listado de clientes (paginacion.Listado)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_clientes_email' AND object_id = OBJECT_ID('dbo.clientes'))
+CREATE INDEX IX_clientes_email ON dbo.clientes (email)
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_clientes_apellido' AND object_id = OBJECT_ID('dbo.clientes'))
+CREATE INDEX IX_clientes_apellido ON dbo.clientes (apellido)
+GO
+
+-- Facturas del cliente, más recientes primero, y exportación por fecha de emisión
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_facturas_cliente_fecha' AND object_id = OBJECT_ID('dbo.facturas'))
+CREATE INDEX IX_facturas_cliente_fecha ON dbo.facturas (id_cliente, fecha_emision DESC)
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_facturas_fecha_emision' AND object_id = OBJECT_ID('dbo.facturas'))
+CREATE INDEX IX_facturas_fecha_emision ON dbo.facturas (fecha_emision)
+GO
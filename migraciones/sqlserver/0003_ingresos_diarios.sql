@@ -0,0 +1,14 @@
+-- Resumen diario de ingresos (resumen_ingresos.py). Después de crearla,
+-- llenarla con: python resumen_ingresos.py reconstruir
+
+IF OBJECT_ID('dbo.ingresos_diarios', 'U') IS NULL
+CREATE TABLE dbo.ingresos_diarios (
+    fecha DATE NOT NULL,
+    metodo_pago NVARCHAR(50) NOT NULL,
+    id_servicio INT NOT NULL,
+    id_profesional INT NOT NULL,
+    cantidad INT NOT NULL,
+    total DECIMAL(12, 2) NOT NULL,
+    CONSTRAINT PK_ingresos_diarios PRIMARY KEY (fecha, metodo_pago, id_servicio, id_profesional)
+)
+GO
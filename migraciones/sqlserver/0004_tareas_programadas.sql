@@ -0,0 +1,15 @@
+-- Turno de las tareas periódicas que corre la app (vencimientos.py). Cada
+-- worker intenta tomar el turno antes de correr la tarea: solo lo consigue
+-- quien ya lo tenía o si venció, así que una sola tarea corre a la vez.
+
+IF OBJECT_ID('dbo.tareas_programadas', 'U') IS NULL
+CREATE TABLE dbo.tareas_programadas (
+    nombre VARCHAR(50) NOT NULL CONSTRAINT PK_tareas_programadas PRIMARY KEY,
+    propietario NVARCHAR(255) NULL,
+    vence DATETIME NOT NULL
+)
+GO
+
+IF NOT EXISTS (SELECT 1 FROM dbo.tareas_programadas WHERE nombre = 'barrido_turnos')
+INSERT INTO dbo.tareas_programadas (nombre, propietario, vence) VALUES ('barrido_turnos', NULL, '2000-01-01')
+GO
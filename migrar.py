@@ -0,0 +1,218 @@
+# migrar.py
+"""Aplica las migraciones del esquema de la base de datos.
+
+Los archivos de migraciones/<motor>/ se aplican en orden de nombre, cada uno
+en su propia transacción, y quedan registrados en migraciones_aplicadas con
+el checksum de su contenido. Volver a correrlo solo aplica los pendientes.
+
+Uso:
+    python migrar.py [aplicar] [--sqlite RUTA]
+    python migrar.py estado [--sqlite RUTA]
+
+Sin --sqlite usa la base configurada en DB_MOTOR.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from database import db_connection
+from dialecto import Sqlite, dialecto
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migraciones')
+
+CREAR_REGISTRO = {
+    'sqlserver': """
+        IF OBJECT_ID('dbo.migraciones_aplicadas', 'U') IS NULL
+        CREATE TABLE dbo.migraciones_aplicadas (
+            version VARCHAR(20) NOT NULL CONSTRAINT PK_migraciones_aplicadas PRIMARY KEY,
+            nombre NVARCHAR(255) NOT NULL,
+            checksum CHAR(40) NOT NULL,
+            aplicada DATETIME NOT NULL CONSTRAINT DF_migraciones_aplicadas_aplicada DEFAULT GETDATE()
+        )
+    """,
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS migraciones_aplicadas (
+            version TEXT PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            aplicada DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    """,
+}
+
+# En SQL Server los lotes se separan con GO en una línea propia, como en sqlcmd
+_SEPARADOR_GO = re.compile(r'^\s*GO\s*$', re.IGNORECASE | re.MULTILINE)
+
+Migracion = namedtuple('Migracion', 'version nombre sql checksum')
+
+# Consultas que tienen que volver vacías antes de aplicar una migración. Los
+# índices únicos de 0002 no se pueden crear sobre una base con duplicados: se
+# listan para corregirlos a mano en lugar de abortar a mitad de la migración.
+VERIFICACIONES = {
+    '0002': [
+        ("emails repetidos en usuarios (UX_usuarios_email)",
+         "SELECT email, COUNT(*) FROM usuarios GROUP BY email HAVING COUNT(*) > 1"),
+        ("nombres de usuario repetidos (UX_usuarios_nombre_usuario)",
+         "SELECT nombre_usuario, COUNT(*) FROM usuarios GROUP BY nombre_usuario HAVING COUNT(*) > 1"),
+        ("turnos pendientes del mismo profesional en el mismo horario (UX_turnos_profesional_horario_pendiente)",
+         """SELECT id_profesional, fecha, hora, COUNT(*) FROM turnos
+            WHERE estado = 'Pendiente' AND id_profesional IS NOT NULL
+            GROUP BY id_profesional, fecha, hora HAVING COUNT(*) > 1"""),
+    ],
+}
+
+
+class MigracionBloqueada(Exception):
+    """La base tiene datos que impiden aplicar la migración."""
+
+
+def migraciones(motor):
+    """Migraciones del motor en orden; la versión es el prefijo numérico del archivo."""
+    directorio = os.path.join(DIRECTORIO, motor)
+    lista = []
+    for nombre in sorted(os.listdir(directorio)):
+        if not nombre.endswith('.sql'):
+            continue
+        with open(os.path.join(directorio, nombre), 'rb') as f:
+            contenido = f.read()
+        lista.append(Migracion(nombre.split('_', 1)[0], nombre, contenido.decode('utf-8'),
+                               hashlib.sha1(contenido).hexdigest()))
+    return lista
+
+
+def _sin_comentarios(sql):
+    return '\n'.join(linea for linea in sql.splitlines() if not linea.strip().startswith('--')).strip()
+
+
+def sentencias(motor, sql):
+    """Divide una migración en las sentencias o lotes que se ejecutan por separado."""
+    if motor == 'sqlserver':
+        partes = _SEPARADOR_GO.split(sql)
+    else:
+        partes, actual = [], ''
+        for linea in sql.splitlines(keepends=True):
+            actual += linea
+            if sqlite3.complete_statement(actual):
+                partes.append(actual)
+                actual = ''
+        partes.append(actual)
+    return [parte.strip() for parte in partes if _sin_comentarios(parte)]
+
+
+@contextmanager
+def conexion(ruta_sqlite=None):
+    """Conexión y nombre del motor: la base SQLite indicada o la configurada (DB_MOTOR)."""
+    if ruta_sqlite:
+        conn = Sqlite(ruta_sqlite).conectar()
+        try:
+            yield conn, 'sqlite'
+        finally:
+            conn.close()
+    else:
+        with db_connection() as conn:
+            yield conn, dialecto.nombre
+
+
+def _aplicadas(conn, motor):
+    cursor = conn.cursor()
+    cursor.execute(CREAR_REGISTRO[motor])
+    conn.commit()
+    cursor.execute("SELECT version, checksum, aplicada FROM migraciones_aplicadas")
+    return {version: (checksum, aplicada) for version, checksum, aplicada in cursor.fetchall()}
+
+
+def _avisar_modificadas(pendientes, aplicadas):
+    for migracion in pendientes:
+        registrada = aplicadas.get(migracion.version)
+        if registrada and registrada[0].strip() != migracion.checksum:
+            print(f"Aviso: {migracion.nombre} cambió después de aplicarse; "
+                  f"escribir una migración nueva en lugar de editarla.")
+
+
+def verificar(cursor, migracion):
+    """Corre las verificaciones de la migración; lanza MigracionBloqueada si alguna encuentra filas."""
+    problemas = []
+    for descripcion, consulta in VERIFICACIONES.get(migracion.version, []):
+        cursor.execute(consulta)
+        filas = cursor.fetchall()
+        if filas:
+            problemas.append(f"{descripcion}: {len(filas)}")
+            for fila in filas[:20]:
+                problemas.append('    ' + ', '.join(str(valor) for valor in fila))
+    if problemas:
+        raise MigracionBloqueada("corregir estos duplicados y volver a correr migrar.py\n  " + '\n  '.join(problemas))
+
+
+def aplicar(ruta_sqlite=None):
+    """Aplica las migraciones pendientes y devuelve cuántas se aplicaron."""
+    with conexion(ruta_sqlite) as (conn, motor):
+        todas = migraciones(motor)
+        aplicadas = _aplicadas(conn, motor)
+        _avisar_modificadas(todas, aplicadas)
+        pendientes = [m for m in todas if m.version not in aplicadas]
+
+        cursor = conn.cursor()
+        for migracion in pendientes:
+            inicio = time.perf_counter()
+            if motor == 'sqlite':
+                # sqlite3 no abre la transacción antes de un CREATE; abrirla para toda la migración
+                cursor.execute("BEGIN")
+            try:
+                verificar(cursor, migracion)
+                for sentencia in sentencias(motor, migracion.sql):
+                    cursor.execute(sentencia)
+                cursor.execute(
+                    "INSERT INTO migraciones_aplicadas (version, nombre, checksum) VALUES (?, ?, ?)",
+                    (migracion.version, migracion.nombre, migracion.checksum),
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Error al aplicar {migracion.nombre}: {e}")
+                raise
+            print(f"Aplicada {migracion.nombre} en {time.perf_counter() - inicio:.1f}s.")
+
+    if not pendientes:
+        print("La base de datos está al día.")
+    return len(pendientes)
+
+
+def estado(ruta_sqlite=None):
+    """Muestra cada migración como aplicada, pendiente o modificada."""
+    with conexion(ruta_sqlite) as (conn, motor):
+        todas = migraciones(motor)
+        aplicadas = _aplicadas(conn, motor)
+
+    for migracion in todas:
+        registrada = aplicadas.get(migracion.version)
+        if registrada is None:
+            print(f"  pendiente   {migracion.nombre}")
+        elif registrada[0].strip() != migracion.checksum:
+            print(f"  modificada  {migracion.nombre} (aplicada {registrada[1]})")
+        else:
+            print(f"  aplicada    {migracion.nombre} ({registrada[1]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('comando', nargs='?', choices=('aplicar', 'estado'), default='aplicar')
+    parser.add_argument('--sqlite', metavar='RUTA', help='Base SQLite en lugar de la configurada')
+    args = parser.parse_args()
+
+    if args.comando == 'estado':
+        estado(args.sqlite)
+    else:
+        try:
+            aplicar(args.sqlite)
+        except MigracionBloqueada:
+            # aplicar ya mostró qué filas lo impiden
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# paginacion.py
+import base64
+import binascii
+import json
+from urllib.parse import urlencode
+
+from flask import request
+
+from config import Config
+from dialecto import dialecto
+
+
+def _escapar_like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('[', '\\[')
+
+
+class Listado:
+    """Listado con paginación por clave (keyset), búsqueda y selección de campos.
+
+    Parámetros de la query string:
+      limite      filas por página; sin él se devuelve el listado completo
+      despues_de  cursor de la última fila de la página anterior (X-Siguiente-Cursor)
+      q           búsqueda por prefijo en las columnas de ``busqueda``
+      campos      lista separada por comas de los campos a devolver
+      total=1     incluye el total de filas que cumplen la búsqueda
+
+    El cuerpo sigue siendo un array JSON; la paginación viaja en los headers
+    X-Siguiente-Cursor, X-Total-Count y Link.
+
+    Con y sin ``limite`` las filas salen en el mismo orden: por el campo
+    ``orden`` y, a igualdad, por la clave. Si ``orden`` es la propia clave el
+    cursor es el valor de la clave; si no, es un token opaco con ambos valores.
+    """
+
+    def __init__(self, origen, clave, campos, busqueda=(), filtro=None, orden=None):
+        self.origen = origen          # FROM ... (con sus JOIN)
+        self.clave = clave            # nombre del campo clave en ``campos``
+        self.campos = campos          # nombre expuesto -> expresión SQL
+        self.busqueda = busqueda      # expresiones SQL donde buscar ``q``
+        self.filtro = filtro          # condición fija del listado
+        self.orden = orden or clave   # nombre del campo por el que se ordena
+
+    def _campos_pedidos(self, args):
+        pedidos = args.get('campos')
+        if not pedidos:
+            return list(self.campos)
+        nombres = [nombre.strip() for nombre in pedidos.split(',') if nombre.strip()]
+        invalidos = [nombre for nombre in nombres if nombre not in self.campos]
+        if invalidos:
+            raise ValueError(f"Campos no válidos: {', '.join(invalidos)}")
+        # El cursor de la página siguiente se arma con la clave y el campo de orden
+        for necesario in (self.orden, self.clave):
+            if necesario not in nombres:
+                nombres.insert(0, necesario)
+        return nombres
+
+    def _leer_cursor(self, texto):
+        if texto is None:
+            return None
+        try:
+            if self.orden == self.clave:
+                return int(texto)
+            valor, clave = json.loads(base64.urlsafe_b64decode(texto.encode('ascii')))
+            return valor, int(clave)
+        except (ValueError, TypeError, UnicodeEncodeError, binascii.Error):
+            raise ValueError('despues_de no es válido; use el valor de X-Siguiente-Cursor.')
+
+    def _armar_cursor(self, fila):
+        if self.orden == self.clave:
+            return str(fila[self.clave])
+        token = json.dumps([fila[self.orden], fila[self.clave]], default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+
+    def consultar(self, cursor, args):
+        """Devuelve (filas, headers). Lanza ValueError si los parámetros no son válidos."""
+        limite = args.get('limite')
+        if limite is not None:
+            try:
+                limite = int(limite)
+            except ValueError:
+                limite = 0
+            if not 1 <= limite <= Config.LISTADO_LIMITE_MAX:
+                raise ValueError(f'limite debe estar entre 1 y {Config.LISTADO_LIMITE_MAX}.')
+        despues_de = self._leer_cursor(args.get('despues_de'))
+        nombres = self._campos_pedidos(args)
+        expresion_clave = self.campos[self.clave]
+        expresion_orden = self.campos[self.orden]
+        if self.orden == self.clave:
+            orden_sql = f"{expresion_clave} ASC"
+        else:
+            orden_sql = f"{expresion_orden} ASC, {expresion_clave} ASC"
+
+        condiciones, params = [], []
+        if self.filtro:
+            condiciones.append(self.filtro)
+        q = (args.get('q') or '').strip()
+        if q and self.busqueda:
+            # Búsqueda por prefijo para que pueda usar índices
+            condiciones.append('(' + ' OR '.join(f"{col} LIKE ? ESCAPE '\\'" for col in self.busqueda) + ')')
+            params.extend([_escapar_like(q) + '%'] * len(self.busqueda))
+
+        headers = {}
+        if args.get('total') in ('1', 'true'):
+            where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ''
+            cursor.execute(f"SELECT COUNT(*) FROM {self.origen}{where}", params)
+            headers['X-Total-Count'] = str(cursor.fetchone()[0])
+
+        if despues_de is not None and self.orden == self.clave:
+            condiciones.append(f"{expresion_clave} > ?")
+            params.append(despues_de)
+        elif despues_de is not None:
+            condiciones.append(
+                f"({expresion_orden} > ? OR ({expresion_orden} = ? AND {expresion_clave} > ?))"
+            )
+            params.extend([despues_de[0], despues_de[0], despues_de[1]])
+
+        seleccion = ', '.join(f"{self.campos[nombre]} AS {nombre}" for nombre in nombres)
+        where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ''
+        if limite is None:
+            cursor.execute(f"SELECT {seleccion} FROM {self.origen}{where} ORDER BY {orden_sql}", params)
+        else:
+            cursor.execute(
+                f"SELECT {dialecto.top(limite)} {seleccion} FROM {self.origen}{where} "
+                f"ORDER BY {orden_sql} {dialecto.limit(limite)}",
+                params,
+            )
+
+        columnas = [columna[0] for columna in cursor.description]
+        filas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+        if limite is not None and len(filas) == limite:
+            siguiente = self._armar_cursor(filas[-1])
+            headers['X-Siguiente-Cursor'] = siguiente
+            query = {k: v for k, v in args.items() if k != 'despues_de'}
+            query['despues_de'] = siguiente
+            headers['Link'] = f'<{request.path}?{urlencode(query)}>; rel="next"'
+        return filas, headers
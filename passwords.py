@@ -0,0 +1,161 @@
+# passwords.py
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+from config import Config
+
+_COST_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class HashQueueFullError(Exception):
+    """La cola de hashing está llena; conviene responder 503 y reintentar."""
+
+
+def hash_with_rounds(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def hash_cost(hashed):
+    """Factor de costo de un hash bcrypt, o None si el valor no es un hash bcrypt."""
+    match = _COST_RE.match(hashed or '')
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasher:
+    """Acota cuántas operaciones bcrypt corren a la vez en el proceso.
+
+    Como máximo ``workers`` hashes corren en paralelo y ``max_queue`` esperan
+    turno; pasado ``queue_timeout`` sin lugar en la cola se lanza
+    HashQueueFullError, que las rutas responden con 503.
+
+    ``hash`` y ``verify`` esperan el resultado, así que con executor='thread'
+    corren en el mismo hilo del request (bcrypt libera el GIL) en lugar de
+    pasar por un executor y bloquearse esperándolo. ``hash_async`` sí usa el
+    executor, y con executor='process' también lo usan las llamadas síncronas.
+    """
+
+    def __init__(self, rounds=12, workers=2, max_queue=16, queue_timeout=5, executor='thread'):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.executor_type = executor
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + max_queue)  # corriendo + en espera
+        self._corriendo = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+        self._stats = {
+            'pendientes': 0,
+            'pico_pendientes': 0,
+            'completados': 0,
+            'rechazados': 0,
+            'segundos_totales': 0.0,
+        }
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_type == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                            thread_name_prefix='bcrypt')
+        return self._executor
+
+    def _admitir(self):
+        """Toma un lugar en la cola y devuelve la función que lo libera al terminar."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._stats['rechazados'] += 1
+            raise HashQueueFullError('Demasiadas operaciones de contraseña en curso.')
+
+        with self._lock:
+            self._stats['pendientes'] += 1
+            if self._stats['pendientes'] > self._stats['pico_pendientes']:
+                self._stats['pico_pendientes'] = self._stats['pendientes']
+        inicio = time.perf_counter()
+
+        def _done(_future=None):
+            self._slots.release()
+            with self._lock:
+                self._stats['pendientes'] -= 1
+                self._stats['completados'] += 1
+                self._stats['segundos_totales'] += time.perf_counter() - inicio
+        return _done
+
+    def _en_turno(self, fn, *args):
+        with self._corriendo:
+            return fn(*args)
+
+    def submit(self, fn, *args):
+        _done = self._admitir()
+        try:
+            if self.executor_type == 'process':
+                future = self._get_executor().submit(fn, *args)
+            else:
+                # Los hilos del executor comparten el límite con las llamadas en línea
+                future = self._get_executor().submit(self._en_turno, fn, *args)
+        except Exception:
+            _done()
+            raise
+        future.add_done_callback(_done)
+        return future
+
+    def run(self, fn, *args):
+        """Ejecuta ``fn`` respetando los mismos límites que ``submit`` y devuelve su resultado."""
+        if self.executor_type == 'process':
+            return self.submit(fn, *args).result()
+        _done = self._admitir()
+        try:
+            return self._en_turno(fn, *args)
+        finally:
+            _done()
+
+    def hash_async(self, password):
+        return self.submit(hash_with_rounds, password, self.rounds)
+
+    def hash(self, password):
+        return self.run(hash_with_rounds, password, self.rounds)
+
+    def verify(self, password, hashed):
+        return self.run(_checkpw, password, hashed)
+
+    def needs_rehash(self, hashed):
+        return hash_cost(hashed) != self.rounds
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        completados = stats['completados']
+        stats['ms_promedio'] = round(stats['segundos_totales'] * 1000 / completados, 2) if completados else 0.0
+        return stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=Config.BCRYPT_ROUNDS,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_queue=Config.PASSWORD_HASH_MAX_QUEUE,
+    queue_timeout=Config.PASSWORD_HASH_QUEUE_TIMEOUT,
+    executor=Config.PASSWORD_HASH_EXECUTOR,
+)
+
+
+def hash_password(password):
+    return password_hasher.hash(password)
+
+
+def verify_password(password, hashed):
+    return password_hasher.verify(password, hashed)
@@ -0,0 +1,163 @@
+# pdf_recursos.py
+"""Recursos compartidos por los PDFs: logo, estilos de párrafo y estilos de tabla.
+
+Se construyen una sola vez por proceso. Los estilos son de solo lectura;
+para variar uno se pide una copia con estilo(nombre, **cambios).
+"""
+import io
+import os
+import tempfile
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_RIGHT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Image, TableStyle
+
+from config import Config
+
+LOGO_PATH = os.path.join('static', 'logo.png')
+PIXELES_POR_PUNTO = 2  # resolución del logo ya escalado (144 dpi)
+
+_lock = threading.Lock()
+_logos = {}
+_estilos = None
+_estilos_tabla = None
+
+
+class _EstiloFijo(ParagraphStyle):
+    def __setattr__(self, nombre, valor):
+        if self.__dict__.get('_fijo'):
+            raise AttributeError(f"El estilo '{self.name}' es compartido; usar estilo('{self.name}', {nombre}=...)")
+        super().__setattr__(nombre, valor)
+
+    def __deepcopy__(self, memo):
+        # reportlab copia el estilo antes de aplicar atributos como <para align=...>
+        return _copiar(self)
+
+    __copy__ = __deepcopy__
+
+
+class _EstiloTablaFijo(TableStyle):
+    def add(self, *cmd):
+        raise AttributeError('El estilo de tabla es compartido; crear un TableStyle nuevo a partir de él.')
+
+
+def _fijar(nombre, base, **cambios):
+    estilo = _EstiloFijo(nombre)
+    estilo.__dict__.update({k: v for k, v in base.__dict__.items() if k not in ('name', 'parent')})
+    estilo.__dict__.update(cambios)
+    estilo.__dict__['_fijo'] = True
+    return estilo
+
+
+def _crear_estilos():
+    muestra = getSampleStyleSheet()
+    return {
+        'titulo': _fijar('titulo', muestra['Title']),
+        'normal': _fijar('normal', muestra['Normal']),
+        'titulo_informe': _fijar('titulo_informe', muestra['Title'], fontSize=16),
+        'total_informe': _fijar('total_informe', muestra['Heading3'], fontSize=12, alignment=TA_RIGHT),
+        'titulo_factura': _fijar('titulo_factura', muestra['Title'], fontSize=16),
+        'normal_factura': _fijar('normal_factura', muestra['Normal'], fontSize=12),
+    }
+
+
+def _crear_estilos_tabla():
+    return {
+        'informe': _EstiloTablaFijo([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ]),
+        'factura': _EstiloTablaFijo([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#4A90E2")),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        'resumen_factura': _EstiloTablaFijo([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+    }
+
+
+def estilo(nombre, **cambios):
+    """Estilo de párrafo compartido, o una copia con ``cambios`` aplicados."""
+    global _estilos
+    if _estilos is None:
+        with _lock:
+            if _estilos is None:
+                _estilos = _crear_estilos()
+    base = _estilos[nombre]
+    return _copiar(base, **cambios) if cambios else base
+
+
+def _copiar(base, **cambios):
+    copia = ParagraphStyle(base.name)
+    copia.__dict__.update({k: v for k, v in base.__dict__.items() if k not in ('name', 'parent', '_fijo')})
+    copia.__dict__.update(cambios)
+    return copia
+
+
+def estilo_tabla(nombre):
+    global _estilos_tabla
+    if _estilos_tabla is None:
+        with _lock:
+            if _estilos_tabla is None:
+                _estilos_tabla = _crear_estilos_tabla()
+    return _estilos_tabla[nombre]
+
+
+def _escalar_logo(ancho, alto):
+    if not os.path.exists(LOGO_PATH):
+        return b''
+    from PIL import Image as ImagenPIL
+    with ImagenPIL.open(LOGO_PATH) as imagen:
+        escalada = imagen.resize((round(ancho * PIXELES_POR_PUNTO), round(alto * PIXELES_POR_PUNTO)),
+                                 ImagenPIL.LANCZOS)
+        salida = io.BytesIO()
+        escalada.save(salida, format='PNG', optimize=True)
+    return salida.getvalue()
+
+
+def logo(ancho, alto):
+    """Flowable del logo a ``ancho`` x ``alto`` puntos, o None si no hay logo.
+
+    La imagen se decodifica y se escala una vez por tamaño; cada documento
+    recibe un flowable nuevo sobre esos bytes.
+    """
+    clave = (ancho, alto)
+    datos = _logos.get(clave)
+    if datos is None:
+        with _lock:
+            datos = _logos.get(clave)
+            if datos is None:
+                datos = _logos[clave] = _escalar_logo(ancho, alto)
+    if not datos:
+        return None
+    return Image(io.BytesIO(datos), width=ancho, height=alto)
+
+
+def pdf_en_memoria(generar, *args):
+    """Llama a ``generar(*args, archivo)`` sobre un buffer en memoria y lo devuelve rebobinado.
+
+    El buffer pasa a un archivo temporal solo si supera PDF_MEMORIA_MAX bytes.
+    """
+    archivo = tempfile.SpooledTemporaryFile(max_size=Config.PDF_MEMORIA_MAX)
+    try:
+        generar(*args, archivo)
+    except BaseException:
+        archivo.close()
+        raise
+    archivo.seek(0)
+    return archivo
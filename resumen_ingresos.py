@@ -0,0 +1,139 @@
+# resumen_ingresos.py
+"""Resumen diario de ingresos por fecha, método de pago, servicio y profesional.
+
+La tabla ingresos_diarios se actualiza en la misma transacción que registra
+cada pago; la crea la migración 0003 (python migrar.py) y este script la
+reconstruye a partir de pagos.
+
+Uso:
+    python resumen_ingresos.py reconstruir [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+"""
+import argparse
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from database import db_connection
+from dialecto import dialecto
+
+# Columnas por las que se puede agrupar el resumen
+AGRUPACIONES = {
+    'metodo_pago': ('i.metodo_pago',),
+    'servicio': ('s.nombre',),
+    'profesional': ('pr.nombre', 'pr.apellido'),
+}
+
+
+def registrar_pagos(cursor, ids_pago):
+    """Suma al resumen los pagos indicados. Llamar dentro de la transacción del pago."""
+    if not ids_pago:
+        return
+    marcadores = ', '.join('?' for _ in ids_pago)
+    cursor.execute(f"""
+        SELECT p.fecha_pago, p.metodo_pago, ts.id_servicio, t.id_profesional, p.monto
+        FROM pagos p
+        JOIN turnos t ON p.id_turno = t.id_turno
+        JOIN turno_servicio ts ON t.id_turno = ts.id_turno
+        WHERE p.id_pago IN ({marcadores}) AND p.metodo_pago != 'Pendiente'
+    """, list(ids_pago))
+
+    grupos = defaultdict(lambda: [0, Decimal(0)])
+    for fecha_pago, metodo_pago, id_servicio, id_profesional, monto in cursor.fetchall():
+        # Los turnos sin profesional asignado se resumen con id_profesional 0
+        grupo = grupos[(fecha_pago.date(), metodo_pago, id_servicio, id_profesional or 0)]
+        grupo[0] += 1
+        grupo[1] += Decimal(str(monto))
+
+    for clave, (cantidad, total) in grupos.items():
+        if _sumar(cursor, clave, cantidad, total):
+            continue
+        try:
+            cursor.execute("""
+                INSERT INTO ingresos_diarios (fecha, metodo_pago, id_servicio, id_profesional, cantidad, total)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (*clave, cantidad, total))
+        except Exception:
+            # Otra transacción insertó la misma fila primero: sumar sobre ella
+            if not _sumar(cursor, clave, cantidad, total):
+                raise
+
+
+def _sumar(cursor, clave, cantidad, total):
+    cursor.execute("""
+        UPDATE ingresos_diarios SET cantidad = cantidad + ?, total = total + ?
+        WHERE fecha = ? AND metodo_pago = ? AND id_servicio = ? AND id_profesional = ?
+    """, (cantidad, total, *clave))
+    return cursor.rowcount > 0
+
+
+def totales(cursor, desde, hasta, agrupar_por='metodo_pago'):
+    """Devuelve [(grupo, cantidad, total)] entre dos fechas inclusive."""
+    columnas = AGRUPACIONES[agrupar_por]
+    expresion = ', '.join(columnas)
+    cursor.execute(f"""
+        SELECT {expresion}, SUM(i.cantidad) AS cantidad, SUM(i.total) AS total
+        FROM ingresos_diarios i
+        JOIN servicios s ON i.id_servicio = s.id_servicio
+        LEFT JOIN profesionales pr ON i.id_profesional = pr.id_profesional
+        WHERE i.fecha BETWEEN ? AND ?
+        GROUP BY {expresion}
+        ORDER BY {expresion}
+    """, (desde, hasta))
+    n = len(columnas)
+    return [(' '.join(str(v) for v in fila[:n] if v is not None) or 'Sin asignar', fila[n], fila[n + 1])
+            for fila in cursor.fetchall()]
+
+
+def reconstruir(desde=None, hasta=None):
+    """Recalcula el resumen desde pagos, para todo el historial o un rango de fechas."""
+    inicio = time.perf_counter()
+    condiciones, params_borrar = [], []
+    filtro_pagos, params_pagos = '', []
+    if desde:
+        condiciones.append("fecha >= ?")
+        params_borrar.append(desde)
+        filtro_pagos += " AND p.fecha_pago >= ?"
+        params_pagos.append(desde)
+    if hasta:
+        condiciones.append("fecha <= ?")
+        params_borrar.append(hasta)
+        # fecha_pago incluye la hora: tomar todo el último día
+        filtro_pagos += " AND p.fecha_pago < ?"
+        params_pagos.append(hasta + timedelta(days=1))
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ''
+        cursor.execute(f"DELETE FROM ingresos_diarios{where}", params_borrar)
+        cursor.execute(f"""
+            INSERT INTO ingresos_diarios (fecha, metodo_pago, id_servicio, id_profesional, cantidad, total)
+            SELECT {dialecto.fecha('p.fecha_pago')}, p.metodo_pago, ts.id_servicio, COALESCE(t.id_profesional, 0),
+                   COUNT(*), SUM(p.monto)
+            FROM pagos p
+            JOIN turnos t ON p.id_turno = t.id_turno
+            JOIN turno_servicio ts ON t.id_turno = ts.id_turno
+            WHERE p.metodo_pago != 'Pendiente'{filtro_pagos}
+            GROUP BY {dialecto.fecha('p.fecha_pago')}, p.metodo_pago, ts.id_servicio, COALESCE(t.id_profesional, 0)
+        """, params_pagos)
+        filas = cursor.rowcount
+        conn.commit()
+
+    print(f"Resumen de ingresos reconstruido: {filas} filas en {time.perf_counter() - inicio:.1f}s.")
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    reconstruir_parser = subparsers.add_parser('reconstruir', help='Recalcular el resumen desde pagos')
+    fecha = lambda valor: datetime.strptime(valor, '%Y-%m-%d').date()
+    reconstruir_parser.add_argument('--desde', type=fecha)
+    reconstruir_parser.add_argument('--hasta', type=fecha)
+    args = parser.parse_args()
+
+    reconstruir(args.desde, args.hasta)
+
+
+if __name__ == "__main__":
+    main()
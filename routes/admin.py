@@ -3,42 +3,95 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from database import get_db_connection
+from dialecto import dialecto
+from user_cache import user_cache
+from catalogo import catalogo, profesionales_resumen
+from passwords import hash_password, HashQueueFullError
+from paginacion import Listado
+from routes.cliente import responder_exportacion
 from datetime import datetime
-import bcrypt  
 
 admin_bp = Blueprint('admin_bp', __name__, url_prefix='/api/admin')
 
 
-@admin_bp.route('/clientes', methods=['GET'])
-@login_required
-def listar_clientes():
+LISTADO_CLIENTES = Listado(
+    origen="clientes",
+    clave='id_cliente',
+    campos={
+        'id_cliente': 'id_cliente',
+        'nombre': 'nombre',
+        'apellido': 'apellido',
+        'email': 'email',
+        'telefono': 'telefono',
+        'direccion': 'direccion',
+        'fecha_registro': 'fecha_registro',
+    },
+    busqueda=('nombre', 'apellido', 'email'),
+)
+
+LISTADO_PROFESIONALES = Listado(
+    origen="profesionales",
+    clave='id_profesional',
+    campos={
+        'id_profesional': 'id_profesional',
+        'nombre': 'nombre',
+        'apellido': 'apellido',
+        'especialidad': 'especialidad',
+        'email': 'email',
+    },
+    busqueda=('nombre', 'apellido', 'email'),
+    orden='nombre',
+)
+
+LISTADO_EMPLEADOS = Listado(
+    origen="clientes c JOIN usuarios u ON c.id_cliente = u.id_cliente",
+    clave='id_cliente',
+    campos={
+        'id_cliente': 'c.id_cliente',
+        'nombre': 'c.nombre',
+        'apellido': 'c.apellido',
+        'email': 'c.email',
+    },
+    busqueda=('c.nombre', 'c.apellido', 'c.email'),
+    filtro="u.rol = 'Empleado'",
+    orden='nombre',
+)
+
+
+def _responder_listado(listado, campos_por_defecto=None):
+    args = request.args
+    if campos_por_defecto and 'campos' not in args:
+        args = args.copy()
+        args['campos'] = campos_por_defecto
     conn = get_db_connection()
     if conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id_cliente, nombre, apellido, email, telefono, direccion, fecha_registro
-            FROM clientes
-            ORDER BY id_cliente ASC
-        """)
-        clientes = cursor.fetchall()
-        clientes_list = [dict(zip([column[0] for column in cursor.description], row)) for row in clientes]
-        conn.close()
-        return jsonify(clientes_list), 200
+        try:
+            filas, headers = listado.consultar(conn.cursor(), args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        finally:
+            conn.close()
+        return jsonify(filas), 200, headers
     return jsonify({'error': 'Error de conexión a la base de datos'}), 500
 
 
+@admin_bp.route('/clientes', methods=['GET'])
+@login_required
+def listar_clientes():
+    return _responder_listado(LISTADO_CLIENTES)
+
+
 @admin_bp.route('/profesionales', methods=['GET'])
 @login_required
 def listar_profesionales():
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id_profesional, nombre, apellido FROM profesionales ORDER BY nombre ASC")
-        profesionales = cursor.fetchall()
-        profesionales_list = [dict(zip([column[0] for column in cursor.description], row)) for row in profesionales]
-        conn.close()
-        return jsonify(profesionales_list), 200
-    return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+    # Sin búsqueda ni paginación es el listado completo: sale del catálogo en memoria
+    if not request.args:
+        try:
+            return catalogo.responder('profesionales', profesionales_resumen)
+        except Exception as e:
+            print(f"Error al listar los profesionales: {e}")
+            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+    return _responder_listado(LISTADO_PROFESIONALES, 'id_profesional,nombre,apellido')
 
 
 @admin_bp.route('/clientes-dia', methods=['GET'])
@@ -154,20 +207,22 @@ def add_profesional():
     password = data['password']
     
     # Hashear la contraseña
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    try:
+        hashed_password = hash_password(password)
+    except HashQueueFullError:
+        return jsonify({'error': 'Servidor ocupado, intente nuevamente.'}), 503
     
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
         try:
-            # Insertar en profesionales
-            cursor.execute("""
+            # Insertar en profesionales y obtener el id_profesional generado
+            cursor.execute(f"""
                 INSERT INTO profesionales (nombre, apellido, especialidad, email, telefono)
+                {dialecto.output('id_profesional')}
                 VALUES (?, ?, ?, ?, ?)
+                {dialecto.returning('id_profesional')}
             """, (nombre, apellido, especialidad, email, telefono))
-            
-            # Obtener el último id_profesional insertado
-            cursor.execute("SELECT SCOPE_IDENTITY()")
             id_profesional = cursor.fetchone()[0]
             
             # Insertar en usuarios con id_cliente NULL y rol 'Profesional'
@@ -178,7 +233,12 @@ def add_profesional():
             
             conn.commit()
             conn.close()
+            catalogo.invalidar()
             return jsonify({'message': 'Profesional y usuario creados exitosamente.'}), 201
+        except dialecto.modulo.IntegrityError:
+            conn.rollback()
+            conn.close()
+            return jsonify({'error': 'El email o nombre de usuario ya están en uso.'}), 409
         except Exception as e:
             conn.rollback()
             conn.close()
@@ -207,6 +267,10 @@ def remove_profesional():
                 conn.close()
                 return jsonify({'error': 'Profesional no encontrado.'}), 404
             email = result[0]
+
+            # Usuarios afectados, para invalidar su identidad cacheada
+            cursor.execute("SELECT id_usuario FROM usuarios WHERE email = ? AND rol = 'Profesional'", (email,))
+            ids_usuario = [row[0] for row in cursor.fetchall()]
             
             # Eliminar de profesionales
             cursor.execute("DELETE FROM profesionales WHERE id_profesional = ?", (id_profesional,))
@@ -216,6 +280,8 @@ def remove_profesional():
             
             conn.commit()
             conn.close()
+            user_cache.invalidate(*ids_usuario)
+            catalogo.invalidar()
             return jsonify({'message': 'Profesional y usuario eliminados exitosamente.'}), 200
         except Exception as e:
             conn.rollback()
@@ -242,17 +308,21 @@ def add_empleado():
     password = data['password']
     
     # Hashear la contraseña
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    try:
+        hashed_password = hash_password(password)
+    except HashQueueFullError:
+        return jsonify({'error': 'Servidor ocupado, intente nuevamente.'}), 503
     
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
         try:
-            # Insertar en la tabla clientes y obtener el id_cliente con OUTPUT
-            cursor.execute("""
+            # Insertar en la tabla clientes y obtener el id_cliente en la misma sentencia
+            cursor.execute(f"""
                 INSERT INTO clientes (nombre, apellido, email, telefono, direccion)
-                OUTPUT INSERTED.id_cliente
+                {dialecto.output('id_cliente')}
                 VALUES (?, ?, ?, ?, ?)
+                {dialecto.returning('id_cliente')}
             """, (nombre, apellido, email, telefono, direccion))
             
             # Obtener el id_cliente insertado
@@ -267,6 +337,10 @@ def add_empleado():
             conn.commit()
             conn.close()
             return jsonify({'message': 'Empleado y usuario creados exitosamente.'}), 201
+        except dialecto.modulo.IntegrityError:
+            conn.rollback()
+            conn.close()
+            return jsonify({'error': 'El email o nombre de usuario ya están en uso.'}), 409
         except Exception as e:
             conn.rollback()
             conn.close()
@@ -295,6 +369,10 @@ def remove_empleado():
                 conn.close()
                 return jsonify({'error': 'Empleado no encontrado.'}), 404
             email = result[0]
+
+            # Usuarios afectados, para invalidar su identidad cacheada
+            cursor.execute("SELECT id_usuario FROM usuarios WHERE id_cliente = ? AND rol = 'Empleado'", (id_empleado,))
+            ids_usuario = [row[0] for row in cursor.fetchall()]
             
             # Eliminar de usuarios
             cursor.execute("DELETE FROM usuarios WHERE id_cliente = ? AND rol = 'Empleado'", (id_empleado,))
@@ -304,6 +382,7 @@ def remove_empleado():
             
             conn.commit()
             conn.close()
+            user_cache.invalidate(*ids_usuario)
             return jsonify({'message': 'Empleado y usuario eliminados exitosamente.'}), 200
         except Exception as e:
             conn.rollback()
@@ -315,18 +394,14 @@ def remove_empleado():
 @admin_bp.route('/empleados', methods=['GET'])
 @login_required
 def listar_empleados():
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT c.id_cliente, c.nombre, c.apellido
-            FROM clientes c
-            JOIN usuarios u ON c.id_cliente = u.id_cliente
-            WHERE u.rol = 'Empleado'
-            ORDER BY c.nombre ASC
-        """)
-        empleados = cursor.fetchall()
-        empleados_list = [dict(zip([column[0] for column in cursor.description], row)) for row in empleados]
-        conn.close()
-        return jsonify(empleados_list), 200
-    return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+    return _responder_listado(LISTADO_EMPLEADOS, 'id_cliente,nombre,apellido')
+
+
+# Exportar facturas de todos los clientes (o de uno con id_cliente) para contaduría
+@admin_bp.route('/facturas/exportar', methods=['POST'])
+@login_required
+def exportar_facturas():
+    if current_user.rol != 'admin':
+        return jsonify({'error': 'Solo un administrador puede exportar facturas de otros clientes.'}), 403
+    data = request.get_json() or {}
+    return responder_exportacion(data, data.get('id_cliente'))
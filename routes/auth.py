@@ -3,8 +3,10 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from models import User
-from database import get_db_connection
-import bcrypt
+from database import get_db_connection, db_connection
+from dialecto import dialecto
+from user_cache import user_cache, store_identity_in_session, clear_session_identity
+from passwords import password_hasher, hash_password, verify_password, HashQueueFullError
 
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/api/auth')
 
@@ -30,9 +32,19 @@ def login():
             id_cliente = result.id_cliente  # Obtener id_cliente
             print("Rol del usuario durante login:", rol)  # Verifica si el rol es 'admin' o 'Cliente'
 
-            if bcrypt.checkpw(password.encode('utf-8'), stored_password_hash.encode('utf-8')):
+            try:
+                password_ok = verify_password(password, stored_password_hash)
+            except HashQueueFullError:
+                return jsonify({'error': 'Servidor ocupado, intente nuevamente.'}), 503
+
+            if password_ok:
+                if password_hasher.needs_rehash(stored_password_hash):
+                    _rehash_en_segundo_plano(user_id, password)
+
                 user = User(id_usuario=user_id, email=email, rol=rol, id_cliente=id_cliente)
                 login_user(user)
+                user_cache.put(user)
+                store_identity_in_session(user)
 
                 return jsonify({'message': 'Inicio de sesión exitoso'}), 200
             else:
@@ -43,10 +55,28 @@ def login():
         return jsonify({'error': 'Error al conectar con la base de datos'}), 500
 
 
+def _rehash_en_segundo_plano(user_id, password):
+    # Actualiza el hash al costo configurado sin demorar la respuesta del login
+    def _guardar(future):
+        try:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE usuarios SET password = ? WHERE id_usuario = ?", (future.result(), user_id))
+                conn.commit()
+        except Exception as e:
+            print(f"Error al re-hashear la contraseña del usuario {user_id}: {e}")
+
+    try:
+        password_hasher.hash_async(password).add_done_callback(_guardar)
+    except HashQueueFullError:
+        pass  # Se reintentará en el próximo inicio de sesión
+
+
 @auth_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
+    clear_session_identity()
     return jsonify({'message': 'Sesión cerrada exitosamente'}), 200
 
 @auth_bp.route('/status', methods=['GET'])
@@ -72,6 +102,12 @@ def register():
     if not all([nombre, apellido, email, nombre_usuario, password]):
         return jsonify({'error': 'Faltan campos requeridos'}), 400
 
+    # Hashear la contraseña antes de abrir la transacción
+    try:
+        hashed_password = hash_password(password)
+    except HashQueueFullError:
+        return jsonify({'error': 'Servidor ocupado, intente nuevamente.'}), 503
+
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
@@ -82,28 +118,30 @@ def register():
             if existing_user:
                 return jsonify({'error': 'El email o nombre de usuario ya están en uso'}), 400
 
-            # Insertar en clientes y obtener id_cliente usando OUTPUT
-            cursor.execute("""
-                INSERT INTO [dbo].[clientes] (nombre, apellido, email, telefono, direccion)
-                OUTPUT INSERTED.id_cliente
+            # Insertar en clientes y obtener id_cliente en la misma sentencia
+            cursor.execute(f"""
+                INSERT INTO clientes (nombre, apellido, email, telefono, direccion)
+                {dialecto.output('id_cliente')}
                 VALUES (?, ?, ?, ?, ?)
+                {dialecto.returning('id_cliente')}
             """, (nombre, apellido, email, telefono, direccion))
             id_cliente = cursor.fetchone()[0]
 
             if not id_cliente:
                 raise Exception("No se pudo obtener id_cliente.")
 
-            # Hashear la contraseña
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
             # Insertar en usuarios
             cursor.execute("""
-                INSERT INTO [dbo].[usuarios] (id_cliente, nombre_usuario, password, email, rol)
+                INSERT INTO usuarios (id_cliente, nombre_usuario, password, email, rol)
                 VALUES (?, ?, ?, ?, ?)
             """, (id_cliente, nombre_usuario, hashed_password, email, rol))
             conn.commit()
 
             return jsonify({"message": "Usuario registrado exitosamente"}), 201
+        except dialecto.modulo.IntegrityError:
+            # Otro registro tomó el mismo email o nombre de usuario (índices únicos de usuarios)
+            conn.rollback()
+            return jsonify({'error': 'El email o nombre de usuario ya están en uso'}), 409
         except Exception as e:
             conn.rollback()
             return jsonify({'error': 'Error en el registro', 'details': str(e)}), 500
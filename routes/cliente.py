@@ -1,14 +1,21 @@
 # routes/cliente.py
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response
 from flask_login import login_required, current_user
 from database import get_db_connection
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-import os
+from dialecto import dialecto
+from user_cache import user_cache, clear_session_identity
+from disponibilidad import disponibilidad
+from catalogo import catalogo
+from resumen_ingresos import registrar_pagos
+from routes.trabajos import pedido_asincrono, encolar_pdf
+from facturas import (cache_facturas, consultar_factura, consultar_facturas, crear_facturas_pdf, zip_facturas,
+                      LOTE_FACTURAS)
+from trabajos_pdf import cola_pdf
+from almacenamiento import almacen, enviar
+from pdf_recursos import pdf_en_memoria
+from config import Config
+from datetime import datetime, timedelta
 from decimal import Decimal
 
 cliente_bp = Blueprint('cliente_bp', __name__, url_prefix='/api/cliente')
@@ -80,6 +87,10 @@ def actualizar_perfil():
 
             conn.commit()
             conn.close()
+
+            # El email forma parte de la identidad cacheada del usuario
+            user_cache.invalidate(current_user.id)
+            clear_session_identity()
             return jsonify({'message': 'Perfil actualizado exitosamente'}), 200
         except Exception as e:
             conn.rollback()
@@ -166,6 +177,7 @@ def cancelar_reserva(id_turno):
             # Confirmar cambios
             conn.commit()
             conn.close()
+            disponibilidad.liberar(id_turno)
             return jsonify({'message': 'Turno cancelado exitosamente.'}), 200
         except Exception as e:
             conn.rollback()
@@ -182,15 +194,22 @@ def modificar_reserva(id_turno):
     nueva_fecha = data.get('fecha')
     nueva_hora = data.get('hora')
 
+    try:
+        fecha_obj = datetime.strptime(nueva_fecha, '%Y-%m-%d').date() if nueva_fecha else None
+        hora_obj = datetime.strptime(nueva_hora[:5], '%H:%M').time() if nueva_hora else None
+    except ValueError:
+        return jsonify({'error': 'Formato de fecha u hora inválido.'}), 400
+
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
         try:
             # Verificar que el turno pertenece al cliente actual
             query_verificar_turno = """
-                SELECT t.id_turno, p.metodo_pago
+                SELECT t.id_turno, t.fecha, t.hora, p.metodo_pago, ts.id_servicio
                 FROM turnos t
                 LEFT JOIN pagos p ON t.id_turno = p.id_turno
+                LEFT JOIN turno_servicio ts ON t.id_turno = ts.id_turno
                 WHERE t.id_turno = ? AND t.id_cliente = ?
             """
             cursor.execute(query_verificar_turno, (id_turno, current_user.id_cliente))
@@ -203,27 +222,41 @@ def modificar_reserva(id_turno):
             if metodo_pago and metodo_pago != 'Pendiente':
                 return jsonify({'error': 'No se puede modificar un turno pagado.'}), 400
 
-            # Construir la consulta de actualización solo para fecha y hora
-            campos_a_actualizar = []
-            valores = []
+            if not fecha_obj and not hora_obj:
+                conn.close()
+                return jsonify({'message': 'Turno modificado exitosamente.'}), 200
 
-            if nueva_fecha:
-                campos_a_actualizar.append("fecha = ?")
-                valores.append(nueva_fecha)
+            # El dato que no se envía queda como estaba
+            fecha_nueva = fecha_obj or turno_result.fecha
+            hora_nueva = hora_obj or turno_result.hora
 
-            if nueva_hora:
-                campos_a_actualizar.append("hora = ?")
-                valores.append(nueva_hora)
+            if datetime.combine(fecha_nueva, hora_nueva) - datetime.now() < timedelta(hours=72):
+                conn.close()
+                return jsonify({'error': 'Las reservas deben realizarse con al menos 72 horas de anticipación.'}), 400
 
-            if campos_a_actualizar:
-                # Actualizar fecha y hora en la tabla turnos
-                query_modificar_turno = f"UPDATE turnos SET {', '.join(campos_a_actualizar)} WHERE id_turno = ?"
-                valores.append(id_turno)
-                cursor.execute(query_modificar_turno, valores)
+            # Un profesional libre en el nuevo horario, sin contar el turno que se mueve
+            duracion = disponibilidad.duracion_servicio(turno_result.id_servicio, cursor)
+            id_profesional = disponibilidad.asignar_profesional(fecha_nueva, hora_nueva, duracion, cursor,
+                                                                excluir=id_turno)
+            if id_profesional is None:
+                conn.close()
+                return jsonify({'error': 'Horario no disponible.'}), 400
+
+            # Valores ya convertidos, para que los dos motores guarden el mismo formato que crear_reserva
+            query_modificar_turno = "UPDATE turnos SET fecha = ?, hora = ?, id_profesional = ? WHERE id_turno = ?"
+            cursor.execute(query_modificar_turno, (fecha_nueva, hora_nueva, id_profesional, id_turno))
 
             conn.commit()
             conn.close()
+
+            disponibilidad.liberar(id_turno)
+            disponibilidad.reservar(fecha_nueva, id_turno, id_profesional, hora_nueva, duracion)
             return jsonify({'message': 'Turno modificado exitosamente.'}), 200
+        except dialecto.modulo.IntegrityError:
+            conn.rollback()
+            conn.close()
+            disponibilidad.invalidar(fecha_nueva)
+            return jsonify({'error': 'Horario no disponible.'}), 409
         except Exception as e:
             conn.rollback()
             conn.close()
@@ -321,19 +354,35 @@ def realizar_pago(id_pago):
             if apply_discount:
                 monto = monto * Decimal('0.9')  # Aplicar 10% de descuento
 
-            # Actualizar el método de pago y el monto en la tabla pagos
-            query_actualizar_pago = "UPDATE pagos SET metodo_pago = ?, monto = ? WHERE id_pago = ?"
+            # Actualizar el método de pago y el monto en la tabla pagos, solo si sigue pendiente:
+            # un segundo pago del mismo id no debe facturarse ni sumarse otra vez al resumen
+            query_actualizar_pago = """
+                UPDATE pagos SET metodo_pago = ?, monto = ?
+                WHERE id_pago = ? AND metodo_pago = 'Pendiente'
+            """
             cursor.execute(query_actualizar_pago, (metodo_pago, float(monto), id_pago))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                conn.close()
+                return jsonify({'error': 'El pago ya fue realizado.'}), 409
 
             # Insertar factura con el monto con descuento
-            query_insertar_factura = """
+            query_insertar_factura = f"""
                 INSERT INTO facturas (id_cliente, id_pago, total)
+                {dialecto.output('id_factura')}
                 VALUES (?, ?, ?)
+                {dialecto.returning('id_factura')}
             """
             cursor.execute(query_insertar_factura, (id_cliente, id_pago, float(monto)))
+            id_factura = cursor.fetchone()[0]
+
+            # Sumar el pago al resumen diario de ingresos
+            registrar_pagos(cursor, [id_pago])
 
             conn.commit()
             conn.close()
+            # Dejar el PDF de la factura listo para la primera descarga
+            cola_pdf.en_segundo_plano(cache_facturas.pre_generar, [id_factura])
             return jsonify({'message': 'Pago realizado y factura generada exitosamente'}), 200
         except Exception as e:
             conn.rollback()
@@ -397,123 +446,90 @@ def generar_factura(id_factura):
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
-        query = """
-            SELECT f.id_factura, f.fecha_emision, t.fecha AS fecha_servicio, t.hora, 
-                   s.nombre AS servicio, f.total, c.nombre AS cliente_nombre, 
-                   c.apellido AS cliente_apellido, p.metodo_pago
-            FROM facturas f
-            JOIN pagos p ON f.id_pago = p.id_pago
-            JOIN turnos t ON p.id_turno = t.id_turno
-            JOIN turno_servicio ts ON t.id_turno = ts.id_turno
-            JOIN servicios s ON ts.id_servicio = s.id_servicio
-            JOIN clientes c ON f.id_cliente = c.id_cliente
-            WHERE f.id_factura = ? AND t.id_cliente = ?
-        """
-        cursor.execute(query, (id_factura, current_user.id_cliente))
-        factura = cursor.fetchone()
+        ruta = cache_facturas.obtener(id_factura)
+        if ruta:
+            # Ya generada: alcanza con verificar que la factura sea del cliente
+            cursor.execute("SELECT 1 FROM facturas WHERE id_factura = ? AND id_cliente = ?",
+                           (id_factura, current_user.id_cliente))
+            encontrada = cursor.fetchone()
+            factura = None
+        else:
+            factura = consultar_factura(cursor, id_factura, current_user.id_cliente)
+            encontrada = factura
         conn.close()
 
-        if not factura:
+        if not encontrada:
             return jsonify({'error': 'Factura no encontrada.'}), 404
 
-        factura_id, fecha_emision, fecha_servicio, hora_servicio, servicio, total, cliente_nombre, cliente_apellido, metodo_pago = factura
-        filename = f'factura_{factura_id}.pdf'
-        filepath = os.path.join('facturas', filename)
-
-        if not os.path.exists('facturas'):
-            os.makedirs('facturas')
-
-        # Configuración del documento
-        doc = SimpleDocTemplate(filepath, pagesize=letter)
-        styles = getSampleStyleSheet()
-
-        styles['Normal'].fontSize = 12
-        styles['Title'].fontSize = 16
-
-        elements = []
-
-        # Agregar logo
-        logo_path = os.path.join('static', 'logo.png')
-        if os.path.exists(logo_path):
-            im = Image(logo_path, width=120, height=60)
-            elements.append(im)
-
-        # Encabezado de la factura
-        elements.append(Spacer(1, 12))
-        title = Paragraph(f"<para align='right'><b>Factura N° {factura_id}</b></para>", styles['Title'])
-        elements.append(title)
-
-        empresa_info = Paragraph("""
-            <b>Spa Sentirse Bien</b><br/>
-            Dirección: Calle Falsa 123, Ciudad<br/>
-            Teléfono: 123-456-7890<br/>
-            Email: info@sentirsebien.com
-            """, styles['Normal'])
-        elements.append(empresa_info)
-
-        elements.append(Spacer(1, 12))
-
-        # Información del cliente
-        cliente_info = Paragraph(f"<b>Cliente:</b> {cliente_nombre} {cliente_apellido}", styles['Normal'])
-        elements.append(cliente_info)
-
-        fecha_info = Paragraph(f"<b>Fecha de emisión:</b> {fecha_emision.strftime('%Y-%m-%d')}", styles['Normal'])
-        metodo_pago_info = Paragraph(f"<b>Método de pago:</b> {metodo_pago.capitalize()}", styles['Normal'])
-        elements.append(fecha_info)
-        elements.append(metodo_pago_info)
-
-        elements.append(Spacer(1, 12))
-
-        # Detalles del servicio en una tabla
-        data = [
-            ['Descripción', 'Fecha del Servicio', 'Hora', 'Cantidad', 'Precio Unitario', 'Total'],
-            [servicio, fecha_servicio.strftime('%Y-%m-%d'), hora_servicio.strftime('%H:%M'), '1', f"${total:.2f}", f"${total:.2f}"]
-        ]
-
-        table = Table(data, colWidths=[150, 90, 50, 60, 80, 80])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#4A90E2")),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-
-        elements.append(table)
-        elements.append(Spacer(1, 12))
-
-        # Resumen del pago (eliminamos impuestos)
-        resumen_data = [
-            ['Subtotal:', f"${total:.2f}"],
-            ['Total Pagado:', f"${total:.2f}"]
-        ]
-
-        resumen_table = Table(resumen_data, colWidths=[400, 100])
-        resumen_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(resumen_table)
-
-        elements.append(Spacer(1, 24))
-
-        # Pie de página
-        footer = Paragraph("Gracias por confiar en nosotros. ¡Esperamos verte pronto!", styles['Normal'])
-        elements.append(footer)
-
-        # Generar el documento PDF
-        doc.build(elements)
-
-        return send_file(filepath, as_attachment=True)
+        filename = f'factura_{id_factura}.pdf'
+        if not ruta:
+            if pedido_asincrono():
+                return encolar_pdf('factura', filename, cache_facturas.copiar_a, factura)
+            ruta = cache_facturas.generar(factura)
+
+        respuesta = enviar(almacen, ruta, filename, etag=cache_facturas.etag(id_factura), conditional=True, max_age=0)
+        respuesta.headers['Cache-Control'] = 'private, no-cache'
+        return respuesta
     else:
         return jsonify({'error': 'Error de conexión a la base de datos.'}), 500
 
     
+def _leer_fecha(valor):
+    return datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+
+def responder_exportacion(data, id_cliente=None):
+    """Exporta las facturas pedidas (ids o rango desde/hasta) como un PDF combinado o un ZIP."""
+    formato = data.get('formato', 'pdf')
+    if formato not in ('pdf', 'zip'):
+        return jsonify({'error': "formato debe ser 'pdf' o 'zip'."}), 400
+
+    ids = data.get('ids') or []
+    if not isinstance(ids, list) or not all(isinstance(id_factura, int) for id_factura in ids):
+        return jsonify({'error': 'ids debe ser una lista de números de factura.'}), 400
+    try:
+        desde = _leer_fecha(data.get('desde'))
+        hasta = _leer_fecha(data.get('hasta'))
+    except ValueError:
+        return jsonify({'error': 'Formato de fecha incorrecto. Debe ser YYYY-MM-DD.'}), 400
+    if not ids and not (desde and hasta):
+        return jsonify({'error': 'Indicar ids o un rango con desde y hasta.'}), 400
+
+    maximo = Config.EXPORTACION_MAX_FACTURAS
+    if len(ids) > maximo:
+        return jsonify({'error': f'Se pueden exportar hasta {maximo} facturas por vez.'}), 400
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Error de conexión a la base de datos.'}), 500
+    try:
+        # Todas las facturas en una sola consulta
+        facturas = consultar_facturas(conn.cursor(), ids, desde, hasta, id_cliente, limite=maximo)
+    except Exception as e:
+        print(f"Error consultando facturas para exportar: {e}")
+        return jsonify({'error': 'Error al obtener las facturas.'}), 500
+    finally:
+        conn.close()
+
+    if not facturas:
+        return jsonify({'error': 'No se encontraron facturas.'}), 404
+    if len(facturas) > maximo:
+        return jsonify({'error': f'El pedido supera las {maximo} facturas; acotar el rango de fechas.'}), 400
+
+    nombre = f'facturas_{desde}_a_{hasta}' if desde and hasta else 'facturas'
+    if formato == 'zip':
+        return Response(zip_facturas(facturas, cache_facturas), mimetype='application/zip',
+                        headers={'Content-Disposition': f'attachment; filename={nombre}.zip'})
+
+    # El PDF combinado se arma en memoria y pasa a disco si crece demasiado
+    archivo = pdf_en_memoria(crear_facturas_pdf, facturas)
+    return send_file(archivo, mimetype='application/pdf', as_attachment=True, download_name=f'{nombre}.pdf')
+
+# Exportar varias facturas del cliente en un solo archivo
+@cliente_bp.route('/facturas/exportar', methods=['POST'])
+@login_required
+def exportar_facturas():
+    return responder_exportacion(request.get_json() or {}, current_user.id_cliente)
+
 # Realizar pagos de todos los pendientes
 @cliente_bp.route('/pagar-todos', methods=['POST'])
 @login_required
@@ -532,58 +548,69 @@ def pagar_todos():
     if conn:
         cursor = conn.cursor()
         try:
-            # Obtener id_cliente del usuario actual
-            query_get_cliente = "SELECT id_cliente FROM usuarios WHERE id_usuario = ?"
-            cursor.execute(query_get_cliente, (current_user.id,))
-            cliente_result = cursor.fetchone()
-            if not cliente_result:
-                return jsonify({'error': 'Cliente no encontrado'}), 404
-            id_cliente = cliente_result.id_cliente
-
-            # Obtener todos los pagos pendientes del cliente
-            query_pagos_pendientes = """
-                SELECT p.id_pago, p.monto
-                FROM pagos p
-                JOIN turnos t ON p.id_turno = t.id_turno
-                WHERE t.id_cliente = ? AND p.metodo_pago = 'Pendiente'
+            id_cliente = current_user.id_cliente
+
+            # Marcar como pagados todos los pendientes del cliente en una sola sentencia,
+            # que devuelve los pagos tomados con el servicio y el horario de su turno
+            detalle_turno = {
+                'servicio': ('s.nombre', """SELECT s.nombre FROM turno_servicio ts
+                    JOIN servicios s ON ts.id_servicio = s.id_servicio WHERE ts.id_turno = pagos.id_turno"""),
+                'fecha': ('t.fecha', "SELECT fecha FROM turnos WHERE id_turno = pagos.id_turno"),
+                'hora': ('t.hora', "SELECT hora FROM turnos WHERE id_turno = pagos.id_turno"),
+            }
+            query_pagar_pendientes = f"""
+                UPDATE pagos SET metodo_pago = ?
+                {dialecto.output('id_pago', 'monto', 'id_turno', unidas=detalle_turno)}
+                FROM turnos t
+                JOIN turno_servicio ts ON t.id_turno = ts.id_turno
+                JOIN servicios s ON ts.id_servicio = s.id_servicio
+                WHERE pagos.id_turno = t.id_turno
+                  AND pagos.metodo_pago = 'Pendiente'
+                  AND t.id_cliente = ?
+                {dialecto.returning('id_pago', 'monto', 'id_turno', unidas=detalle_turno)}
             """
-            cursor.execute(query_pagos_pendientes, (id_cliente,))
-            pagos_pendientes = cursor.fetchall()
+            cursor.execute(query_pagar_pendientes, (metodo_pago, id_cliente))
+            pagos = {fila.id_pago: fila for fila in cursor.fetchall()}
 
-            if not pagos_pendientes:
+            if not pagos:
+                conn.rollback()
+                cursor.close()
+                conn.close()
                 return jsonify({'error': 'No hay pagos pendientes.'}), 400
 
+            # Una factura por pago con un INSERT de varias filas por lote
             facturas_generadas = []
+            ids_pago = list(pagos)
+            for inicio in range(0, len(ids_pago), LOTE_FACTURAS):
+                lote = ids_pago[inicio:inicio + LOTE_FACTURAS]
 
-            # Procesar el pago de cada reserva pendiente
-            for pago in pagos_pendientes:
-                id_pago, monto = pago
-
-                # Actualizar el método de pago
-                query_actualizar_pago = "UPDATE pagos SET metodo_pago = ? WHERE id_pago = ?"
-                cursor.execute(query_actualizar_pago, (metodo_pago, id_pago,))
-
-                # Insertar una factura para cada pago y recuperar el id_factura generado
-                query_insertar_factura = """
+                query_insertar_facturas = f"""
                     INSERT INTO facturas (id_cliente, id_pago, total)
-                    OUTPUT INSERTED.id_factura
-                    VALUES (?, ?, ?)
+                    {dialecto.output('id_factura', 'id_pago')}
+                    VALUES {', '.join('(?, ?, ?)' for _ in lote)}
+                    {dialecto.returning('id_factura', 'id_pago')}
                 """
-                cursor.execute(query_insertar_factura, (id_cliente, id_pago, monto))
-                id_factura = cursor.fetchone()[0]  # Recupera el id_factura generado
-
-                # Agregar detalles de la factura a la lista generada
-                facturas_generadas.append({
-                    'id_factura': id_factura,
-                    'servicio': 'Servicio Desconocido',  # Ajusta según tu lógica
-                    'fecha': 'Fecha Desconocida',       # Ajusta según tu lógica
-                    'hora': 'Hora Desconocida',         # Ajusta según tu lógica
-                    'total': monto
-                })
+                params = [valor for id_pago in lote for valor in (id_cliente, id_pago, pagos[id_pago].monto)]
+                cursor.execute(query_insertar_facturas, params)
+                for id_factura, id_pago in cursor.fetchall():
+                    pago = pagos[id_pago]
+                    facturas_generadas.append({
+                        'id_factura': id_factura,
+                        'servicio': pago.servicio,
+                        'fecha': pago.fecha.strftime('%Y-%m-%d'),
+                        'hora': pago.hora.strftime('%H:%M'),
+                        'total': pago.monto
+                    })
+
+                # Sumar los pagos del lote al resumen diario de ingresos
+                registrar_pagos(cursor, lote)
+            facturas_generadas.sort(key=lambda factura: factura['id_factura'])
 
             conn.commit()  # Confirmar los cambios
             cursor.close()
             conn.close()
+            # Dejar los PDFs listos para la primera descarga
+            cola_pdf.en_segundo_plano(cache_facturas.pre_generar, [factura['id_factura'] for factura in facturas_generadas])
             return jsonify({
                 'message': 'Todos los pagos realizados y facturas generadas exitosamente.',
                 'facturas': facturas_generadas
@@ -602,27 +629,14 @@ def pagar_todos():
 @cliente_bp.route('/servicios', methods=['GET'])
 @login_required
 def obtener_servicios():
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        try:
-            query = "SELECT id_servicio, nombre, duracion FROM servicios"
-            cursor.execute(query)
-            servicios = cursor.fetchall()
-            conn.close()
-            servicios_list = []
-            for servicio in servicios:
-                servicios_list.append({
-                    'id_servicio': servicio.id_servicio,
-                    'nombre': servicio.nombre,
-                    'duracion': servicio.duracion
-                })
-            return jsonify({'servicios': servicios_list}), 200
-        except Exception as e:
-            conn.close()
-            return jsonify({'error': 'Error al obtener los servicios'}), 500
-    else:
-        return jsonify({'error': 'Error al conectar con la base de datos'}), 500
+    try:
+        return catalogo.responder('servicios', lambda instantanea: {'servicios': [
+            {'id_servicio': s['id_servicio'], 'nombre': s['nombre'], 'duracion': s['duracion']}
+            for s in instantanea.servicios.values()
+        ]})
+    except Exception as e:
+        print(f"Error al obtener los servicios: {e}")
+        return jsonify({'error': 'Error al obtener los servicios'}), 500
     
 @cliente_bp.route('/reserva/<int:id_turno>', methods=['GET'])
 @login_required
@@ -1,17 +1,19 @@
 # backend/routes/informes.py
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response
 from flask_login import login_required
-from database import get_db_connection
+from database import get_db_connection, db_connection
+from config import Config
+from resumen_ingresos import totales, AGRUPACIONES
+from routes.trabajos import pedido_asincrono, encolar_pdf
+import json
+from pdf_recursos import estilo, estilo_tabla, logo, pdf_en_memoria
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-import os
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
 from decimal import Decimal
 from datetime import datetime
 
-import tempfile  # Para manejo de archivos temporales
 
 informes_bp = Blueprint('informes_bp', __name__, url_prefix='/api/informes')
 
@@ -30,6 +32,64 @@ def sanitizar_nombre_archivo(fecha_inicio, fecha_fin):
     fecha_fin_safe = fecha_fin.replace('/', '-')
     return fecha_inicio_safe, fecha_fin_safe
 
+QUERY_INGRESOS = """
+    SELECT 
+        c.nombre AS cliente_nombre, 
+        c.apellido AS cliente_apellido, 
+        p.metodo_pago, 
+        p.monto, 
+        p.fecha_pago,
+        s.nombre AS servicio_nombre
+    FROM pagos p
+    INNER JOIN turnos t ON p.id_turno = t.id_turno
+    INNER JOIN clientes c ON t.id_cliente = c.id_cliente
+    INNER JOIN turno_servicio ts ON t.id_turno = ts.id_turno
+    INNER JOIN servicios s ON ts.id_servicio = s.id_servicio
+    WHERE p.fecha_pago BETWEEN ? AND ?
+      AND p.metodo_pago != 'Pendiente'
+    ORDER BY p.fecha_pago;
+"""
+
+def _formatear_ingreso(row):
+    return {
+        'cliente': f"{row[0]} {row[1]}",
+        'servicio': row[5],
+        'metodo_pago': row[2],
+        'monto': f"{row[3]:.2f}",
+        'fecha_pago': row[4].strftime('%d/%m/%Y')
+    }
+
+def _respuesta_streaming(conn, cursor, formatear, formato):
+    """Envía las filas del cursor a medida que se leen, de a STREAM_LOTE filas.
+
+    'ndjson' produce un objeto JSON por línea; 'stream' un único array JSON.
+    """
+    def generar():
+        try:
+            primera = True
+            if formato != 'ndjson':
+                yield '['
+            while True:
+                filas = cursor.fetchmany(Config.STREAM_LOTE)
+                if not filas:
+                    break
+                if formato == 'ndjson':
+                    yield ''.join(json.dumps(formatear(row), ensure_ascii=False) + '\n' for row in filas)
+                else:
+                    fragmento = ','.join(json.dumps(formatear(row), ensure_ascii=False) for row in filas)
+                    yield fragmento if primera else ',' + fragmento
+                    primera = False
+            if formato != 'ndjson':
+                yield ']'
+        finally:
+            conn.close()
+
+    mimetype = 'application/x-ndjson' if formato == 'ndjson' else 'application/json'
+    respuesta = Response(generar(), mimetype=mimetype)
+    # Por si la respuesta se descarta sin llegar a iterarse
+    respuesta.call_on_close(conn.close)
+    return respuesta
+
 # Informe de ingresos por tipo de pago en un rango de fechas
 @informes_bp.route('/ingresos', methods=['POST'])
 @login_required
@@ -37,6 +97,8 @@ def generar_informe_ingresos():
     data = request.get_json()
     fecha_inicio_original = data.get('fecha_inicio')
     fecha_fin_original = data.get('fecha_fin')
+    # 'json' (por defecto), 'stream' (array JSON enviado por partes) o 'ndjson'
+    formato = request.args.get('formato') or data.get('formato', 'json')
 
     fecha_inicio = convertir_fecha(fecha_inicio_original)
     fecha_fin = convertir_fecha(fecha_fin_original)
@@ -52,43 +114,16 @@ def generar_informe_ingresos():
     if conn:
         try:
             cursor = conn.cursor()
-            query = """
-                SELECT 
-                    c.nombre AS cliente_nombre, 
-                    c.apellido AS cliente_apellido, 
-                    p.metodo_pago, 
-                    p.monto, 
-                    p.fecha_pago,
-                    s.nombre AS servicio_nombre
-                FROM pagos p
-                INNER JOIN turnos t ON p.id_turno = t.id_turno
-                INNER JOIN clientes c ON t.id_cliente = c.id_cliente
-                INNER JOIN turno_servicio ts ON t.id_turno = ts.id_turno
-                INNER JOIN servicios s ON ts.id_servicio = s.id_servicio
-                WHERE p.fecha_pago BETWEEN ? AND ?
-                  AND p.metodo_pago != 'Pendiente'
-                ORDER BY p.fecha_pago;
-            """
-            cursor.execute(query, (fecha_inicio, fecha_fin))
-            ingresos = cursor.fetchall()
+            cursor.execute(QUERY_INGRESOS, (fecha_inicio, fecha_fin))
+
+            if formato in ('stream', 'ndjson'):
+                # La conexión la cierra el generador al terminar de enviar las filas
+                respuesta = _respuesta_streaming(conn, cursor, _formatear_ingreso, formato)
+                conn = None
+                return respuesta
 
             # Process the results into a suitable JSON format
-            resultados = []
-            for row in ingresos:
-                cliente_nombre = row[0]
-                cliente_apellido = row[1]
-                metodo_pago = row[2]
-                monto = f"{row[3]:.2f}"
-                fecha_pago = row[4].strftime('%d/%m/%Y')
-                servicio_nombre = row[5]
-
-                resultados.append({
-                    'cliente': f"{cliente_nombre} {cliente_apellido}",
-                    'servicio': servicio_nombre,
-                    'metodo_pago': metodo_pago,
-                    'monto': monto,
-                    'fecha_pago': fecha_pago
-                })
+            resultados = [_formatear_ingreso(row) for row in cursor.fetchall()]
 
             # Return the results in JSON format
             return jsonify(resultados), 200
@@ -98,16 +133,19 @@ def generar_informe_ingresos():
             return jsonify({'error': 'Error al ejecutar la consulta de ingresos.'}), 500
 
         finally:
-            conn.close()
+            if conn:
+                conn.close()
     else:
         return jsonify({'error': 'Error al conectar con la base de datos.'}), 500
 
-@informes_bp.route('/ingresos-pdf', methods=['POST'])
+# Totales de ingresos desde el resumen diario, sin recorrer los pagos
+@informes_bp.route('/ingresos-resumen', methods=['POST'])
 @login_required
-def descargar_informe_ingresos_pdf():
+def resumen_informe_ingresos():
     data = request.get_json()
     fecha_inicio_original = data.get('fecha_inicio')
     fecha_fin_original = data.get('fecha_fin')
+    agrupar_por = data.get('agrupar_por', 'metodo_pago')
 
     fecha_inicio = convertir_fecha(fecha_inicio_original)
     fecha_fin = convertir_fecha(fecha_fin_original)
@@ -118,75 +156,86 @@ def descargar_informe_ingresos_pdf():
             'fecha_inicio_original': fecha_inicio_original,
             'fecha_fin_original': fecha_fin_original
         }), 400
+    if agrupar_por not in AGRUPACIONES:
+        return jsonify({'error': f"agrupar_por debe ser uno de: {', '.join(AGRUPACIONES)}."}), 400
 
     conn = get_db_connection()
     if conn:
         try:
-            cursor = conn.cursor()
-            query = """
-                SELECT 
-                    c.nombre AS cliente_nombre, 
-                    c.apellido AS cliente_apellido, 
-                    p.metodo_pago, 
-                    p.monto, 
-                    p.fecha_pago,
-                    s.nombre AS servicio_nombre
-                FROM pagos p
-                INNER JOIN turnos t ON p.id_turno = t.id_turno
-                INNER JOIN clientes c ON t.id_cliente = c.id_cliente
-                INNER JOIN turno_servicio ts ON t.id_turno = ts.id_turno
-                INNER JOIN servicios s ON ts.id_servicio = s.id_servicio
-                WHERE p.fecha_pago BETWEEN ? AND ?
-                  AND p.metodo_pago != 'Pendiente'
-                ORDER BY p.fecha_pago;
-            """
-            cursor.execute(query, (fecha_inicio, fecha_fin))
-            ingresos = cursor.fetchall()
-
-            # Sanitize file names
-            fecha_inicio_safe, fecha_fin_safe = sanitizar_nombre_archivo(fecha_inicio_original, fecha_fin_original)
-
-            # Create the PDF file in a temporary directory
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f'_ingresos_{fecha_inicio_safe}_a_{fecha_fin_safe}.pdf') as tmp_file:
-                filepath = tmp_file.name
-
-            crear_informe_ingresos_pdf(ingresos, fecha_inicio_original, fecha_fin_original, filepath)
-
-            return send_file(filepath, as_attachment=True)
+            filas = totales(conn.cursor(), fecha_inicio, fecha_fin, agrupar_por)
+            grupos = [{'grupo': grupo, 'cantidad': cantidad, 'total': f"{total:.2f}"} for grupo, cantidad, total in filas]
+            total_general = sum((Decimal(str(total)) for _, _, total in filas), Decimal(0))
+            return jsonify({'grupos': grupos, 'total': f"{total_general:.2f}"}), 200
         except Exception as e:
-            print(f"Error generando el PDF de ingresos: {e}")
-            return jsonify({'error': 'Error al generar el PDF de ingresos.'}), 500
+            print(f"Error ejecutando el resumen de ingresos: {e}")
+            return jsonify({'error': 'Error al obtener el resumen de ingresos.'}), 500
         finally:
             conn.close()
     else:
         return jsonify({'error': 'Error al conectar con la base de datos.'}), 500
 
-def crear_informe_ingresos_pdf(ingresos, fecha_inicio, fecha_fin, filepath):
-    from decimal import Decimal
-    from reportlab.lib.units import mm
-    from reportlab.lib.enums import TA_CENTER
+@informes_bp.route('/ingresos-pdf', methods=['POST'])
+@login_required
+def descargar_informe_ingresos_pdf():
+    data = request.get_json()
+    fecha_inicio_original = data.get('fecha_inicio')
+    fecha_fin_original = data.get('fecha_fin')
+
+    fecha_inicio = convertir_fecha(fecha_inicio_original)
+    fecha_fin = convertir_fecha(fecha_fin_original)
 
+    if not fecha_inicio or not fecha_fin:
+        return jsonify({
+            'error': 'Formato de fecha incorrecto. Debe ser DD/MM/AAAA.',
+            'fecha_inicio_original': fecha_inicio_original,
+            'fecha_fin_original': fecha_fin_original
+        }), 400
+
+    fecha_inicio_safe, fecha_fin_safe = sanitizar_nombre_archivo(fecha_inicio_original, fecha_fin_original)
+    nombre_archivo = f'ingresos_{fecha_inicio_safe}_a_{fecha_fin_safe}.pdf'
+    args = (fecha_inicio, fecha_fin, fecha_inicio_original, fecha_fin_original)
+
+    if pedido_asincrono(data):
+        return encolar_pdf('informe_ingresos', nombre_archivo, generar_pdf_ingresos, *args)
+
+    try:
+        return _descargar_informe(nombre_archivo, generar_pdf_ingresos, args)
+    except Exception as e:
+        print(f"Error generando el PDF de ingresos: {e}")
+        return jsonify({'error': 'Error al generar el PDF de ingresos.'}), 500
+
+def _descargar_informe(nombre_archivo, generar, args):
+    """Genera el informe en memoria y lo envía sin pasar por disco."""
+    archivo = pdf_en_memoria(generar, *args)
+    return send_file(archivo, mimetype='application/pdf', as_attachment=True, download_name=nombre_archivo)
+
+def generar_pdf_ingresos(fecha_inicio, fecha_fin, fecha_inicio_original, fecha_fin_original, filepath):
+    """Consulta los ingresos y escribe el PDF; se usa en la petición o desde la cola de trabajos."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERY_INGRESOS, (fecha_inicio, fecha_fin))
+        ingresos = cursor.fetchall()
+
+    crear_informe_ingresos_pdf(ingresos, fecha_inicio_original, fecha_fin_original, filepath)
+
+def crear_informe_ingresos_pdf(ingresos, fecha_inicio, fecha_fin, filepath):
     doc = SimpleDocTemplate(filepath, pagesize=letter)
-    styles = getSampleStyleSheet()
+    title_style = estilo('titulo_informe')
 
     elements = []
 
     # Logo
-    logo_path = os.path.join('static', 'logo.png')
-    if os.path.exists(logo_path):
-        logo = Image(logo_path, width=60 * mm, height=30 * mm)
-        logo.hAlign = 'CENTER'
-        elements.append(logo)
+    im = logo(60 * mm, 30 * mm)
+    if im:
+        elements.append(im)
 
     # Título del Spa
-    elements.append(Paragraph("Spa Sentirse Bien", styles['Title']))
+    elements.append(Paragraph("Spa Sentirse Bien", title_style))
     elements[-1].hAlign = 'CENTER'
 
     elements.append(Spacer(1, 12))
 
     # Título del Informe
-    title_style = styles['Title']
-    title_style.fontSize = 16
     elements.append(Paragraph(f"Informe de Ingresos - {fecha_inicio} a {fecha_fin}", title_style))
     elements[-1].hAlign = 'CENTER'
 
@@ -229,10 +278,8 @@ def crear_informe_ingresos_pdf(ingresos, fecha_inicio, fecha_fin, filepath):
         elements.append(table)
         elements.append(Spacer(1, 12))
 
-    # Estilo para subtotales y total
-    total_style = styles['Heading3']
-    total_style.fontSize = 12
-    total_style.alignment = 2  # Alinear a la derecha
+    # Estilo para subtotales y total, alineado a la derecha
+    total_style = estilo('total_informe')
 
     # Subtotales y total general
     elements.append(Paragraph(f"Subtotal Tarjeta de Crédito: ${subtotal_credito:.2f}", total_style))
@@ -244,14 +291,18 @@ def crear_informe_ingresos_pdf(ingresos, fecha_inicio, fecha_fin, filepath):
 
 def _aplicar_estilo_tabla(table):
     """Aplica estilo uniforme a las tablas."""
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-    ]))
+    table.setStyle(estilo_tabla('informe'))
+
 
+QUERY_SERVICIOS_PROFESIONAL = """
+    SELECT p.nombre, p.apellido, s.nombre AS servicio, COUNT(t.id_turno) AS total_servicios
+    FROM turnos t
+    JOIN profesionales p ON t.id_profesional = p.id_profesional
+    JOIN turno_servicio ts ON t.id_turno = ts.id_turno
+    JOIN servicios s ON ts.id_servicio = s.id_servicio
+    WHERE t.fecha BETWEEN ? AND ?
+    GROUP BY p.nombre, p.apellido, s.nombre
+"""
 
 # Informe de servicios realizados por profesional
 @informes_bp.route('/servicios-profesional', methods=['POST'])
@@ -275,16 +326,7 @@ def generar_informe_servicios_profesional():
     if conn:
         try:
             cursor = conn.cursor()
-            query = """
-                SELECT p.nombre, p.apellido, s.nombre AS servicio, COUNT(t.id_turno) AS total_servicios
-                FROM turnos t
-                JOIN profesionales p ON t.id_profesional = p.id_profesional
-                JOIN turno_servicio ts ON t.id_turno = ts.id_turno
-                JOIN servicios s ON ts.id_servicio = s.id_servicio
-                WHERE t.fecha BETWEEN ? AND ?
-                GROUP BY p.nombre, p.apellido, s.nombre
-            """
-            cursor.execute(query, (fecha_inicio, fecha_fin))
+            cursor.execute(QUERY_SERVICIOS_PROFESIONAL, (fecha_inicio, fecha_fin))
             servicios = cursor.fetchall()
 
             # Devolver los datos como JSON para mostrarlos en el frontend
@@ -316,50 +358,36 @@ def descargar_informe_servicios_profesional_pdf():
             'fecha_fin_original': fecha_fin_original
         }), 400
 
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            query = """
-                SELECT p.nombre, p.apellido, s.nombre AS servicio, COUNT(t.id_turno) AS total_servicios
-                FROM turnos t
-                JOIN profesionales p ON t.id_profesional = p.id_profesional
-                JOIN turno_servicio ts ON t.id_turno = ts.id_turno
-                JOIN servicios s ON ts.id_servicio = s.id_servicio
-                WHERE t.fecha BETWEEN ? AND ?
-                GROUP BY p.nombre, p.apellido, s.nombre
-            """
-            cursor.execute(query, (fecha_inicio, fecha_fin))
-            servicios = cursor.fetchall()
+    fecha_inicio_safe, fecha_fin_safe = sanitizar_nombre_archivo(fecha_inicio_original, fecha_fin_original)
+    nombre_archivo = f'servicios_profesional_{fecha_inicio_safe}_a_{fecha_fin_safe}.pdf'
+    args = (fecha_inicio, fecha_fin, fecha_inicio_original, fecha_fin_original)
 
-            # Sanitizar los nombres de archivo
-            fecha_inicio_safe, fecha_fin_safe = sanitizar_nombre_archivo(fecha_inicio_original, fecha_fin_original)
+    if pedido_asincrono(data):
+        return encolar_pdf('informe_servicios_profesional', nombre_archivo, generar_pdf_servicios_profesional, *args)
 
-            # Crear el archivo PDF en un directorio temporal
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f'_servicios_profesional_{fecha_inicio_safe}_a_{fecha_fin_safe}.pdf') as tmp_file:
-                filepath = tmp_file.name
+    try:
+        return _descargar_informe(nombre_archivo, generar_pdf_servicios_profesional, args)
+    except Exception as e:
+        print(f"Error generando el PDF de servicios por profesional: {e}")
+        return jsonify({'error': 'Error al generar el PDF de servicios por profesional.'}), 500
 
-            crear_informe_servicios_pdf(servicios, fecha_inicio_original, fecha_fin_original, filepath)
+def generar_pdf_servicios_profesional(fecha_inicio, fecha_fin, fecha_inicio_original, fecha_fin_original, filepath):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERY_SERVICIOS_PROFESIONAL, (fecha_inicio, fecha_fin))
+        servicios = cursor.fetchall()
 
-            return send_file(filepath, as_attachment=True)
-        except Exception as e:
-            print(f"Error generando el PDF de servicios por profesional: {e}")
-            return jsonify({'error': 'Error al generar el PDF de servicios por profesional.'}), 500
-        finally:
-            conn.close()
-    else:
-        return jsonify({'error': 'Error al conectar con la base de datos.'}), 500
+    crear_informe_servicios_pdf(servicios, fecha_inicio_original, fecha_fin_original, filepath)
 
 def crear_informe_servicios_pdf(servicios, fecha_inicio, fecha_fin, filepath):
     doc = SimpleDocTemplate(filepath, pagesize=letter)
-    styles = getSampleStyleSheet()
 
     elements = []
-    elements.append(Paragraph(f"Informe de Servicios por Profesional - {fecha_inicio} a {fecha_fin}", styles['Title']))
+    elements.append(Paragraph(f"Informe de Servicios por Profesional - {fecha_inicio} a {fecha_fin}", estilo('titulo')))
 
-    logo_path = os.path.join('static', 'logo.png')
-    if os.path.exists(logo_path):
-        elements.append(Image(logo_path, width=120, height=60))
+    im = logo(120, 60)
+    if im:
+        elements.append(im)
     
     elements.append(Spacer(1, 12))
 
@@ -368,13 +396,7 @@ def crear_informe_servicios_pdf(servicios, fecha_inicio, fecha_fin, filepath):
         data.append([f"{row.nombre} {row.apellido}", row.servicio, row.total_servicios])
 
     table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold')
-    ]))
+    _aplicar_estilo_tabla(table)
 
     elements.append(table)
     doc.build(elements)
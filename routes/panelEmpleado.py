@@ -3,7 +3,8 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required
 from database import get_db_connection
-from datetime import datetime
+from catalogo import catalogo, profesionales_resumen
+from datetime import datetime, timedelta
 
 panel_empleado_bp = Blueprint('panel_empleado_bp', __name__, url_prefix='/api/empleado')
 
@@ -21,11 +22,12 @@ def pagos_del_dia():
                 FROM pagos p
                 JOIN turnos t ON p.id_turno = t.id_turno
                 JOIN clientes c ON t.id_cliente = c.id_cliente
-                WHERE CAST(p.fecha_pago AS DATE) = ? 
+                WHERE p.fecha_pago >= ? AND p.fecha_pago < ?
                 AND p.metodo_pago != 'Pendiente'
                 ORDER BY p.fecha_pago ASC
             """
-            cursor.execute(query, (fecha_actual,))
+            # Rango sobre fecha_pago en lugar de CAST, para poder usar el índice
+            cursor.execute(query, (fecha_actual, fecha_actual + timedelta(days=1)))
             pagos = cursor.fetchall()
             
             pagos_list = [
@@ -51,15 +53,11 @@ def pagos_del_dia():
 @panel_empleado_bp.route('/profesionales', methods=['GET'])
 @login_required
 def listar_profesionales():
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id_profesional, nombre, apellido FROM profesionales ORDER BY nombre ASC")
-        profesionales = cursor.fetchall()
-        profesionales_list = [dict(zip([column[0] for column in cursor.description], row)) for row in profesionales]
-        conn.close()
-        return jsonify(profesionales_list), 200
-    return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+    try:
+        return catalogo.responder('profesionales', profesionales_resumen)
+    except Exception as e:
+        print(f"Error al listar los profesionales: {e}")
+        return jsonify({'error': 'Error de conexión a la base de datos'}), 500
 
 @panel_empleado_bp.route('/clientes-profesional', methods=['GET'])
 @login_required
@@ -1,8 +1,12 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response
+import json
 from flask_login import login_required, current_user
 from database import get_db_connection
+from dialecto import dialecto
+from disponibilidad import disponibilidad
+from catalogo import catalogo
+from config import Config
 from datetime import datetime, timedelta
-from random import choice
 
 reservas_bp = Blueprint('reservas_bp', __name__, url_prefix='/api/reservas')
 
@@ -17,22 +21,65 @@ def obtener_horas_reservadas(fecha):
     if not current_user.id_cliente:
         return jsonify({'error': 'Usuario no asociado a un cliente.'}), 403
 
+    id_servicio = request.args.get('id_servicio', type=int)
+
     conn = get_db_connection()
     if conn:
         cursor = conn.cursor()
-        query = """
-            SELECT hora 
-            FROM turnos 
-            WHERE fecha = ? AND estado = 'Pendiente'
-        """
-        cursor.execute(query, (fecha_obj,))
-        resultados = cursor.fetchall()
-        conn.close()
-        horas_reservadas = [fila.hora.strftime('%H:%M') for fila in resultados]
+        try:
+            # Horas en las que ningún profesional queda libre para el servicio pedido
+            duracion = disponibilidad.duracion_servicio(id_servicio, cursor) if id_servicio else None
+            horas_reservadas = disponibilidad.horas_ocupadas(fecha_obj, cursor, duracion)
+        finally:
+            conn.close()
         return jsonify({'horas_reservadas': horas_reservadas}), 200
     else:
         return jsonify({'error': 'Error de conexión a la base de datos.'}), 500
 
+@reservas_bp.route('/disponibilidad', methods=['GET'])
+@login_required
+def disponibilidad_rango():
+    try:
+        desde = datetime.strptime(request.args.get('desde', ''), '%Y-%m-%d').date()
+        hasta = datetime.strptime(request.args.get('hasta', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Parámetros desde y hasta requeridos con formato YYYY-MM-DD.'}), 400
+
+    if hasta < desde:
+        return jsonify({'error': 'La fecha hasta no puede ser anterior a desde.'}), 400
+    if (hasta - desde).days + 1 > Config.DISPONIBILIDAD_MAX_DIAS:
+        return jsonify({'error': f'El rango no puede superar {Config.DISPONIBILIDAD_MAX_DIAS} días.'}), 400
+
+    id_servicio = request.args.get('id_servicio', type=int)
+    id_profesional = request.args.get('id_profesional', type=int)
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Error de conexión a la base de datos.'}), 500
+    try:
+        cursor = conn.cursor()
+        duracion = disponibilidad.duracion_servicio(id_servicio, cursor) if id_servicio else None
+        ocupacion = disponibilidad.ocupacion_rango(desde, hasta, cursor, id_profesional)
+    except Exception as e:
+        print(f"Error al consultar la disponibilidad: {e}")
+        return jsonify({'error': 'Error al consultar la disponibilidad.'}), 500
+    finally:
+        conn.close()
+
+    def generar():
+        # Un día por fragmento, sin esperar a serializar el rango completo
+        yield '{"dias":{'
+        for i, (fecha, ocupaciones) in enumerate(ocupacion.items()):
+            dia = {
+                'ocupadas': disponibilidad.horas_ocupadas_de(ocupaciones, duracion),
+                'libres': disponibilidad.horas_libres_de(ocupaciones, duracion),
+            }
+            yield f'{"," if i else ""}"{fecha.isoformat()}":{json.dumps(dia, separators=(",", ":"))}'
+        yield '}}'
+
+    return Response(generar(), mimetype='application/json')
+
+
 @reservas_bp.route('/crear', methods=['POST'])
 @login_required
 def crear_reserva():
@@ -63,31 +110,24 @@ def crear_reserva():
     if conn:
         cursor = conn.cursor()
         try:
-            # Verificar si la hora ya está reservada
-            query_verificar = """
-                SELECT * 
-                FROM turnos 
-                WHERE fecha = ? AND hora = ? AND estado = 'Pendiente'
-            """
-            cursor.execute(query_verificar, (fecha_obj, hora_obj))
-            turno_existente = cursor.fetchone()
-            if turno_existente:
+            servicio = catalogo.servicio(id_servicio, cursor)
+            if not servicio:
                 conn.close()
-                return jsonify({'error': 'La hora seleccionada ya está reservada.'}), 400
-            
-            # Asignar un profesional disponible (seleccionamos el primero disponible)
-            cursor.execute("SELECT id_profesional FROM profesionales")
-            profesionales = cursor.fetchall()
-            if not profesionales:
+                return jsonify({'error': 'Servicio no encontrado.'}), 400
+            precio, duracion = servicio['precio'], servicio['duracion']
+
+            # Asignar el profesional libre en ese horario con menos turnos en el día
+            id_profesional = disponibilidad.asignar_profesional(fecha_obj, hora_obj, duracion, cursor)
+            if id_profesional is None:
                 conn.close()
-                return jsonify({'error': 'No hay profesionales disponibles.'}), 400
-            id_profesional = choice([p[0] for p in profesionales])
+                return jsonify({'error': 'La hora seleccionada ya está reservada.'}), 400
             
             # Insertar la nueva reserva en la tabla turnos y obtener el id_turno generado
-            query_insertar_turno = """
+            query_insertar_turno = f"""
                 INSERT INTO turnos (fecha, hora, id_cliente, id_profesional, estado)
-                OUTPUT INSERTED.id_turno
+                {dialecto.output('id_turno')}
                 VALUES (?, ?, ?, ?, 'Pendiente')
+                {dialecto.returning('id_turno')}
             """
             cursor.execute(query_insertar_turno, (fecha_obj, hora_obj, current_user.id_cliente, id_profesional))
             id_turno = cursor.fetchone()[0]
@@ -105,14 +145,6 @@ def crear_reserva():
             cursor.execute(query_insertar_turno_servicio, (id_turno, id_servicio))
             
             # Insertar un pago pendiente en la tabla pagos
-            cursor.execute("SELECT precio FROM servicios WHERE id_servicio = ?", (id_servicio,))
-            servicio = cursor.fetchone()
-            if not servicio:
-                conn.rollback()
-                conn.close()
-                return jsonify({'error': 'Servicio no encontrado.'}), 400
-            precio = servicio[0]
-            
             query_insertar_pago = """
                 INSERT INTO pagos (id_turno, monto, metodo_pago)
                 VALUES (?, ?, 'Pendiente')
@@ -121,7 +153,14 @@ def crear_reserva():
             
             conn.commit()
             conn.close()
+            disponibilidad.reservar(fecha_obj, id_turno, id_profesional, hora_obj, duracion)
             return jsonify({'mensaje': 'Reserva creada exitosamente.'}), 201
+        except dialecto.modulo.IntegrityError:
+            # Otro worker reservó el mismo horario del profesional (UX_turnos_profesional_horario_pendiente)
+            conn.rollback()
+            conn.close()
+            disponibilidad.invalidar(fecha_obj)
+            return jsonify({'error': 'La hora seleccionada ya está reservada.'}), 409
         except Exception as e:
             conn.rollback()
             conn.close()
@@ -141,74 +180,7 @@ def historial_reservas():
     if conn:
         cursor = conn.cursor()
 
-        # Parámetro de referencia de 48 horas para la comparación
-        cutoff_date = "DATEADD(HOUR, -48, GETDATE())"
-
-        # Eliminar dependencias de turnos no pagados y anteriores a 48 horas
-        try:
-            # Eliminar de turno_servicio
-            query_eliminar_turno_servicio = f"""
-                DELETE FROM turno_servicio
-                WHERE id_turno IN (
-                    SELECT t.id_turno
-                    FROM turnos t
-                    LEFT JOIN pagos p ON t.id_turno = p.id_turno
-                    WHERE DATEADD(SECOND, DATEDIFF(SECOND, 0, t.hora), CAST(t.fecha AS DATETIME)) < {cutoff_date}
-                    AND (p.metodo_pago IS NULL OR p.metodo_pago = 'Pendiente')
-                )
-            """
-            cursor.execute(query_eliminar_turno_servicio)
-
-            # Eliminar de pagos
-            query_eliminar_pagos = f"""
-                DELETE FROM pagos
-                WHERE id_turno IN (
-                    SELECT t.id_turno
-                    FROM turnos t
-                    LEFT JOIN pagos p ON t.id_turno = p.id_turno
-                    WHERE DATEADD(SECOND, DATEDIFF(SECOND, 0, t.hora), CAST(t.fecha AS DATETIME)) < {cutoff_date}
-                    AND (p.metodo_pago IS NULL OR p.metodo_pago = 'Pendiente')
-                )
-            """
-            cursor.execute(query_eliminar_pagos)
-
-            # Eliminar de turnos
-            query_eliminar_turnos = f"""
-                DELETE FROM turnos
-                WHERE id_turno IN (
-                    SELECT t.id_turno
-                    FROM turnos t
-                    LEFT JOIN pagos p ON t.id_turno = p.id_turno
-                    WHERE DATEADD(SECOND, DATEDIFF(SECOND, 0, t.hora), CAST(t.fecha AS DATETIME)) < {cutoff_date}
-                    AND (p.metodo_pago IS NULL OR p.metodo_pago = 'Pendiente')
-                )
-            """
-            cursor.execute(query_eliminar_turnos)
-
-            # Actualizar turnos pagados cuya fecha ya pasó
-            query_actualizar_turnos_realizados = """
-                UPDATE turnos
-                SET estado = 'Realizado'
-                WHERE id_turno IN (
-                    SELECT t.id_turno
-                    FROM turnos t
-                    JOIN pagos p ON t.id_turno = p.id_turno
-                    WHERE t.id_cliente = ?
-                    AND p.metodo_pago != 'Pendiente'
-                    AND CAST(t.fecha AS DATETIME) < GETDATE()
-                )
-            """
-            cursor.execute(query_actualizar_turnos_realizados, (current_user.id_cliente,))
-            
-            # Confirmar cambios
-            conn.commit()
-
-        except Exception as e:
-            conn.rollback()
-            print(f"Error en eliminación de reservas: {e}")
-            return jsonify({'error': 'Error al procesar el historial de reservas.'}), 500
-
-        # Consulta del historial actualizado
+        # La limpieza de turnos vencidos la hace vencimientos.py; acá solo se lee
         query_historial = """
             SELECT 
                 t.id_turno,
@@ -0,0 +1,78 @@
+# routes/trabajos.py
+
+from flask import Blueprint, request, jsonify, url_for
+from flask_login import login_required, current_user
+from trabajos_pdf import cola_pdf, ColaLlenaError
+from almacenamiento import almacen, enviar
+
+trabajos_bp = Blueprint('trabajos_bp', __name__, url_prefix='/api/trabajos')
+
+
+def pedido_asincrono(data=None):
+    """True si el cliente pidió generar el PDF en segundo plano (?asincrono=1 o "asincrono": true)."""
+    if request.args.get('asincrono') in ('1', 'true'):
+        return True
+    return bool(data and data.get('asincrono') is True)
+
+
+def encolar_pdf(tipo, nombre_archivo, generar, *args):
+    """Encola la generación y responde 202 con la URL para consultar el estado."""
+    try:
+        trabajo = cola_pdf.encolar(tipo, current_user.id, nombre_archivo, generar, *args)
+    except ColaLlenaError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+
+    estado_url = url_for('trabajos_bp.estado_trabajo', id_trabajo=trabajo.id)
+    return jsonify({
+        'id_trabajo': trabajo.id,
+        'estado': trabajo.estado,
+        'estado_url': estado_url,
+        'descarga_url': url_for('trabajos_bp.descargar_trabajo', id_trabajo=trabajo.id),
+    }), 202, {'Location': estado_url}
+
+
+def _trabajo_del_usuario(id_trabajo):
+    trabajo = cola_pdf.obtener(id_trabajo)
+    # Un trabajo ajeno se responde igual que uno inexistente
+    if trabajo is None or trabajo.id_usuario != str(current_user.id):
+        return None
+    return trabajo
+
+
+@trabajos_bp.route('/<id_trabajo>', methods=['GET'])
+@login_required
+def estado_trabajo(id_trabajo):
+    trabajo = _trabajo_del_usuario(id_trabajo)
+    if not trabajo:
+        return jsonify({'error': 'Trabajo no encontrado.'}), 404
+
+    datos = trabajo.to_dict()
+    del datos['id_usuario']
+    if trabajo.estado == 'listo':
+        datos['descarga_url'] = url_for('trabajos_bp.descargar_trabajo', id_trabajo=trabajo.id)
+    return jsonify(datos), 200
+
+
+@trabajos_bp.route('/<id_trabajo>/descargar', methods=['GET'])
+@login_required
+def descargar_trabajo(id_trabajo):
+    trabajo = _trabajo_del_usuario(id_trabajo)
+    if not trabajo:
+        return jsonify({'error': 'Trabajo no encontrado.'}), 404
+    if trabajo.estado == 'error':
+        return jsonify({'error': trabajo.error}), 500
+    if trabajo.estado != 'listo':
+        return jsonify({'error': 'El PDF todavía se está generando.', 'estado': trabajo.estado}), 409, {'Retry-After': '2'}
+
+    clave = cola_pdf.clave_pdf(trabajo.id)
+    if not almacen.existe(clave):
+        return jsonify({'error': 'El PDF ya no está disponible; volver a generarlo.'}), 410
+    return enviar(almacen, clave, trabajo.nombre_archivo)
+
+
+@trabajos_bp.route('/estadisticas', methods=['GET'])
+@login_required
+def estadisticas_trabajos():
+    if current_user.rol != 'admin':
+        return jsonify({'error': 'Solo un administrador puede ver las estadísticas de la cola.'}), 403
+    return jsonify(cola_pdf.stats()), 200
@@ -0,0 +1,72 @@
+# tests/conftest.py
+"""Configuración común: las pruebas corren contra una base SQLite temporal y un
+almacén en disco temporal, sin SQL Server ni procesos de fondo."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+_DIRECTORIO = tempfile.mkdtemp(prefix='spa_pruebas_')
+
+# Antes de importar config.py: la configuración se lee al importarlo
+os.environ.update({
+    'DB_MOTOR': 'sqlite',
+    'DB_SQLITE_RUTA': os.path.join(_DIRECTORIO, 'spa.db'),
+    'ALMACEN': 'local',
+    'ALMACEN_DIR': os.path.join(_DIRECTORIO, 'almacen'),
+    'TRABAJOS_DIR': os.path.join(_DIRECTORIO, 'trabajos'),
+    'BARRIDO_INTERVALO': '0',
+    'DB_SERVER_TIMING': 'false',
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def base():
+    """Aplica las migraciones a la base temporal y carga un catálogo mínimo:
+    dos profesionales, un servicio de 60 minutos y otro de 30, y un cliente."""
+    import migrar
+    from dialecto import dialecto
+
+    migrar.aplicar()
+    conn = dialecto.conectar()
+    conn.executemany("INSERT INTO profesionales (nombre, apellido, email) VALUES (?, ?, ?)",
+                     [('Ana', 'Paz', 'ana@ejemplo.com'), ('Bruno', 'Sosa', 'bruno@ejemplo.com')])
+    conn.executemany("INSERT INTO servicios (nombre, duracion, precio) VALUES (?, ?, ?)",
+                     [('Masaje', 60, '100.00'), ('Limpieza facial', 30, '50.00')])
+    conn.execute("INSERT INTO clientes (nombre, apellido, email) VALUES ('Carla', 'Ruiz', 'carla@ejemplo.com')")
+    conn.commit()
+    conn.close()
+    return os.environ['DB_SQLITE_RUTA']
+
+
+@pytest.fixture
+def conn(base):
+    """Conexión a la base de pruebas; al terminar borra los turnos que haya creado la prueba."""
+    from catalogo import catalogo
+    from dialecto import dialecto
+
+    catalogo.invalidar()
+    conexion = dialecto.conectar()
+    yield conexion
+    conexion.rollback()
+    for tabla in ('facturas', 'ingresos_diarios', 'pagos', 'turno_servicio', 'turnos'):
+        conexion.execute(f"DELETE FROM {tabla}")
+    conexion.commit()
+    conexion.close()
+    catalogo.invalidar()
+
+
+@pytest.fixture
+def crear_turno(conn):
+    """Inserta un turno con su servicio directamente en la base, sin pasar por las rutas."""
+    def crear(fecha, hora, id_profesional, id_servicio, estado='Pendiente'):
+        cursor = conn.execute("INSERT INTO turnos (fecha, hora, id_cliente, id_profesional, estado) "
+                              "VALUES (?, ?, 1, ?, ?)", (fecha, hora, id_profesional, estado))
+        id_turno = cursor.lastrowid
+        conn.execute("INSERT INTO turno_servicio (id_turno, id_servicio) VALUES (?, ?)", (id_turno, id_servicio))
+        conn.commit()
+        return id_turno
+    return crear
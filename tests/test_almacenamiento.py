@@ -0,0 +1,169 @@
+# tests/test_almacenamiento.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from almacenamiento import AlmacenLocal, AlmacenS3
+
+
+class ErrorCliente(Exception):
+    """Imita botocore.exceptions.ClientError: el código viaja en ``response``."""
+
+    def __init__(self, codigo):
+        super().__init__(codigo)
+        self.response = {'Error': {'Code': codigo}}
+
+
+class Cuerpo:
+    def __init__(self, datos):
+        self._datos = datos
+
+    def read(self, *args):
+        datos, self._datos = self._datos, b''
+        return datos
+
+
+class ClienteS3Falso:
+    """Bucket en memoria con las llamadas de boto3 que usa AlmacenS3."""
+
+    def __init__(self, por_pagina=1000):
+        self.objetos = {}  # (bucket, clave) -> (datos, fecha)
+        self.por_pagina = por_pagina
+
+    def upload_file(self, ruta, bucket, clave):
+        with open(ruta, 'rb') as archivo:
+            self.objetos[(bucket, clave)] = (archivo.read(), datetime.now(timezone.utc))
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objetos:
+            raise ErrorCliente('404')
+        datos, fecha = self.objetos[(Bucket, Key)]
+        return {'ContentLength': len(datos), 'LastModified': fecha}
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objetos:
+            raise ErrorCliente('NoSuchKey')
+        return {'Body': Cuerpo(self.objetos[(Bucket, Key)][0])}
+
+    def delete_object(self, Bucket, Key):
+        self.objetos.pop((Bucket, Key), None)
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None):
+        claves = sorted(clave for bucket, clave in self.objetos if bucket == Bucket and clave.startswith(Prefix))
+        inicio = int(ContinuationToken or 0)
+        pagina = claves[inicio:inicio + self.por_pagina]
+        respuesta = {
+            'Contents': [{'Key': clave, 'Size': len(self.objetos[(Bucket, clave)][0]),
+                          'LastModified': self.objetos[(Bucket, clave)][1]} for clave in pagina],
+            'IsTruncated': inicio + self.por_pagina < len(claves),
+        }
+        if respuesta['IsTruncated']:
+            respuesta['NextContinuationToken'] = str(inicio + self.por_pagina)
+        return respuesta
+
+    def envejecer(self, bucket, clave, segundos):
+        datos, fecha = self.objetos[(bucket, clave)]
+        self.objetos[(bucket, clave)] = (datos, fecha - timedelta(seconds=segundos))
+
+
+def _escribir(datos):
+    def generar(ruta):
+        with open(ruta, 'wb') as archivo:
+            archivo.write(datos)
+    return generar
+
+
+@pytest.fixture
+def s3():
+    cliente = ClienteS3Falso(por_pagina=2)
+    return AlmacenS3('spa', cliente=cliente), cliente
+
+
+def test_s3_guardar_y_leer(s3):
+    almacen, cliente = s3
+    almacen.guardar_archivo('facturas/factura_1_v1.pdf', _escribir(b'%PDF-1'))
+
+    assert almacen.ruta_local('facturas/factura_1_v1.pdf') is None
+    assert almacen.existe('facturas/factura_1_v1.pdf')
+    assert almacen.info('facturas/factura_1_v1.pdf')[0] == 6
+    assert almacen.abrir('facturas/factura_1_v1.pdf').read() == b'%PDF-1'
+
+
+def test_s3_clave_inexistente(s3):
+    almacen, _ = s3
+    assert almacen.info('facturas/no_existe.pdf') is None
+    assert not almacen.existe('facturas/no_existe.pdf')
+
+
+def test_s3_otros_errores_se_propagan(s3):
+    almacen, cliente = s3
+
+    def denegado(**kwargs):
+        raise ErrorCliente('AccessDenied')
+    cliente.head_object = denegado
+
+    with pytest.raises(ErrorCliente):
+        almacen.existe('facturas/factura_1_v1.pdf')
+
+
+def test_s3_generacion_fallida_no_publica(s3):
+    almacen, cliente = s3
+
+    def generar(ruta):
+        raise RuntimeError('falló reportlab')
+
+    with pytest.raises(RuntimeError):
+        almacen.guardar_archivo('facturas/factura_2_v1.pdf', generar)
+    assert cliente.objetos == {}
+
+
+def test_s3_listar_recorre_todas_las_paginas(s3):
+    almacen, _ = s3
+    for i in range(5):
+        almacen.guardar_archivo(f'informes/informe_{i}.pdf', _escribir(b'x'))
+    almacen.guardar_archivo('facturas/factura_1_v1.pdf', _escribir(b'x'))
+
+    claves = [clave for clave, _, _ in almacen.listar('informes/')]
+    assert claves == [f'informes/informe_{i}.pdf' for i in range(5)]
+
+
+def test_s3_purgar_por_edad(s3):
+    almacen, cliente = s3
+    for i in range(3):
+        almacen.guardar_archivo(f'informes/informe_{i}.pdf', _escribir(b'x'))
+    cliente.envejecer('spa', 'informes/informe_0.pdf', 7200)
+    cliente.envejecer('spa', 'informes/informe_1.pdf', 7200)
+
+    assert almacen.purgar('informes/', max_edad=3600) == 2
+    assert [clave for clave, _, _ in almacen.listar('informes/')] == ['informes/informe_2.pdf']
+
+
+def test_s3_purgar_por_tamaño_borra_los_mas_viejos(s3):
+    almacen, cliente = s3
+    for i in range(4):
+        almacen.guardar_archivo(f'informes/informe_{i}.pdf', _escribir(b'x' * 10))
+        cliente.envejecer('spa', f'informes/informe_{i}.pdf', 100 - i)
+
+    assert almacen.purgar('informes/', max_bytes=25) == 2
+    assert not almacen.existe('informes/informe_0.pdf')
+    assert not almacen.existe('informes/informe_1.pdf')
+    assert almacen.existe('informes/informe_3.pdf')
+
+
+def test_local_rechaza_claves_fuera_del_espacio(tmp_path):
+    almacen = AlmacenLocal(str(tmp_path))
+    for clave in ('facturas/../x.pdf', 'facturas/', 'facturas/.oculto'):
+        with pytest.raises(ValueError):
+            almacen.existe(clave)
+
+
+def test_local_guardar_listar_y_purgar(tmp_path):
+    almacen = AlmacenLocal(str(tmp_path))
+    almacen.guardar_archivo('informes/a.pdf', _escribir(b'abc'))
+    almacen.guardar_archivo('informes/b.pdf', _escribir(b'defg'))
+
+    with almacen.abrir('informes/a.pdf') as archivo:
+        assert archivo.read() == b'abc'
+    assert sorted(clave for clave, _, _ in almacen.listar('informes/')) == ['informes/a.pdf', 'informes/b.pdf']
+    assert almacen.purgar('informes/', max_bytes=0) == 2
+    assert list(almacen.listar('informes/')) == []
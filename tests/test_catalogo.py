@@ -0,0 +1,106 @@
+# tests/test_catalogo.py
+import json
+import time
+
+import pytest
+from flask import Flask
+
+import catalogo as modulo
+from catalogo import Catalogo, profesionales_resumen
+
+
+class CursorContado:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.consultas = 0
+
+    def execute(self, sql, *params):
+        self.consultas += 1
+        return self._cursor.execute(sql, *params)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+@pytest.fixture
+def cursor(conn):
+    return CursorContado(conn.cursor())
+
+
+def test_carga_una_vez_por_ttl(cursor):
+    catalogo = Catalogo(ttl=60)
+    primera = catalogo.instantanea(cursor)
+    assert catalogo.instantanea(cursor) is primera
+    assert cursor.consultas == 2  # servicios y profesionales
+
+    assert [s['nombre'] for s in primera.servicios.values()] == ['Masaje', 'Limpieza facial']
+    assert [p['nombre'] for p in primera.profesionales] == ['Ana', 'Bruno']
+
+
+def test_vence_con_el_ttl(cursor):
+    catalogo = Catalogo(ttl=0.05)
+    primera = catalogo.instantanea(cursor)
+    time.sleep(0.1)
+    segunda = catalogo.instantanea(cursor)
+
+    assert segunda is not primera
+    assert segunda.version > primera.version
+
+
+def test_invalidar_sube_la_version(cursor):
+    catalogo = Catalogo(ttl=60)
+    primera = catalogo.instantanea(cursor)
+    catalogo.invalidar()
+
+    assert catalogo.version > primera.version
+    assert catalogo.instantanea(cursor).version > primera.version
+
+
+def test_servicio_desconocido_recarga_con_limite(cursor, monkeypatch):
+    catalogo = Catalogo(ttl=60)
+    assert catalogo.servicio('1', cursor)['duracion'] == 60
+    assert catalogo.servicio('x', cursor) is None
+    consultas = cursor.consultas
+
+    # Recién cargado: un id desconocido no vuelve a consultar la base
+    assert catalogo.servicio(99, cursor) is None
+    assert cursor.consultas == consultas
+
+    monkeypatch.setattr(modulo, 'RECARGA_MINIMA', 0)
+    time.sleep(0.01)
+    assert catalogo.servicio(99, cursor) is None
+    assert cursor.consultas == consultas + 2
+
+
+def test_profesionales_resumen(cursor):
+    resumen = profesionales_resumen(Catalogo(ttl=60).instantanea(cursor))
+    assert resumen == [
+        {'id_profesional': 1, 'nombre': 'Ana', 'apellido': 'Paz'},
+        {'id_profesional': 2, 'nombre': 'Bruno', 'apellido': 'Sosa'},
+    ]
+
+
+def test_responder_con_etag_y_304(conn):
+    catalogo = Catalogo(ttl=60)
+    app = Flask(__name__)
+    llamadas = []
+
+    def construir(instantanea):
+        llamadas.append(instantanea.version)
+        return profesionales_resumen(instantanea)
+
+    with app.test_request_context('/api/admin/profesionales'):
+        respuesta = catalogo.responder('profesionales', construir)
+        etag = respuesta.get_etag()[0]
+        assert respuesta.status_code == 200
+        assert len(json.loads(respuesta.get_data())) == 2
+
+    with app.test_request_context('/api/admin/profesionales', headers={'If-None-Match': f'"{etag}"'}):
+        assert catalogo.responder('profesionales', construir).status_code == 304
+    assert len(llamadas) == 1  # se serializa una vez por versión
+
+    # Mismo contenido en otra versión: mismo ETag, como en otro worker
+    catalogo.invalidar()
+    with app.test_request_context('/api/admin/profesionales', headers={'If-None-Match': f'"{etag}"'}):
+        assert catalogo.responder('profesionales', construir).status_code == 304
+    assert len(llamadas) == 2
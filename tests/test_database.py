@@ -0,0 +1,130 @@
+# tests/test_database.py
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database import ConnectionPool, PoolTimeoutError
+
+
+class Fabrica:
+    """Abre conexiones SQLite en memoria y recuerda cuántas abrió."""
+
+    def __init__(self):
+        self.abiertas = []
+
+    def __call__(self):
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self.abiertas.append(conn)
+        return conn
+
+
+def _pool(**opciones):
+    fabrica = Fabrica()
+    parametros = dict(size=2, max_overflow=1, timeout=0.2, recycle=1800, pre_ping=None)
+    parametros.update(opciones)
+    return ConnectionPool(fabrica, **parametros), fabrica
+
+
+def test_reutiliza_la_conexion_devuelta():
+    pool, fabrica = _pool()
+    conn = pool.acquire()
+    conn.close()
+    conn.close()  # cerrar dos veces no la devuelve dos veces
+    pool.acquire().close()
+
+    assert len(fabrica.abiertas) == 1
+    assert pool.stats()['reutilizadas'] == 1
+    assert pool.stats()['libres'] == 1
+
+
+def test_conexion_devuelta_no_se_puede_usar():
+    pool, _ = _pool()
+    conn = pool.acquire()
+    conn.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.cursor()
+
+
+def test_desborde_y_timeout():
+    pool, fabrica = _pool()
+    prestadas = [pool.acquire() for _ in range(3)]  # size + max_overflow
+    assert pool.stats()['en_uso'] == 3
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+
+    for conn in prestadas:
+        conn.close()
+    # Solo se conservan ``size`` inactivas; la de desborde se cierra
+    stats = pool.stats()
+    assert stats['libres'] == 2
+    assert stats['abiertas'] == 2
+    assert stats['descartadas'] == 1
+    assert len(fabrica.abiertas) == 3
+
+
+def test_espera_a_que_se_libere_una_conexion():
+    pool, _ = _pool(size=1, max_overflow=0, timeout=2)
+    conn = pool.acquire()
+    threading.Timer(0.1, conn.close).start()
+
+    inicio = time.monotonic()
+    pool.acquire().close()
+    assert time.monotonic() - inicio >= 0.05
+    assert pool.stats()['esperas'] >= 1
+
+
+def test_recicla_conexiones_viejas():
+    pool, fabrica = _pool(recycle=0.05)
+    pool.acquire().close()
+    time.sleep(0.1)
+    pool.acquire().close()
+
+    assert len(fabrica.abiertas) == 2
+    assert pool.stats()['descartadas'] == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        fabrica.abiertas[0].execute('SELECT 1')  # la reciclada quedó cerrada
+
+
+def test_pre_ping_descarta_conexiones_rotas():
+    pool, fabrica = _pool(pre_ping=0)
+    pool.acquire().close()
+    fabrica.abiertas[0].close()  # p. ej. el servidor cortó la conexión
+    time.sleep(0.01)
+
+    conn = pool.acquire()
+    assert conn.cursor().execute('SELECT 1').fetchone()[0] == 1
+    assert len(fabrica.abiertas) == 2
+
+
+def test_error_al_conectar_devuelve_el_lugar():
+    llamadas = []
+
+    def conectar():
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            raise sqlite3.OperationalError('servidor caído')
+        return sqlite3.connect(':memory:', check_same_thread=False)
+
+    pool = ConnectionPool(conectar, size=1, max_overflow=0, timeout=0.2, pre_ping=None)
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    pool.acquire().close()
+    assert pool.stats()['abiertas'] == 1
+
+
+def test_devolver_descarta_la_transaccion_abierta():
+    pool, _ = _pool(size=1, max_overflow=0)
+    conn = pool.acquire()
+    cursor = conn.cursor()
+    cursor.execute('CREATE TABLE t (x INTEGER)')
+    conn.commit()
+    cursor.execute('INSERT INTO t VALUES (1)')
+    conn.close()
+
+    conn = pool.acquire()
+    assert conn.cursor().execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,152 @@
+# tests/test_disponibilidad.py
+from datetime import date, time
+
+import pytest
+
+from disponibilidad import IndiceDisponibilidad, _duracion_minutos
+
+FECHA = date(2030, 1, 7)
+ANA, BRUNO = 1, 2
+MASAJE, FACIAL = 1, 2  # 60 y 30 minutos
+
+
+class CursorContado:
+    """Cursor que cuenta las consultas y puede correr algo en medio de una."""
+
+    def __init__(self, cursor, durante=None):
+        self._cursor = cursor
+        self.durante = durante
+        self.consultas = 0
+
+    def execute(self, sql, *params):
+        self.consultas += 1
+        self._cursor.execute(sql, *params)
+        if self.durante and 'FROM turnos' in sql:
+            durante, self.durante = self.durante, None
+            durante()
+        return self
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+@pytest.fixture
+def indice():
+    return IndiceDisponibilidad(slot_minutos=30, apertura='08:00', cierre='20:00', ttl=60)
+
+
+def test_duracion_minutos():
+    assert _duracion_minutos(60) == 60
+    assert _duracion_minutos('60') == 60
+    assert _duracion_minutos(time(1, 30)) == 90
+    assert _duracion_minutos('00:45') == 45
+    assert _duracion_minutos(None) == 30
+
+
+def test_mascara_por_slots(indice):
+    assert indice._mascara('10:00', 60) == 0b11 << 20
+    assert indice._mascara(time(10, 30), 30) == 1 << 21
+    assert indice._mascara('10:00', 45) == 0b11 << 20  # se redondea al slot siguiente
+
+
+def test_horas_ocupadas_segun_duracion(indice, conn, crear_turno):
+    crear_turno(FECHA, time(10, 0), ANA, MASAJE)     # Ana 10:00-11:00
+    crear_turno(FECHA, time(10, 30), BRUNO, FACIAL)  # Bruno 10:30-11:00
+    cursor = conn.cursor()
+
+    assert indice.horas_ocupadas(FECHA, cursor, 30) == ['10:30']
+    assert indice.horas_ocupadas(FECHA, cursor, 60) == ['10:00', '10:30']
+    assert indice.horas_ocupadas(FECHA, cursor, 30, id_profesional=ANA) == ['10:00', '10:30']
+    assert '10:00' in indice.horas_libres(FECHA, cursor, 30)
+
+
+def test_profesional_libre_con_menos_turnos(indice, conn, crear_turno):
+    id_turno = crear_turno(FECHA, time(9, 0), ANA, MASAJE)
+    cursor = conn.cursor()
+
+    assert indice.profesional_libre(FECHA, '12:00', 60, cursor) == BRUNO
+    assert indice.profesional_libre(FECHA, '09:00', 60, cursor) == BRUNO
+    # Al mover el turno de Ana su horario actual no cuenta como ocupado
+    assert indice.profesional_libre(FECHA, '09:30', 30, cursor, excluir=id_turno) == ANA
+
+
+def test_reservar_y_liberar_sin_recargar(indice, conn):
+    cursor = CursorContado(conn.cursor())
+    assert indice.horas_ocupadas(FECHA, cursor, 30) == []
+    consultas = cursor.consultas
+
+    indice.reservar(FECHA, 101, ANA, time(15, 0), 60)
+    indice.reservar(FECHA, 102, BRUNO, time(15, 30), 30)
+    assert indice.horas_ocupadas(FECHA, cursor, 30) == ['15:30']
+
+    indice.liberar(101)
+    assert indice.horas_ocupadas(FECHA, cursor, 30) == []
+    assert indice.horas_ocupadas(FECHA, cursor, 30, id_profesional=BRUNO) == ['15:30']
+    assert cursor.consultas == consultas
+
+
+def test_liberar_conserva_turnos_solapados(indice, conn, crear_turno):
+    # Turnos solapados del mismo profesional (datos cargados antes de los índices únicos)
+    primero = crear_turno(FECHA, time(10, 0), ANA, MASAJE)
+    crear_turno(FECHA, time(10, 30), ANA, FACIAL)
+    cursor = conn.cursor()
+    indice.horas_ocupadas(FECHA, cursor)
+
+    indice.liberar(primero)
+    assert indice.horas_ocupadas(FECHA, cursor, id_profesional=ANA) == ['10:30']
+
+
+def test_rango_carga_los_dias_con_una_consulta(indice, conn, crear_turno):
+    crear_turno(date(2030, 1, 8), time(8, 0), ANA, FACIAL)
+    cursor = CursorContado(conn.cursor())
+    indice.duracion_servicio(MASAJE, cursor)  # catálogo
+    consultas = cursor.consultas
+
+    ocupacion = indice.ocupacion_rango(FECHA, date(2030, 1, 13), cursor)
+    assert len(ocupacion) == 7
+    assert ocupacion[date(2030, 1, 8)] == [1 << 16, 0]
+    assert cursor.consultas == consultas + 1
+
+    indice.ocupacion_rango(FECHA, date(2030, 1, 13), cursor)
+    assert cursor.consultas == consultas + 1
+
+
+def test_cambio_durante_la_carga_no_se_guarda(indice, conn):
+    # Una reserva confirmada mientras se leía el día puede no estar en lo leído
+    cursor = CursorContado(conn.cursor(),
+                           durante=lambda: indice.reservar(FECHA, 201, ANA, time(11, 0), 30))
+    indice.horas_ocupadas(FECHA, cursor)
+    assert FECHA not in indice._dias
+
+    indice.horas_ocupadas(FECHA, cursor)
+    assert FECHA in indice._dias
+
+
+def test_cambio_de_otro_dia_no_descarta_la_carga(indice, conn):
+    cursor = CursorContado(conn.cursor(),
+                           durante=lambda: indice.reservar(date(2030, 2, 1), 202, ANA, time(11, 0), 30))
+    indice.horas_ocupadas(FECHA, cursor)
+    assert FECHA in indice._dias
+
+
+def test_asignar_confirma_en_la_base(indice, conn, crear_turno):
+    cursor = conn.cursor()
+    assert indice.profesional_libre(FECHA, '14:00', 60, cursor) == ANA
+
+    # Otro worker reservó a Ana sin que este índice se enterara
+    crear_turno(FECHA, time(14, 0), ANA, MASAJE)
+    assert indice.asignar_profesional(FECHA, '14:00', 60, cursor) == BRUNO
+
+    crear_turno(FECHA, time(14, 0), BRUNO, MASAJE)
+    assert indice.asignar_profesional(FECHA, '14:00', 60, cursor) is None
+
+
+def test_invalidar_recarga_el_dia(indice, conn, crear_turno):
+    cursor = conn.cursor()
+    assert indice.horas_ocupadas(FECHA, cursor) == []
+    crear_turno(FECHA, time(16, 0), ANA, FACIAL)
+    crear_turno(FECHA, time(16, 0), BRUNO, FACIAL)
+    assert indice.horas_ocupadas(FECHA, cursor) == []  # todavía el día cacheado
+
+    indice.invalidar(FECHA)
+    assert indice.horas_ocupadas(FECHA, cursor) == ['16:00']
@@ -0,0 +1,113 @@
+# tests/test_migrar.py
+import hashlib
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import migrar
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """Copia de migraciones/ que la prueba puede modificar."""
+    copia = tmp_path / 'migraciones'
+    shutil.copytree(migrar.DIRECTORIO, copia)
+    monkeypatch.setattr(migrar, 'DIRECTORIO', str(copia))
+    return copia / 'sqlite'
+
+
+def _registradas(ruta):
+    conn = sqlite3.connect(ruta)
+    try:
+        return dict(conn.execute("SELECT version, checksum FROM migraciones_aplicadas"))
+    finally:
+        conn.close()
+
+
+def test_aplica_todas_una_sola_vez(tmp_path, directorio):
+    ruta = str(tmp_path / 'spa.db')
+    todas = migrar.migraciones('sqlite')
+
+    assert migrar.aplicar(ruta) == len(todas)
+    assert migrar.aplicar(ruta) == 0
+    assert _registradas(ruta) == {m.version: m.checksum for m in todas}
+
+
+def test_checksum_del_contenido(directorio):
+    for migracion in migrar.migraciones('sqlite'):
+        with open(directorio / migracion.nombre, 'rb') as archivo:
+            assert migracion.checksum == hashlib.sha1(archivo.read()).hexdigest()
+        assert migracion.version == migracion.nombre[:4]
+
+
+def test_avisa_si_una_aplicada_cambio(tmp_path, directorio, capsys):
+    ruta = str(tmp_path / 'spa.db')
+    migrar.aplicar(ruta)
+    with open(directorio / '0001_esquema_inicial.sql', 'a') as archivo:
+        archivo.write('\n-- editada después de aplicarse\n')
+    capsys.readouterr()
+
+    assert migrar.aplicar(ruta) == 0
+    assert 'Aviso: 0001_esquema_inicial.sql cambió' in capsys.readouterr().out
+    migrar.estado(ruta)
+    assert 'modificada  0001_esquema_inicial.sql' in capsys.readouterr().out
+
+
+def test_migracion_con_error_no_queda_a_medias(tmp_path, directorio):
+    ruta = str(tmp_path / 'spa.db')
+    migrar.aplicar(ruta)
+    (directorio / '9999_rota.sql').write_text(
+        "CREATE TABLE nueva (id INTEGER);\nINSERT INTO tabla_inexistente VALUES (1);\n")
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrar.aplicar(ruta)
+    conn = sqlite3.connect(ruta)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'nueva'").fetchone()[0] == 0
+    conn.close()
+    assert '9999' not in _registradas(ruta)
+
+
+def test_duplicados_bloquean_los_indices_unicos(tmp_path, directorio, monkeypatch, capsys):
+    ruta = str(tmp_path / 'spa.db')
+    posteriores = tmp_path / 'posteriores'
+    posteriores.mkdir()
+    for archivo in os.listdir(directorio):
+        if not archivo.startswith('0001'):
+            shutil.move(str(directorio / archivo), str(posteriores / archivo))
+    migrar.aplicar(ruta)
+
+    conn = sqlite3.connect(ruta)
+    conn.execute("INSERT INTO clientes (nombre, apellido, email) VALUES ('Ana', 'Paz', 'ana@ejemplo.com')")
+    conn.executemany("INSERT INTO usuarios (id_cliente, nombre_usuario, password, email) VALUES (1, ?, 'x', ?)",
+                     [('ana', 'ana@ejemplo.com'), ('ana2', 'ANA@ejemplo.com')])
+    conn.commit()
+    conn.close()
+    for archivo in os.listdir(posteriores):
+        shutil.move(str(posteriores / archivo), str(directorio / archivo))
+
+    with pytest.raises(migrar.MigracionBloqueada) as error:
+        migrar.aplicar(ruta)
+    assert 'emails repetidos en usuarios' in str(error.value)
+    assert 'ana@ejemplo.com' in str(error.value)
+    assert set(_registradas(ruta)) == {'0001'}
+
+    # Desde la línea de comandos termina con código 1 en lugar de un traceback
+    monkeypatch.setattr('sys.argv', ['migrar.py', '--sqlite', ruta])
+    with pytest.raises(SystemExit) as salida:
+        migrar.main()
+    assert salida.value.code == 1
+
+
+def test_sentencias_sqlserver_por_lotes_go():
+    sql = "CREATE TABLE a (id INT)\nGO\n-- solo un comentario\ngo\nCREATE INDEX IX_a ON a (id)\n  GO  \n"
+    assert migrar.sentencias('sqlserver', sql) == ['CREATE TABLE a (id INT)', 'CREATE INDEX IX_a ON a (id)']
+
+
+def test_sentencias_sqlite_respeta_triggers():
+    sql = ("-- encabezado\nCREATE TABLE a (id INTEGER);\n"
+           "CREATE TRIGGER t AFTER INSERT ON a BEGIN\n    UPDATE a SET id = id;\nEND;\n")
+    partes = migrar.sentencias('sqlite', sql)
+    assert len(partes) == 2
+    assert partes[1].startswith('CREATE TRIGGER') and partes[1].endswith('END;')
@@ -0,0 +1,105 @@
+# tests/test_paginacion.py
+import pytest
+from flask import Flask
+from werkzeug.datastructures import MultiDict
+
+from paginacion import Listado
+
+NOMBRES = ['Ana', 'bruno', 'Ana', 'Carla', 'ana', 'Bruno', 'Diego', 'Ana_B']
+
+POR_ID = Listado(
+    origen='personas',
+    clave='id',
+    campos={'id': 'id', 'nombre': 'nombre', 'email': 'email'},
+    busqueda=('nombre',),
+)
+
+POR_NOMBRE = Listado(
+    origen='personas',
+    clave='id',
+    campos={'id': 'id', 'nombre': 'nombre', 'email': 'email'},
+    busqueda=('nombre',),
+    orden='nombre',
+)
+
+
+@pytest.fixture
+def cursor(conn):
+    conn.execute("CREATE TEMP TABLE personas (id INTEGER PRIMARY KEY, nombre TEXT COLLATE NOCASE, email TEXT)")
+    conn.executemany("INSERT INTO personas (id, nombre, email) VALUES (?, ?, ?)",
+                     [(i, nombre, f'p{i}@ejemplo.com') for i, nombre in enumerate(NOMBRES, start=1)])
+    app = Flask(__name__)
+    with app.test_request_context('/api/admin/personas'):
+        yield conn.cursor()
+
+
+def _paginas(listado, cursor, **args):
+    """Recorre el listado siguiendo X-Siguiente-Cursor y devuelve los ids de cada página."""
+    paginas, siguiente = [], None
+    while True:
+        pedido = dict(args)
+        if siguiente:
+            pedido['despues_de'] = siguiente
+        filas, headers = listado.consultar(cursor, MultiDict(pedido))
+        paginas.append([fila['id'] for fila in filas])
+        siguiente = headers.get('X-Siguiente-Cursor')
+        if not siguiente:
+            return paginas
+
+
+def _ids(listado, cursor, **args):
+    filas, _ = listado.consultar(cursor, MultiDict(args))
+    return [fila['id'] for fila in filas]
+
+
+def test_paginas_por_clave(cursor):
+    assert _paginas(POR_ID, cursor, limite='3') == [[1, 2, 3], [4, 5, 6], [7, 8]]
+
+
+def test_paginas_en_el_mismo_orden_que_sin_paginar(cursor):
+    completo = _ids(POR_NOMBRE, cursor)
+    assert [NOMBRES[i - 1].lower() for i in completo] == sorted(n.lower() for n in NOMBRES)
+
+    paginas = _paginas(POR_NOMBRE, cursor, limite='2')
+    assert [i for pagina in paginas for i in pagina] == completo
+    # Los empates por nombre se ordenan por la clave
+    assert completo[:3] == [1, 3, 5]
+
+
+def test_link_conserva_los_parametros(cursor):
+    _, headers = POR_ID.consultar(cursor, MultiDict({'limite': '2', 'q': 'an'}))
+    assert headers['X-Siguiente-Cursor'] == '3'
+    assert headers['Link'] == '</api/admin/personas?limite=2&q=an&despues_de=3>; rel="next"'
+
+
+def test_busqueda_por_prefijo_escapa_comodines(cursor):
+    assert _ids(POR_ID, cursor, q='an') == [1, 3, 5, 8]
+    assert _ids(POR_ID, cursor, q='Ana_') == [8]
+
+
+def test_total_y_campos(cursor):
+    filas, headers = POR_NOMBRE.consultar(cursor, MultiDict({'campos': 'email', 'total': '1', 'q': 'b'}))
+    assert headers['X-Total-Count'] == '2'
+    # La clave y el campo de orden se agregan para poder armar el cursor
+    assert set(filas[0]) == {'id', 'nombre', 'email'}
+
+    filas, _ = POR_ID.consultar(cursor, MultiDict({'campos': 'email'}))
+    assert set(filas[0]) == {'id', 'email'}
+
+
+@pytest.mark.parametrize('args', [
+    {'limite': '0'},
+    {'limite': 'abc'},
+    {'limite': '100000'},
+    {'despues_de': 'abc'},
+    {'campos': 'password'},
+])
+def test_parametros_invalidos(cursor, args):
+    with pytest.raises(ValueError):
+        POR_ID.consultar(cursor, MultiDict(args))
+
+
+@pytest.mark.parametrize('despues_de', ['abc', '3', 'WzFd', 'e30='])
+def test_cursor_invalido_por_nombre(cursor, despues_de):
+    with pytest.raises(ValueError):
+        POR_NOMBRE.consultar(cursor, MultiDict({'limite': '2', 'despues_de': despues_de}))
@@ -0,0 +1,131 @@
+# tests/test_trabajos_pdf.py
+import threading
+import time
+
+import pytest
+
+import trabajos_pdf
+from almacenamiento import AlmacenLocal
+from trabajos_pdf import ColaLlenaError, ColaTrabajos
+
+
+def _escribir_pdf(contenido, ruta):
+    with open(ruta, 'wb') as archivo:
+        archivo.write(contenido)
+
+
+def _esperar(cola, pendientes=0, segundos=5):
+    limite = time.monotonic() + segundos
+    while cola.stats()['pendientes'] != pendientes:
+        assert time.monotonic() < limite, cola.stats()
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def cola(tmp_path):
+    cola = ColaTrabajos(str(tmp_path / 'trabajos'), AlmacenLocal(str(tmp_path / 'almacen')),
+                        workers=1, max_pendientes=2)
+    yield cola
+    cola._get_executor().shutdown(wait=True)
+
+
+@pytest.fixture
+def bloqueo():
+    """Trabajo que ocupa el único worker hasta que la prueba lo suelta."""
+    evento = threading.Event()
+
+    def generar(ruta):
+        evento.wait(5)
+        _escribir_pdf(b'%PDF', ruta)
+    yield evento, generar
+    evento.set()
+
+
+def test_trabajo_completo(cola):
+    trabajo = cola.encolar('informe', 7, 'informe.pdf', _escribir_pdf, b'%PDF-1.4')
+    _esperar(cola)
+
+    guardado = cola.obtener(trabajo.id)
+    assert guardado.estado == 'listo'
+    assert guardado.id_usuario == '7'
+    with cola.almacen.abrir(cola.clave_pdf(trabajo.id)) as archivo:
+        assert archivo.read() == b'%PDF-1.4'
+    assert cola.stats()['completados'] == 1
+
+
+def test_generacion_fallida_libera_el_lugar(cola):
+    def generar(ruta):
+        raise RuntimeError('falló reportlab')
+
+    trabajo = cola.encolar('informe', 7, 'informe.pdf', generar)
+    _esperar(cola)
+
+    assert cola.obtener(trabajo.id).estado == 'error'
+    assert not cola.almacen.existe(cola.clave_pdf(trabajo.id))
+    assert cola.stats()['fallidos'] == 1
+
+
+def test_error_despues_de_generar_libera_el_lugar(cola, monkeypatch):
+    # Antes un fallo al purgar o guardar el estado dejaba el lugar tomado para siempre
+    def purgar():
+        raise OSError('disco lleno')
+    monkeypatch.setattr(trabajos_pdf.retencion_informes, 'tal_vez_purgar', purgar)
+
+    for _ in range(3):
+        cola.encolar('informe', 7, 'informe.pdf', _escribir_pdf, b'%PDF')
+        _esperar(cola)
+    assert cola.stats()['rechazados'] == 0
+
+
+def test_cola_llena_rechaza(cola, bloqueo):
+    evento, generar = bloqueo
+    cola.encolar('informe', 7, 'a.pdf', generar)
+    cola.encolar('informe', 7, 'b.pdf', generar)
+
+    with pytest.raises(ColaLlenaError):
+        cola.encolar('informe', 7, 'c.pdf', generar)
+    assert cola.stats()['rechazados'] == 1
+
+    evento.set()
+    _esperar(cola)
+    cola.encolar('informe', 7, 'c.pdf', generar)
+    _esperar(cola)
+    assert cola.stats()['completados'] == 3
+
+
+def test_encolar_fallido_devuelve_el_lugar(cola, monkeypatch):
+    def guardar(trabajo):
+        raise OSError('sin permisos')
+    monkeypatch.setattr(cola, '_guardar', guardar)
+
+    for _ in range(3):
+        with pytest.raises(OSError):
+            cola.encolar('informe', 7, 'a.pdf', _escribir_pdf, b'%PDF')
+    assert cola.stats()['pendientes'] == 0
+
+
+def test_segundo_plano_comparte_el_limite(cola, bloqueo):
+    evento, generar = bloqueo
+    hechas = []
+    cola.encolar('informe', 7, 'a.pdf', generar)
+    assert cola.en_segundo_plano(hechas.append, 1) is not None
+    assert cola.en_segundo_plano(hechas.append, 2) is None  # cola llena: se omite
+    assert cola.stats()['omitidos'] == 1
+
+    evento.set()
+    _esperar(cola)
+    assert hechas == [1]
+
+
+def test_segundo_plano_fallido_libera_el_lugar(cola):
+    def falla():
+        raise RuntimeError('error')
+
+    for _ in range(3):
+        cola.en_segundo_plano(falla).result()
+    assert cola.stats()['pendientes'] == 0
+
+
+def test_obtener_rechaza_ids_no_validos(cola):
+    assert cola.obtener('../../etc/passwd') is None
+    assert cola.obtener('abc123') is None
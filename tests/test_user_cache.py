@@ -0,0 +1,104 @@
+# tests/test_user_cache.py
+import time
+
+import pytest
+from flask import Flask
+
+import user_cache as modulo
+from models import User
+from user_cache import UserCache, identity_from_session, store_identity_in_session
+
+
+def _usuario(id_usuario, rol='Cliente'):
+    return User(id_usuario=id_usuario, email=f'u{id_usuario}@ejemplo.com', rol=rol, id_cliente=id_usuario)
+
+
+def test_acierto_y_fallo():
+    cache = UserCache(max_size=10, ttl=60)
+    usuario = _usuario(1)
+    cache.put(usuario)
+
+    assert cache.get(1) is usuario
+    assert cache.get('1') is usuario  # Flask-Login pasa el id como texto
+    assert cache.get(2) is None
+    assert cache.stats()['aciertos'] == 2
+    assert cache.stats()['fallos'] == 1
+
+
+def test_vencimiento_por_ttl():
+    cache = UserCache(max_size=10, ttl=0.05)
+    cache.put(_usuario(1))
+    time.sleep(0.1)
+
+    assert cache.get(1) is None
+    assert cache.stats()['entradas'] == 0
+
+
+def test_lru_descarta_el_menos_usado():
+    cache = UserCache(max_size=2, ttl=60)
+    cache.put(_usuario(1))
+    cache.put(_usuario(2))
+    cache.get(1)  # 2 pasa a ser el menos usado
+    cache.put(_usuario(3))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+
+
+def test_invalidar_revoca_hasta_el_proximo_put():
+    cache = UserCache(max_size=10, ttl=60)
+    cache.put(_usuario(1))
+    cache.invalidate(1)
+
+    assert cache.get(1) is None
+    assert cache.is_revoked(1)
+    cache.put(_usuario(1))
+    assert not cache.is_revoked(1)
+
+
+def test_revocaciones_vencen_con_el_ttl():
+    cache = UserCache(max_size=10, ttl=0.05)
+    cache.invalidate(1, 2, 3)
+    assert cache.stats()['revocados'] == 3
+
+    time.sleep(0.1)
+    cache.invalidate(4)  # purga las vencidas al revocar otra
+    assert cache.stats()['revocados'] == 1
+    assert not cache.is_revoked(1)
+    assert cache.is_revoked(4)
+
+
+@pytest.fixture
+def peticion(monkeypatch):
+    monkeypatch.setattr(modulo.Config, 'SESSION_IDENTITY', True)
+    monkeypatch.setattr(modulo, 'user_cache', UserCache(max_size=10, ttl=60))
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'pruebas'
+    with app.test_request_context():
+        yield
+
+
+def test_identidad_en_sesion(peticion):
+    store_identity_in_session(_usuario(7, rol='admin'))
+    usuario = identity_from_session('7')
+
+    assert (usuario.id, usuario.rol, usuario.id_cliente) == (7, 'admin', 7)
+    assert identity_from_session('8') is None
+
+
+def test_identidad_revocada_se_descarta(peticion):
+    store_identity_in_session(_usuario(7))
+    modulo.user_cache.invalidate(7)
+
+    assert identity_from_session(7) is None
+    modulo.user_cache.put(_usuario(7))
+    assert identity_from_session(7) is None  # ya se quitó de la sesión
+
+
+def test_identidad_vencida_se_revalida(peticion, monkeypatch):
+    store_identity_in_session(_usuario(7))
+    monkeypatch.setattr(modulo.Config, 'USER_CACHE_TTL', 0)
+    time.sleep(0.01)
+
+    assert identity_from_session(7) is None
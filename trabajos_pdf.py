@@ -0,0 +1,211 @@
+# trabajos_pdf.py
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from almacenamiento import almacen, retencion_informes
+from config import Config
+
+
+class ColaLlenaError(Exception):
+    """Hay demasiados PDFs pendientes; conviene responder 503 y reintentar."""
+
+
+class Trabajo:
+    def __init__(self, tipo, id_usuario, nombre_archivo, id_trabajo=None):
+        self.id = id_trabajo or uuid.uuid4().hex
+        self.tipo = tipo
+        self.id_usuario = str(id_usuario)
+        self.nombre_archivo = nombre_archivo
+        self.estado = 'pendiente'
+        self.error = None
+        self.creado = time.time()
+        self.iniciado = None
+        self.terminado = None
+
+    def to_dict(self):
+        datos = {
+            'id_trabajo': self.id,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'nombre_archivo': self.nombre_archivo,
+            'creado': self.creado,
+            'iniciado': self.iniciado,
+            'terminado': self.terminado,
+            'id_usuario': self.id_usuario,
+            'error': self.error,
+        }
+        if self.iniciado:
+            datos['espera_ms'] = round((self.iniciado - self.creado) * 1000)
+        if self.terminado and self.iniciado:
+            datos['generacion_ms'] = round((self.terminado - self.iniciado) * 1000)
+        return datos
+
+    @classmethod
+    def from_dict(cls, datos):
+        trabajo = cls(datos['tipo'], datos['id_usuario'], datos['nombre_archivo'], datos['id_trabajo'])
+        trabajo.estado = datos['estado']
+        trabajo.error = datos['error']
+        trabajo.creado = datos['creado']
+        trabajo.iniciado = datos['iniciado']
+        trabajo.terminado = datos['terminado']
+        return trabajo
+
+
+class ColaTrabajos:
+    """Cola local de generación de PDFs con un pool de hilos acotado.
+
+    El estado de cada trabajo se guarda en ``directorio`` para que cualquier
+    worker de gunicorn pueda responder la consulta de estado; el PDF va al
+    almacén bajo informes/, que se purga por edad y tamaño.
+    """
+
+    def __init__(self, directorio, almacen, workers=2, max_pendientes=20, retencion=3600):
+        self.directorio = directorio
+        self.almacen = almacen
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self.retencion = retencion
+        self._executor = None
+        self._pendientes = 0
+        self._lock = threading.Lock()
+        self._stats = {'encolados': 0, 'completados': 0, 'fallidos': 0, 'rechazados': 0,
+                       'omitidos': 0, 'generacion_ms_total': 0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    os.makedirs(self.directorio, exist_ok=True)
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='pdf')
+        return self._executor
+
+    def clave_pdf(self, id_trabajo):
+        return f'informes/trabajo_{id_trabajo}.pdf'
+
+    def _ruta_estado(self, id_trabajo):
+        return os.path.join(self.directorio, f'{id_trabajo}.json')
+
+    def _guardar(self, trabajo):
+        ruta = self._ruta_estado(trabajo.id)
+        with open(f'{ruta}.tmp', 'w') as f:
+            json.dump(trabajo.to_dict(), f)
+        os.replace(f'{ruta}.tmp', ruta)
+
+    def encolar(self, tipo, id_usuario, nombre_archivo, generar, *args):
+        """Encola ``generar(*args, ruta)`` y devuelve el Trabajo creado; ``generar`` escribe el PDF en ruta."""
+        executor = self._get_executor()
+        with self._lock:
+            if self._pendientes >= self.max_pendientes:
+                self._stats['rechazados'] += 1
+                raise ColaLlenaError('Hay demasiados PDFs en preparación.')
+            self._pendientes += 1
+            self._stats['encolados'] += 1
+
+        try:
+            self._limpiar_vencidos()
+            trabajo = Trabajo(tipo, id_usuario, nombre_archivo)
+            self._guardar(trabajo)
+            executor.submit(self._ejecutar, trabajo, generar, args)
+        except Exception:
+            # No llegó a la cola: devolver el lugar reservado
+            with self._lock:
+                self._pendientes -= 1
+                self._stats['fallidos'] += 1
+            raise
+        return trabajo
+
+    def _ejecutar(self, trabajo, generar, args):
+        try:
+            trabajo.estado = 'en_curso'
+            trabajo.iniciado = time.time()
+            self._guardar(trabajo)
+            try:
+                self.almacen.guardar_archivo(self.clave_pdf(trabajo.id), lambda ruta: generar(*args, ruta))
+                trabajo.estado = 'listo'
+            except Exception as e:
+                print(f"Error generando el PDF del trabajo {trabajo.id}: {e}")
+                trabajo.estado = 'error'
+                trabajo.error = 'No se pudo generar el PDF.'
+            trabajo.terminado = time.time()
+            self._guardar(trabajo)
+            retencion_informes.tal_vez_purgar()
+        finally:
+            # El lugar en la cola se devuelve aunque falle el guardado del estado o la purga
+            with self._lock:
+                self._pendientes -= 1
+                if trabajo.estado == 'listo':
+                    self._stats['completados'] += 1
+                    self._stats['generacion_ms_total'] += round((trabajo.terminado - trabajo.iniciado) * 1000)
+                else:
+                    self._stats['fallidos'] += 1
+
+    def en_segundo_plano(self, funcion, *args):
+        """Ejecuta ``funcion`` en el mismo pool sin registrar un trabajo consultable.
+
+        Ocupa un lugar de ``max_pendientes`` como cualquier trabajo. Con la cola
+        llena la tarea se omite y devuelve None: solo se usa para adelantar
+        trabajo (PDFs que igual se generan al descargarlos), así que no vale
+        la pena hacer esperar a los pedidos de los usuarios.
+        """
+        executor = self._get_executor()
+        with self._lock:
+            if self._pendientes >= self.max_pendientes:
+                self._stats['omitidos'] += 1
+                return None
+            self._pendientes += 1
+
+        def _ejecutar():
+            try:
+                funcion(*args)
+            except Exception as e:
+                print(f"Error en tarea de PDFs en segundo plano: {e}")
+            finally:
+                with self._lock:
+                    self._pendientes -= 1
+        return executor.submit(_ejecutar)
+
+    def obtener(self, id_trabajo):
+        # Los ids son hex de uuid4: cualquier otro valor no es un trabajo válido
+        if not id_trabajo.isalnum():
+            return None
+        try:
+            with open(self._ruta_estado(id_trabajo)) as f:
+                return Trabajo.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _limpiar_vencidos(self):
+        limite = time.time() - self.retencion
+        try:
+            nombres = os.listdir(self.directorio)
+        except FileNotFoundError:
+            return
+        for nombre in nombres:
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                if os.path.getmtime(ruta) < limite:
+                    os.remove(ruta)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pendientes'] = self._pendientes
+        completados = stats['completados']
+        stats['generacion_ms_promedio'] = round(stats['generacion_ms_total'] / completados) if completados else 0
+        return stats
+
+
+cola_pdf = ColaTrabajos(
+    Config.TRABAJOS_DIR,
+    almacen,
+    workers=Config.TRABAJOS_WORKERS,
+    max_pendientes=Config.TRABAJOS_MAX_PENDIENTES,
+    retencion=Config.TRABAJOS_RETENCION,
+)
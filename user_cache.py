@@ -0,0 +1,122 @@
+# user_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from flask import session
+
+from config import Config
+from models import User
+
+SESSION_KEY = 'identidad'
+
+
+class UserCache:
+    """Cache LRU con vencimiento (TTL) de usuarios cargados por Flask-Login."""
+
+    def __init__(self, max_size=1000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Usuarios modificados o eliminados -> momento de la revocación: su identidad
+        # en sesión deja de ser válida. Pasado el TTL la sesión se revalida igual
+        # contra la base, así que la entrada se descarta.
+        self._revoked = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'aciertos': 0, 'fallos': 0, 'invalidaciones': 0}
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self._stats['fallos'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['aciertos'] += 1
+            return entry[0]
+
+    def put(self, user):
+        key = str(user.id)
+        with self._lock:
+            self._entries[key] = (user, time.monotonic())
+            self._entries.move_to_end(key)
+            self._revoked.pop(key, None)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            ahora = time.monotonic()
+            for user_id in user_ids:
+                key = str(user_id)
+                self._entries.pop(key, None)
+                self._revoked[key] = ahora
+                self._revoked.move_to_end(key)
+                self._stats['invalidaciones'] += 1
+            self._purge_revoked(ahora)
+
+    def _purge_revoked(self, ahora):
+        # En orden de revocación: las más viejas quedan al principio
+        while self._revoked:
+            key, revocado = next(iter(self._revoked.items()))
+            if ahora - revocado <= self.ttl:
+                break
+            del self._revoked[key]
+
+    def is_revoked(self, user_id):
+        with self._lock:
+            self._purge_revoked(time.monotonic())
+            return str(user_id) in self._revoked
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entradas'] = len(self._entries)
+            stats['revocados'] = len(self._revoked)
+        return stats
+
+
+user_cache = UserCache(max_size=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+
+
+def store_identity_in_session(user):
+    # La sesión de Flask va firmada, así que el cliente no puede alterar estos campos
+    if Config.SESSION_IDENTITY:
+        session[SESSION_KEY] = {
+            'id': user.id,
+            'email': user.email,
+            'rol': user.rol,
+            'id_cliente': user.id_cliente,
+            'verificada': time.time(),
+        }
+
+
+def identity_from_session(user_id):
+    if not Config.SESSION_IDENTITY:
+        return None
+    identidad = session.get(SESSION_KEY)
+    if not identidad or str(identidad.get('id')) != str(user_id):
+        return None
+    # Revalidar contra la base cada USER_CACHE_TTL segundos: otros workers no ven
+    # las invalidaciones de este proceso
+    vencida = time.time() - identidad.get('verificada', 0) > Config.USER_CACHE_TTL
+    if vencida or user_cache.is_revoked(user_id):
+        session.pop(SESSION_KEY, None)
+        return None
+    return User(
+        id_usuario=identidad['id'],
+        email=identidad['email'],
+        rol=identidad['rol'],
+        id_cliente=identidad['id_cliente'],
+    )
+
+
+def clear_session_identity():
+    session.pop(SESSION_KEY, None)
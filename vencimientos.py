@@ -0,0 +1,158 @@
+# vencimientos.py
+"""Barrido de turnos vencidos: elimina reservas impagas y marca las pagadas como realizadas.
+
+La app lo corre cada BARRIDO_INTERVALO segundos (300 por defecto). Cada
+worker de gunicorn tiene su programador, pero antes de barrer toma el turno
+en tareas_programadas (migración 0004): solo barre el que lo tiene vigente,
+así que los workers no compiten por las mismas filas. Con BARRIDO_INTERVALO=0
+se puede programar con cron (python vencimientos.py).
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from database import db_connection
+from dialecto import dialecto
+
+ultimo_barrido = {}
+
+
+def _seleccionar_ids(cursor, query, params, lote):
+    cursor.execute(query.format(top=dialecto.top(lote), limit=dialecto.limit(lote)), params)
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def _marcadores(ids):
+    return ', '.join('?' for _ in ids)
+
+
+def eliminar_turnos_impagos(conn, ahora, horas=48, lote=500):
+    """Elimina por lotes los turnos sin pagar cuyo horario pasó hace más de ``horas``."""
+    limite = ahora - timedelta(hours=horas)
+    cursor = conn.cursor()
+    eliminados = lotes = 0
+    while True:
+        # Predicado sargable sobre (fecha, hora) en lugar de calcular DATEADD por fila
+        ids = _seleccionar_ids(cursor, """
+            SELECT {top} t.id_turno
+            FROM turnos t
+            LEFT JOIN pagos p ON t.id_turno = p.id_turno
+            WHERE (t.fecha < ? OR (t.fecha = ? AND t.hora < ?))
+              AND (p.metodo_pago IS NULL OR p.metodo_pago = 'Pendiente')
+            ORDER BY t.id_turno {limit}
+        """, (limite.date(), limite.date(), limite.time()), lote)
+        if not ids:
+            break
+
+        marcadores = _marcadores(ids)
+        cursor.execute(f"DELETE FROM turno_servicio WHERE id_turno IN ({marcadores})", ids)
+        cursor.execute(f"DELETE FROM pagos WHERE id_turno IN ({marcadores})", ids)
+        cursor.execute(f"DELETE FROM turnos WHERE id_turno IN ({marcadores})", ids)
+        conn.commit()
+
+        eliminados += len(ids)
+        lotes += 1
+        if len(ids) < lote:
+            break
+    return eliminados, lotes
+
+
+def marcar_turnos_realizados(conn, ahora, lote=500):
+    """Pasa a 'Realizado' los turnos pagados cuyo horario ya pasó."""
+    cursor = conn.cursor()
+    realizados = lotes = 0
+    while True:
+        ids = _seleccionar_ids(cursor, """
+            SELECT {top} t.id_turno
+            FROM turnos t
+            JOIN pagos p ON t.id_turno = p.id_turno
+            WHERE t.estado = 'Pendiente'
+              AND (t.fecha < ? OR (t.fecha = ? AND t.hora < ?))
+              AND p.metodo_pago != 'Pendiente'
+            ORDER BY t.id_turno {limit}
+        """, (ahora.date(), ahora.date(), ahora.time()), lote)
+        if not ids:
+            break
+
+        cursor.execute(f"UPDATE turnos SET estado = 'Realizado' WHERE id_turno IN ({_marcadores(ids)})", ids)
+        conn.commit()
+
+        realizados += len(ids)
+        lotes += 1
+        if len(ids) < lote:
+            break
+    return realizados, lotes
+
+
+def barrer_turnos(horas=Config.BARRIDO_HORAS, lote=Config.BARRIDO_LOTE):
+    inicio = time.perf_counter()
+    ahora = datetime.now()
+    with db_connection() as conn:
+        eliminados, lotes_eliminados = eliminar_turnos_impagos(conn, ahora, horas, lote)
+        realizados, lotes_realizados = marcar_turnos_realizados(conn, ahora, lote)
+
+    resultado = {
+        'fecha': ahora.isoformat(timespec='seconds'),
+        'eliminados': eliminados,
+        'realizados': realizados,
+        'lotes': lotes_eliminados + lotes_realizados,
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+    ultimo_barrido.clear()
+    ultimo_barrido.update(resultado)
+    print(f"Barrido de turnos: {resultado}")
+    return resultado
+
+
+def tomar_turno(conn, tarea, propietario, ahora, duracion):
+    """True si ``propietario`` queda a cargo de ``tarea`` por ``duracion`` segundos.
+
+    Lo consigue si ya lo tenía (y lo renueva) o si el turno anterior venció.
+    """
+    cursor = conn.cursor()
+    ahora = ahora.replace(microsecond=0)
+    cursor.execute("""
+        UPDATE tareas_programadas SET propietario = ?, vence = ?
+        WHERE nombre = ? AND (vence < ? OR propietario = ?)
+    """, (propietario, ahora + timedelta(seconds=duracion), tarea, ahora, propietario))
+    tomado = cursor.rowcount == 1
+    conn.commit()
+    return tomado
+
+
+def iniciar_programador(intervalo):
+    """Ejecuta barrer_turnos cada ``intervalo`` segundos en un hilo daemon, si este proceso tiene el turno."""
+    propietario = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _ciclo():
+        while True:
+            try:
+                # El turno dura dos intervalos: si este proceso termina, otro lo toma después
+                with db_connection() as conn:
+                    a_cargo = tomar_turno(conn, 'barrido_turnos', propietario, datetime.now(), intervalo * 2)
+                if a_cargo:
+                    barrer_turnos()
+            except Exception as e:
+                print(f"Error en el barrido de turnos: {e}")
+            time.sleep(intervalo)
+
+    hilo = threading.Thread(target=_ciclo, name='barrido-turnos', daemon=True)
+    hilo.start()
+    return hilo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--horas', type=int, default=Config.BARRIDO_HORAS,
+                        help='Antigüedad mínima de un turno impago para eliminarlo')
+    parser.add_argument('--lote', type=int, default=Config.BARRIDO_LOTE, help='Filas por transacción')
+    args = parser.parse_args()
+    barrer_turnos(horas=args.horas, lote=args.lote)
+
+
+if __name__ == "__main__":
+    main()